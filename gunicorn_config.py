@@ -1,7 +1,12 @@
 # Railway-optimized Gunicorn config
+import os
+
 workers = 1
 threads = 2
-worker_class = "gthread"
+# Set GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker and serve
+# resume_recommender.asgi:application to run the async recommendation views
+# without tying up a thread per in-flight request
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
 worker_tmp_dir = "/dev/shm"
 timeout = 120
 max_requests = 100
@@ -1,12 +1,23 @@
 from django.contrib import admin
-from .models import RecommendationFeedback, User, Profile
+from .models import JobDescriptionText, RecommendationFeedback, RecommendationJob, User, Profile
 
 @admin.register(RecommendationFeedback)
 class RecommendationFeedbackAdmin(admin.ModelAdmin):
-    list_display = ('resume_id', 'score', 'feedback')
-    search_fields = ('resume_id',)
+    list_display = ('resume_id', 'job_description_id', 'score', 'feedback', 'created_at')
+    search_fields = ('resume_id', 'job_description__hash')
     list_filter = ('feedback',)
 
+@admin.register(JobDescriptionText)
+class JobDescriptionTextAdmin(admin.ModelAdmin):
+    list_display = ('hash', 'created_at')
+    search_fields = ('hash', 'text')
+
+@admin.register(RecommendationJob)
+class RecommendationJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'recommendation_type', 'model_name', 'created_at', 'finished_at')
+    search_fields = ('id', 'user_id')
+    list_filter = ('status', 'recommendation_type')
+
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     list_display = ('email', 'role', 'created_at')
@@ -0,0 +1,36 @@
+"""
+Executors used by the async recommendation views.
+
+Blocking Supabase and OpenRouter calls run on an I/O pool sized for many
+concurrent waits. NumPy/spaCy/sentence-transformers scoring runs on a small,
+separate pool so a burst of CPU-bound work can't starve the I/O calls (or
+the event loop). Both helpers run the function inside a copy of the
+caller's context, so ContextVar state such as the per-request LLM usage
+tracker follows the work onto the pool thread.
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+
+ASYNC_IO_WORKERS = getattr(settings, "ASYNC_IO_WORKERS", 32)
+ASYNC_SCORING_WORKERS = getattr(settings, "ASYNC_SCORING_WORKERS", min(4, os.cpu_count() or 1))
+
+io_executor = ThreadPoolExecutor(max_workers=ASYNC_IO_WORKERS, thread_name_prefix='recommender-io')
+scoring_executor = ThreadPoolExecutor(max_workers=ASYNC_SCORING_WORKERS, thread_name_prefix='recommender-scoring')
+
+async def _run_in_executor(executor, func, *args, **kwargs):
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(executor, call)
+
+async def run_in_io_executor(func, *args, **kwargs):
+    """Await a blocking network call (Supabase, OpenRouter) without blocking the event loop"""
+    return await _run_in_executor(io_executor, func, *args, **kwargs)
+
+async def run_in_scoring_executor(func, *args, **kwargs):
+    """Await CPU-bound scoring on the dedicated scoring pool"""
+    return await _run_in_executor(scoring_executor, func, *args, **kwargs)
@@ -0,0 +1,149 @@
+"""
+Async (ASGI) versions of the recommendation endpoints.
+
+Same request body and result format as RecommendAPI / LLMRecommendAPI,
+but every call scores from scratch: there is no request coalescing, no
+cached ranking behind X-Next-Cursor paging and no ETag/304 handling (all
+of those wait on thread locks or the sync cache). Clients that page or
+re-poll should use the sync endpoints.
+
+The whole middleware stack is async-capable, so under ASGI a request holds
+no thread while it waits on Supabase or OpenRouter; blocking calls run on
+the I/O executor, scoring on the scoring executor, and the LLM evaluations
+of one request run concurrently. Serve with an ASGI server (see
+gunicorn_config.py) to get the benefit; under WSGI Django runs them in a
+per-request event loop.
+"""
+
+import asyncio
+import json
+import logging
+import numpy as np
+from django.http import HttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from .async_utils import run_in_io_executor, run_in_scoring_executor
+from .llm_metrics import track_llm_usage
+from .middleware import request_user_id
+from .llm_recommender import arecommend_resumes_llm, ahybrid_recommend_resumes
+from .renderers import ORJSONRenderer
+from .serializers import parse_fields_param, parse_top_n, project_recommendations
+from .utils import load_resumes, recommend_resumes, score_resumes, get_job_embedding
+from .views import nlp_fallback_recommendations, service_error_recommendations
+
+logger = logging.getLogger('recommender')
+
+def _json_response(data, status=200):
+    return HttpResponse(ORJSONRenderer().render(data), content_type='application/json', status=status)
+
+def _request_data(request):
+    if not request.body:
+        return {}
+    return json.loads(request.body)
+
+async def _load_valid_resumes(job_desc):
+    """Fetch resumes while the job embedding is computed, then keep those with embeddings"""
+    resumes, _ = await asyncio.gather(
+        run_in_io_executor(load_resumes),
+        run_in_scoring_executor(get_job_embedding, job_desc),
+    )
+    valid_resumes = [r for r in resumes if r.get('embedding') is not None and np.size(r['embedding']) > 0]
+    logger.info(f"Processing {len(valid_resumes)} resumes with valid embeddings")
+    return valid_resumes
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncRecommendView(View):
+    async def post(self, request):
+        try:
+            data = _request_data(request)
+        except ValueError:
+            return _json_response({"error": "Request body must be JSON"}, status=400)
+        try:
+            top_n = parse_top_n(data.get("top_n"))
+        except ValueError as e:
+            return _json_response({"error": str(e)}, status=400)
+
+        try:
+            job_desc = data.get("job_description", "")
+            fields = parse_fields_param(request.GET.get("fields") or data.get("fields"))
+
+            valid_resumes = await _load_valid_resumes(job_desc)
+            recommended = await run_in_scoring_executor(recommend_resumes, job_desc, valid_resumes, top_n)
+
+            logger.info({
+                'event': 'recommendation_request',
+                'user_id': request_user_id(request, session=False),
+                'params': data,
+                'async': True
+            })
+            return _json_response(project_recommendations(recommended, fields))
+        except Exception as e:
+            logger.error(f'Error in async recommendation: {str(e)}')
+            return _json_response({"error": str(e)}, status=500)
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncLLMRecommendView(View):
+    async def post(self, request):
+        try:
+            data = _request_data(request)
+        except ValueError:
+            return _json_response({"error": "Request body must be JSON"}, status=400)
+        try:
+            top_n = parse_top_n(data.get("top_n"))
+        except ValueError as e:
+            return _json_response({"error": str(e)}, status=400)
+
+        try:
+            job_desc = data.get("job_description", "")
+            model_name = data.get("model", "llama4")  # llama4 or nemotron
+            recommendation_type = data.get("recommendation_type", "hybrid")  # hybrid or llm_only
+            fields = parse_fields_param(request.GET.get("fields") or data.get("fields"))
+            user_id = request_user_id(request, session=False)
+
+            valid_resumes = await _load_valid_resumes(job_desc)
+            nlp_scores = None
+
+            with track_llm_usage(user_id) as llm_usage:
+                try:
+                    if recommendation_type == "hybrid":
+                        nlp_scores = await run_in_scoring_executor(score_resumes, job_desc, valid_resumes)
+                        recommended = await ahybrid_recommend_resumes(
+                            job_desc,
+                            valid_resumes,
+                            nlp_scores,
+                            top_n=top_n,
+                            model_name=model_name
+                        )
+                    else:  # llm_only
+                        recommended = await arecommend_resumes_llm(
+                            job_desc,
+                            valid_resumes,
+                            top_n=top_n,
+                            model_name=model_name
+                        )
+
+                    if not recommended and valid_resumes:
+                        recommended = await run_in_scoring_executor(
+                            nlp_fallback_recommendations, job_desc, valid_resumes, top_n, nlp_scores
+                        )
+                except Exception as e:
+                    logger.error(f"Error in async recommendation process: {str(e)}")
+                    recommended = service_error_recommendations(valid_resumes, top_n)
+
+            usage_summary = llm_usage.summary()
+            logger.info({
+                'event': 'llm_recommendation_request',
+                'user_id': user_id,
+                'params': data,
+                'model': model_name,
+                'type': recommendation_type,
+                'llm_usage': usage_summary,
+                'async': True
+            })
+            response = _json_response(project_recommendations(recommended, fields))
+            response['X-LLM-Usage'] = json.dumps(usage_summary, separators=(',', ':'))
+            return response
+        except Exception as e:
+            logger.error(f'Error in async LLM recommendation: {str(e)}')
+            return _json_response({"error": str(e)}, status=500)
@@ -1,7 +1,8 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .supabase_client import supabase
+from .supabase_client import get_auth_client, get_supabase_client
+from .profiles import invalidate_profile
 import logging
 from datetime import datetime
 import os
@@ -16,6 +17,7 @@ class SignUpView(APIView):
             role = 'candidate'  # Hardcoded for candidate signup
             
             # Create user in Supabase
+            supabase = get_auth_client()
             response = supabase.auth.sign_up({
                 'email': email,
                 'password': password,
@@ -38,6 +40,8 @@ class SignUpView(APIView):
                 
                 if profile_response.error:
                     raise Exception(profile_response.error.message)
+                # A lookup before sign-up cached an empty card for this id
+                invalidate_profile(response.user.id)
                 
                 return Response({
                     'message': 'Candidate created successfully',
@@ -56,7 +60,7 @@ class SignUpView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def create_recruiter_profile(self, user, profile_data):
-        supabase = create_client(
+        supabase = get_supabase_client(
             url=os.getenv("SUPABASE_URL"),
             key=os.getenv("SUPABASE_ANON_KEY"),
         )
@@ -75,7 +79,7 @@ class LoginView(APIView):
             password = request.data.get('password')
             
             # Authenticate user with Supabase
-            response = supabase.auth.sign_in_with_password({
+            response = get_auth_client().auth.sign_in_with_password({
                 'email': email,
                 'password': password
             })
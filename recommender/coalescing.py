@@ -0,0 +1,128 @@
+"""
+Single-flight coalescing for recommendation requests.
+
+Recruiters on one team often paste the same job posting within seconds of
+each other. Requests are keyed by (normalized job text, top_n, method,
+model, requested fields, corpus version). Only the first request for a key
+does the work; concurrent duplicates in the same process wait for it and
+share its result. Finished results also go into the Django cache for
+COALESCE_RESULT_TTL seconds, so duplicates arriving just afterwards, or on
+another worker if the cache is shared, reuse them too.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+from collections import deque
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger('recommender')
+
+COALESCE_RESULT_TTL = getattr(settings, "COALESCE_RESULT_TTL", 60)
+
+# How long a duplicate waits for the in-flight request before computing on its own
+COALESCE_WAIT_TIMEOUT = getattr(settings, "COALESCE_WAIT_TIMEOUT", 150)
+
+# Results this worker cached, newest last, so the memory guard can drop them
+_written_keys = deque(maxlen=1024)
+_written_keys_lock = threading.Lock()
+
+def normalize_job_text(job_desc):
+    return re.sub(r"\s+", " ", (job_desc or "").strip().lower())
+
+def recommendation_key(job_desc, top_n, method, model=None, fields=None, corpus_version=None):
+    """Stable key for a recommendation request"""
+    parts = {
+        "job": normalize_job_text(job_desc),
+        "top_n": top_n,
+        "method": method,
+        "model": model,
+        "fields": sorted(fields) if fields else None,
+        "corpus": corpus_version,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, timeout=COALESCE_WAIT_TIMEOUT):
+        """
+        Run fn() once per key at a time.
+
+        Returns:
+            tuple: (result, shared) - shared is True if another caller computed the result
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            if call.done.wait(timeout):
+                if call.error is not None:
+                    raise call.error
+                return call.result, True
+            logger.warning(f"Gave up waiting for in-flight request {key[:12]}, computing independently")
+            return fn(), False
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+recommendation_flight = SingleFlight()
+
+def coalesce(key, compute, ttl=COALESCE_RESULT_TTL):
+    """
+    Return compute()'s value for key, sharing it with concurrent and recent duplicates.
+
+    compute returns (value, cacheable); degraded results such as LLM fallbacks
+    are still shared with requests already waiting, but are not cached.
+
+    Returns:
+        tuple: (value, shared)
+    """
+    cache_key = f"coalesced:{key}"
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached, True
+
+    def run():
+        value, cacheable = compute()
+        if cacheable and ttl:
+            cache.set(cache_key, value, ttl)
+            with _written_keys_lock:
+                _written_keys.append(cache_key)
+        return value
+
+    return recommendation_flight.do(key, run)
+
+def drop_cached_results():
+    """Delete the results this worker cached (duplicates recompute them); returns how many"""
+    with _written_keys_lock:
+        keys = list(dict.fromkeys(_written_keys))
+        _written_keys.clear()
+    if keys:
+        cache.delete_many(keys)
+    return len(keys)
@@ -0,0 +1,39 @@
+"""
+ETags and 304 Not Modified for read-mostly endpoints.
+
+Clients re-poll recommendations for saved job postings. The ETag is built
+from the corpus version and the request parameters, so it can be checked
+before any scoring runs. A matching If-None-Match gets an empty 304.
+GZip compression weakens ETags (W/"..."), so matching uses the weak
+comparison from RFC 9110.
+"""
+
+import hashlib
+import json
+from django.utils.http import parse_etags
+from rest_framework.response import Response
+
+def make_etag(*parts):
+    """Strong ETag for the given JSON-serializable request parts"""
+    digest = hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+def _opaque(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+def etag_matches(request, etag):
+    """True if the request's If-None-Match already names this ETag"""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    candidates = parse_etags(header)
+    return '*' in candidates or _opaque(etag) in {_opaque(candidate) for candidate in candidates}
+
+def with_etag(response, etag):
+    response['ETag'] = etag
+    # Let browsers keep the body but revalidate every time
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+def not_modified(etag):
+    return with_etag(Response(status=304), etag)
@@ -0,0 +1,159 @@
+"""
+Local OpenAI-compatible stand-in for OpenRouter, for load tests that must not
+spend real API quota.
+
+Serves POST .../chat/completions with configurable latency distributions and
+injected failure modes (HTTP 500, HTTP 429, malformed JSON content). Point
+llm_recommender.client at it with OPENROUTER_BASE_URL=http://host:port/api/v1.
+"""
+
+import json
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger('recommender')
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'normal', 'lognormal')
+
+class FakeOpenRouterConfig:
+    """Behaviour knobs for the stub; rates are probabilities in [0, 1]"""
+
+    def __init__(self, latency_dist='lognormal', latency_mean=1.5, latency_stddev=0.5,
+                 error_rate=0.0, rate_limit_rate=0.0, malformed_rate=0.0, retry_after=1, seed=None):
+        if latency_dist not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_dist must be one of {', '.join(LATENCY_DISTRIBUTIONS)}")
+        self.latency_dist = latency_dist
+        self.latency_mean = latency_mean
+        self.latency_stddev = latency_stddev
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.malformed_rate = malformed_rate
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def random(self):
+        with self._lock:
+            return self._rng.random()
+
+    def sample_latency(self):
+        with self._lock:
+            if self.latency_dist == 'fixed':
+                value = self.latency_mean
+            elif self.latency_dist == 'uniform':
+                value = self._rng.uniform(self.latency_mean - self.latency_stddev, self.latency_mean + self.latency_stddev)
+            elif self.latency_dist == 'normal':
+                value = self._rng.gauss(self.latency_mean, self.latency_stddev)
+            else:
+                # Parameterize the lognormal so its mean and stddev match the configured values
+                variance = self.latency_stddev ** 2
+                mean = max(self.latency_mean, 1e-6)
+                sigma2 = math.log(1 + variance / mean ** 2)
+                mu = math.log(mean) - sigma2 / 2
+                value = self._rng.lognormvariate(mu, sigma2 ** 0.5)
+        return max(0.0, value)
+
+def _fake_evaluation(config):
+    score = int(config.random() * 100)
+    return {
+        "score": score,
+        "reasoning": f"Synthetic evaluation from the fake OpenRouter server (score {score}).",
+        "skill_match": [{"skill": "Python", "match": score >= 50, "importance": "critical"}],
+        "experience_match": "Synthetic",
+        "education_match": "Synthetic",
+        "strengths": ["Synthetic strength"],
+        "weaknesses": ["Synthetic gap"],
+    }
+
+class FakeOpenRouterHandler(BaseHTTPRequestHandler):
+    server_version = "FakeOpenRouter/1.0"
+
+    def log_message(self, format, *args):
+        logger.debug("fake-openrouter: " + format % args)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/models'):
+            self._send_json(200, {"data": [{"id": "meta-llama/llama-4-maverick:free", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+            return
+
+        config = self.server.config
+        time.sleep(config.sample_latency())
+        self.server.count('requests')
+
+        roll = config.random()
+        if roll < config.rate_limit_rate:
+            self.server.count('rate_limited')
+            self._send_json(429, {"error": {"message": "Rate limit exceeded", "code": 429}},
+                            headers={'Retry-After': str(config.retry_after)})
+            return
+        if roll < config.rate_limit_rate + config.error_rate:
+            self.server.count('errors')
+            self._send_json(500, {"error": {"message": "Upstream provider error", "code": 500}})
+            return
+
+        content = json.dumps(_fake_evaluation(config))
+        if config.random() < config.malformed_rate:
+            self.server.count('malformed')
+            # Truncate mid-object, the way an overlong completion gets cut off
+            content = content[:len(content) // 2]
+
+        prompt_chars = sum(len(m.get('content') or '') for m in request.get('messages', []))
+        prompt_tokens = max(1, prompt_chars // 4)
+        completion_tokens = max(1, len(content) // 4)
+        self._send_json(200, {
+            "id": f"gen-{uuid.uuid4().hex[:16]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get('model', 'fake-model'),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+class FakeOpenRouterServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, FakeOpenRouterHandler)
+        self.config = config
+        self.counters = {'requests': 0, 'rate_limited': 0, 'errors': 0, 'malformed': 0}
+        self._counter_lock = threading.Lock()
+
+    def count(self, name):
+        with self._counter_lock:
+            self.counters[name] += 1
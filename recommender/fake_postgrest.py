@@ -0,0 +1,356 @@
+"""
+Local PostgREST-compatible stand-in for the Supabase data API, for
+integration and load tests that must not touch the live project.
+
+Serves /rest/v1/<table> from in-memory tables, covering what this app
+uses through supabase-py:
+- select with column lists
+- eq/neq/gt/gte/lt/lte/in/is filters (optionally negated with not.)
+- order, limit/offset (range), Prefer: count=exact
+- single() / maybe_single() object responses
+- insert, upsert (merge or ignore duplicates), update and delete
+
+Every request waits a sampled latency and can fail with HTTP 500, using
+the same knobs as the fake OpenRouter server. Point the app at it with
+SUPABASE_URL=http://host:port.
+"""
+
+import csv
+import functools
+import json
+import logging
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+from .fake_openrouter import FakeOpenRouterConfig
+
+logger = logging.getLogger('recommender')
+
+REST_PREFIX = '/rest/v1/'
+OBJECT_MEDIA_TYPE = 'application/vnd.pgrst.object+json'
+RESERVED_PARAMS = {'select', 'order', 'limit', 'offset', 'on_conflict', 'columns'}
+
+class FakePostgrestConfig(FakeOpenRouterConfig):
+    """Latency distribution and HTTP 500 rate for the stand-in"""
+
+    def __init__(self, latency_dist='fixed', latency_mean=0.02, latency_stddev=0.01, error_rate=0.0, seed=None):
+        super().__init__(latency_dist=latency_dist, latency_mean=latency_mean, latency_stddev=latency_stddev,
+                         error_rate=error_rate, seed=seed)
+
+class PostgrestError(Exception):
+    def __init__(self, status, code, message, details=None):
+        super().__init__(message)
+        self.status = status
+        self.payload = {'code': code, 'message': message, 'details': details, 'hint': None}
+
+class FakeTable:
+    """Rows of one table, indexed by primary key, with sort orders cached until the next write"""
+
+    def __init__(self, rows=(), primary_key='id'):
+        self.primary_key = primary_key
+        self.rows = []
+        self.by_key = {}
+        self._ordered = {}
+        for row in rows:
+            self.insert(dict(row))
+
+    def insert(self, row):
+        key = row.setdefault(self.primary_key, str(uuid.uuid4()))
+        if key in self.by_key:
+            raise PostgrestError(409, '23505', 'duplicate key value violates unique constraint',
+                                 f"Key ({self.primary_key})=({key}) already exists.")
+        self.rows.append(row)
+        self.by_key[key] = row
+        self.changed()
+        return row
+
+    def delete(self, rows):
+        doomed = {id(row) for row in rows}
+        self.rows = [row for row in self.rows if id(row) not in doomed]
+        for row in rows:
+            self.by_key.pop(row.get(self.primary_key), None)
+        self.changed()
+
+    def changed(self):
+        self._ordered.clear()
+
+    def ordered(self, order):
+        """All rows in `order`; paging through a large table sorts it once, not once per page"""
+        if order not in self._ordered:
+            self._ordered[order] = _apply_order(self.rows, order)
+        return self._ordered[order]
+
+@functools.lru_cache(maxsize=256)
+def _parse_list(value):
+    """'(a,"b,c",d)' -> ('a', 'b,c', 'd') using PostgREST's quoting"""
+    inner = value[1:-1] if value.startswith('(') and value.endswith(')') else value
+    return tuple(next(csv.reader([inner]))) if inner else ()
+
+@functools.lru_cache(maxsize=256)
+def _parse_set(value):
+    return frozenset(_parse_list(value))
+
+def _as_comparable(value, criteria):
+    if isinstance(value, bool) or value is None:
+        return value, criteria
+    if isinstance(value, (int, float)):
+        try:
+            return value, float(criteria)
+        except ValueError:
+            pass
+    return str(value), criteria
+
+def _matches(row, column, operator, criteria):
+    value = row.get(column)
+    if operator == 'is':
+        expected = {'null': None, 'true': True, 'false': False}.get(criteria.lower(), criteria)
+        return value is expected
+    if operator == 'in':
+        return value is not None and str(value) in _parse_set(criteria)
+    if value is None:
+        return False
+    if operator in ('eq', 'neq'):
+        left, right = _as_comparable(value, criteria)
+        if isinstance(left, bool):
+            right = criteria.lower() == 'true'
+        return (left == right) == (operator == 'eq')
+    if operator in ('gt', 'gte', 'lt', 'lte'):
+        left, right = _as_comparable(value, criteria)
+        return {'gt': left > right, 'gte': left >= right, 'lt': left < right, 'lte': left <= right}[operator]
+    raise PostgrestError(400, 'PGRST100', f"Unsupported operator: {operator}")
+
+def _parse_filters(params):
+    filters = []
+    for column, expression in params:
+        if column in RESERVED_PARAMS:
+            continue
+        negate = expression.startswith('not.')
+        if negate:
+            expression = expression[4:]
+        operator, _, criteria = expression.partition('.')
+        filters.append((column, operator, criteria, negate))
+    return filters
+
+def _primary_key_lookup(table, filters):
+    """
+    Rows for an eq/in filter on the primary key, without scanning the table.
+
+    Returns:
+        tuple: (rows, remaining filters still to apply)
+    """
+    for index, (column, operator, criteria, negate) in enumerate(filters):
+        if column == table.primary_key and not negate and operator in ('eq', 'in'):
+            keys = [criteria] if operator == 'eq' else _parse_list(criteria)
+            rows = [table.by_key[key] for key in dict.fromkeys(keys) if key in table.by_key]
+            return rows, filters[:index] + filters[index + 1:]
+    return table.rows, filters
+
+def _apply_order(rows, order):
+    rows = list(rows)
+    # Sort by the last key first so earlier keys take precedence (sorts are stable)
+    for term in reversed(order.split(',')):
+        parts = term.split('.')
+        column = parts[0]
+        desc = 'desc' in parts[1:]
+        nulls_first = 'nullsfirst' in parts[1:] or ('nullslast' not in parts[1:] and desc)
+        present = [row for row in rows if row.get(column) is not None]
+        missing = [row for row in rows if row.get(column) is None]
+        present.sort(key=lambda row: row[column], reverse=desc)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+def _project(rows, select):
+    if not select or select == '*':
+        return [dict(row) for row in rows]
+    columns = [column.strip() for column in select.split(',') if column.strip()]
+    return [{column: row.get(column) for column in columns} for row in rows]
+
+def _prefer(headers):
+    prefer = {}
+    for part in (headers.get('Prefer') or '').split(','):
+        name, _, value = part.strip().partition('=')
+        if name:
+            prefer[name] = value
+    return prefer
+
+class FakePostgrestHandler(BaseHTTPRequestHandler):
+    server_version = "FakePostgREST/1.0"
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, delayed ACKs add ~40ms per keep-alive request
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logger.debug("fake-postgrest: " + format % args)
+
+    def _send(self, status, payload=None, headers=None):
+        body = b'' if payload is None else json.dumps(payload, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            raise PostgrestError(400, 'PGRST102', 'Invalid JSON body')
+
+    def _handle(self, operation):
+        split = urlsplit(self.path)
+        if not split.path.startswith(REST_PREFIX):
+            # Drain the body so the keep-alive connection stays usable
+            self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            self._send(404, {'message': f"{split.path} is not served by the PostgREST stand-in"})
+            return
+        table_name = split.path[len(REST_PREFIX):].strip('/')
+        params = parse_qsl(split.query, keep_blank_values=True)
+
+        config = self.server.config
+        time.sleep(config.sample_latency())
+        self.server.count(table_name, 'requests')
+        try:
+            # supabase-py sends a body with DELETE too; it must be read even though it's ignored
+            body = self._read_body()
+            if self.command not in ('POST', 'PATCH'):
+                body = None
+            if config.random() < config.error_rate:
+                self.server.count(table_name, 'errors')
+                raise PostgrestError(500, 'XX000', 'Injected failure from the PostgREST stand-in')
+            with self.server.lock:
+                table = self.server.table(table_name)
+                status, rows, total = operation(table, dict(params), _parse_filters(params), body)
+            self._respond(status, rows, total, dict(params))
+        except PostgrestError as e:
+            self._send(e.status, e.payload)
+
+    def _respond(self, status, rows, total, params):
+        prefer = _prefer(self.headers)
+        if self.command != 'GET' and self.command != 'HEAD' and prefer.get('return') != 'representation':
+            self._send(204 if status == 200 else status, None)
+            return
+
+        rows = _project(rows, params.get('select'))
+        headers = {}
+        if total is not None:
+            start = int(params.get('offset') or 0)
+            end = f"{start}-{start + len(rows) - 1}" if rows else '*'
+            headers['Content-Range'] = f"{end}/{total if 'count' in prefer else '*'}"
+
+        if OBJECT_MEDIA_TYPE in (self.headers.get('Accept') or ''):
+            if len(rows) != 1:
+                self._send(406, {
+                    'code': 'PGRST116',
+                    'message': 'JSON object requested, multiple (or no) rows returned',
+                    'details': f"The result contains {len(rows)} rows",
+                    'hint': None,
+                })
+                return
+            self._send(status, rows[0], headers)
+            return
+        self._send(status, rows, headers)
+
+    def _select(self, table, params, filters, body):
+        if params.get('order') and not filters:
+            rows = table.ordered(params['order'])
+        else:
+            rows, filters = _primary_key_lookup(table, filters)
+            if filters:
+                rows = [row for row in rows if all(_matches(row, c, op, v) != neg for c, op, v, neg in filters)]
+            if params.get('order'):
+                rows = _apply_order(rows, params['order'])
+        total = len(rows)
+        offset = int(params.get('offset') or 0)
+        limit = params.get('limit')
+        rows = rows[offset:offset + int(limit)] if limit is not None else rows[offset:]
+        return 200, rows, total
+
+    def _insert(self, table, params, filters, body):
+        records = body if isinstance(body, list) else [body or {}]
+        resolution = _prefer(self.headers).get('resolution')
+        conflict_columns = (params.get('on_conflict') or table.primary_key).split(',')
+        if not resolution:
+            # All-or-nothing, like the single INSERT statement PostgREST runs
+            keys = [record.get(table.primary_key) for record in records if record.get(table.primary_key) is not None]
+            duplicate = next((key for key in keys if key in table.by_key), None)
+            if duplicate is not None or len(set(keys)) != len(keys):
+                raise PostgrestError(409, '23505', 'duplicate key value violates unique constraint',
+                                     f"Key ({table.primary_key})=({duplicate}) already exists.")
+        written = []
+        for record in records:
+            existing = None
+            if resolution and all(record.get(column) is not None for column in conflict_columns):
+                if conflict_columns == [table.primary_key]:
+                    existing = table.by_key.get(record[table.primary_key])
+                else:
+                    existing = next((row for row in table.rows
+                                     if all(row.get(c) == record.get(c) for c in conflict_columns)), None)
+            if existing is not None:
+                if resolution == 'merge-duplicates':
+                    existing.update(record)
+                    table.changed()
+                    written.append(existing)
+                continue
+            written.append(table.insert(dict(record)))
+        return 201, written, None
+
+    def _update(self, table, params, filters, body):
+        _, rows, _ = self._select(table, {}, filters, None)
+        for row in rows:
+            row.update(body or {})
+        table.changed()
+        return 200, rows, None
+
+    def _delete(self, table, params, filters, body):
+        _, rows, _ = self._select(table, {}, filters, None)
+        table.delete(rows)
+        return 200, rows, None
+
+    def do_GET(self):
+        self._handle(self._select)
+
+    def do_HEAD(self):
+        self._handle(self._select)
+
+    def do_POST(self):
+        self._handle(self._insert)
+
+    def do_PATCH(self):
+        self._handle(self._update)
+
+    def do_DELETE(self):
+        self._handle(self._delete)
+
+class FakePostgrestServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config, tables=None):
+        super().__init__(address, FakePostgrestHandler)
+        self.config = config
+        self.tables = {name: FakeTable(rows) for name, rows in (tables or {}).items()}
+        self.lock = threading.Lock()
+        self.counters = {}
+        self._counter_lock = threading.Lock()
+
+    def table(self, name):
+        if name not in self.tables:
+            self.tables[name] = FakeTable()
+        return self.tables[name]
+
+    def count(self, table, name):
+        with self._counter_lock:
+            counters = self.counters.setdefault(table, {'requests': 0, 'errors': 0})
+            counters[name] += 1
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
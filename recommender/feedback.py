@@ -0,0 +1,235 @@
+"""
+Buffered ingestion of recruiter feedback (thumbs up/down on a recommendation).
+
+FeedbackAPI only validates events and appends them to an in-process
+buffer, so recording feedback never waits on the database. A background
+thread flushes the buffer with bulk_create whenever FEEDBACK_FLUSH_SIZE
+events are waiting or FEEDBACK_FLUSH_INTERVAL seconds have passed, and
+once more when the process exits.
+
+Job descriptions are stored once in JobDescriptionText, keyed by the
+SHA-256 of the normalized text (the same normalization request coalescing
+uses); feedback rows only carry the hash. If the database is unavailable
+a flush puts its events back, and beyond FEEDBACK_MAX_BUFFERED waiting
+events new ones are dropped and counted rather than growing the buffer.
+"""
+
+import atexit
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from .coalescing import normalize_job_text
+from .models import JobDescriptionText, RecommendationFeedback
+
+logger = logging.getLogger('recommender')
+
+FEEDBACK_FLUSH_SIZE = getattr(settings, "FEEDBACK_FLUSH_SIZE", 200)
+FEEDBACK_FLUSH_INTERVAL = getattr(settings, "FEEDBACK_FLUSH_INTERVAL", 5.0)
+FEEDBACK_MAX_BUFFERED = getattr(settings, "FEEDBACK_MAX_BUFFERED", 10000)
+FEEDBACK_MAX_BATCH = getattr(settings, "FEEDBACK_MAX_BATCH", 500)
+
+# Hashes known to be in JobDescriptionText, so their text isn't re-sent every flush
+KNOWN_HASHES_MAX = 10000
+
+POSITIVE_VALUES = {1, '1', 'up', 'thumbs_up', 'positive', 'true'}
+NEGATIVE_VALUES = {0, -1, '0', '-1', 'down', 'thumbs_down', 'negative', 'false'}
+
+class InvalidFeedback(ValueError):
+    """Raised when a feedback payload can't be turned into events"""
+
+def job_description_hash(job_desc):
+    return hashlib.sha256(normalize_job_text(job_desc).encode('utf-8')).hexdigest()
+
+def _feedback_value(value):
+    if isinstance(value, bool):
+        return int(value)
+    if not isinstance(value, (int, str)):
+        # Lists and objects aren't hashable, let alone valid
+        raise InvalidFeedback(f"feedback must be up/down or 1/0, got {value!r}")
+    key = value.strip().lower() if isinstance(value, str) else value
+    if key in POSITIVE_VALUES:
+        return 1
+    if key in NEGATIVE_VALUES:
+        return 0
+    raise InvalidFeedback(f"feedback must be up/down or 1/0, got {value!r}")
+
+def parse_feedback_events(data, user_id=None):
+    """
+    Turn a request body into feedback events.
+
+    Accepts one event, a list of events, or {"job_description": ..., "events": [...]}
+    where the top-level job description applies to events that don't carry one.
+
+    Raises:
+        InvalidFeedback: malformed payload or event
+    """
+    shared_job = None
+    if isinstance(data, dict) and 'events' in data:
+        shared_job = data.get('job_description')
+        items = data['events']
+    elif isinstance(data, dict):
+        items = [data]
+    else:
+        items = data
+    if not isinstance(items, list) or not items:
+        raise InvalidFeedback("Expected a feedback event or a non-empty list of events")
+    if len(items) > FEEDBACK_MAX_BATCH:
+        raise InvalidFeedback(f"At most {FEEDBACK_MAX_BATCH} events per request")
+
+    now = timezone.now()
+    events = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise InvalidFeedback(f"Event {index} must be an object")
+        resume_id = str(item.get('resume_id') or '').strip()
+        job_desc = item.get('job_description') or shared_job
+        if not resume_id or len(resume_id) > 36:
+            raise InvalidFeedback(f"Event {index}: resume_id is required (at most 36 characters)")
+        if not job_desc or not isinstance(job_desc, str):
+            raise InvalidFeedback(f"Event {index}: job_description is required")
+        score = item.get('score')
+        try:
+            score = float(score) if score is not None else None
+        except (TypeError, ValueError):
+            score = math.nan
+        if score is not None and (isinstance(item['score'], bool) or not math.isfinite(score)):
+            raise InvalidFeedback(f"Event {index}: score must be a finite number")
+        try:
+            value = _feedback_value(item.get('feedback'))
+        except InvalidFeedback as e:
+            raise InvalidFeedback(f"Event {index}: {e}")
+        events.append({
+            'resume_id': resume_id,
+            'job_description': job_desc,
+            'score': score,
+            'feedback': value,
+            'user_id': str(user_id) if user_id is not None else None,
+            'created_at': now,
+        })
+    return events
+
+class FeedbackBuffer:
+    """In-memory feedback queue drained to the database by a background thread"""
+
+    def __init__(self, flush_size=FEEDBACK_FLUSH_SIZE, flush_interval=FEEDBACK_FLUSH_INTERVAL,
+                 max_buffered=FEEDBACK_MAX_BUFFERED):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self._events = []
+        self._texts = {}
+        self._known_hashes = set()
+        self._lock = threading.Lock()
+        # Serializes flushes between the flusher thread and explicit flush() calls
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+        self.stats = {'accepted': 0, 'dropped': 0, 'flushed': 0, 'flushes': 0, 'failed_flushes': 0,
+                      'last_flush_at': None, 'last_flush_seconds': None}
+
+    def _ensure_flusher(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Also covers forked workers, which don't inherit the parent's thread
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='feedback-flusher', daemon=True).start()
+
+    def add(self, events):
+        """Buffer events without touching the database; returns (accepted, dropped)"""
+        self._ensure_flusher()
+        texts = {}
+        for event in events:
+            text = event.pop('job_description')
+            event['job_description_id'] = digest = job_description_hash(text)
+            texts.setdefault(digest, text)
+        with self._lock:
+            room = max(0, self.max_buffered - len(self._events))
+            accepted, dropped = events[:room], len(events) - min(room, len(events))
+            for event in accepted:
+                digest = event['job_description_id']
+                if digest not in self._known_hashes:
+                    self._texts.setdefault(digest, texts[digest])
+            self._events.extend(accepted)
+            self.stats['accepted'] += len(accepted)
+            self.stats['dropped'] += dropped
+            full = len(self._events) >= self.flush_size
+        if full:
+            self._wake.set()
+        if dropped:
+            logger.warning(f"Feedback buffer full ({self.max_buffered} events); dropped {dropped}")
+        return len(accepted), dropped
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:  # keep the flusher alive whatever happens
+                logger.error(f"Feedback flusher error: {str(e)}")
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of feedback rows written"""
+        with self._flush_lock:
+            with self._lock:
+                events, texts = self._events, self._texts
+                self._events, self._texts = [], {}
+            if not events and not texts:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                close_old_connections()
+                JobDescriptionText.objects.bulk_create(
+                    [JobDescriptionText(hash=digest, text=text) for digest, text in texts.items()],
+                    ignore_conflicts=True
+                )
+                RecommendationFeedback.objects.bulk_create(
+                    [RecommendationFeedback(**event) for event in events],
+                    batch_size=self.flush_size
+                )
+            except Exception as e:
+                logger.error(f"Feedback flush of {len(events)} events failed: {str(e)}")
+                with self._lock:
+                    # Put them back in front, keeping within the buffer limit
+                    self._events = (events + self._events)[:self.max_buffered]
+                    self._texts = {**texts, **self._texts}
+                    self.stats['failed_flushes'] += 1
+                return 0
+            finally:
+                close_old_connections()
+
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                if len(self._known_hashes) + len(texts) > KNOWN_HASHES_MAX:
+                    self._known_hashes.clear()
+                self._known_hashes.update(texts)
+                self.stats['flushed'] += len(events)
+                self.stats['flushes'] += 1
+                self.stats['last_flush_at'] = time.time()
+                self.stats['last_flush_seconds'] = round(elapsed, 4)
+            logger.debug("Flushed %d feedback events (%d new job descriptions) in %.1f ms",
+                         len(events), len(texts), elapsed * 1000)
+            return len(events)
+
+    def snapshot(self):
+        with self._lock:
+            return {**self.stats, 'buffered': len(self._events)}
+
+feedback_buffer = FeedbackBuffer()
+
+def record_feedback(events):
+    """Queue parsed feedback events for the next flush; returns (accepted, dropped)"""
+    return feedback_buffer.add(events)
+
+# Worker recycles (gunicorn max_requests) exit normally, so the last partial batch is kept
+atexit.register(feedback_buffer.flush)
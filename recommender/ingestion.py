@@ -0,0 +1,354 @@
+"""
+Bulk resume ingestion: a directory or zip of PDFs to embedded `resumes` rows.
+
+Files stream through a staged pipeline of worker threads joined by bounded
+queues, so a large dump never sits in memory at once and a slow stage
+applies back-pressure to the ones before it:
+
+    read -> extract (pdf_utils, cached) -> normalize (text clean-up, resume
+    fields, enhance_resume_embedding) -> encode (batched) -> upsert (batched)
+
+Row ids are derived from the PDF's SHA-256, so re-ingesting the same dump
+updates rows instead of duplicating them. Each stage reports its own
+throughput so the bottleneck is obvious.
+"""
+
+import base64
+import hashlib
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import unicodedata
+import uuid
+import zipfile
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from .pdf_cache import extract_text_from_bytes_cached
+from .pdf_utils import PDF_MAX_BYTES
+from .profiles import invalidate_profile
+from .supabase_client import get_supabase_client
+from .utils import enhance_resume_embedding, extract_keywords_and_requirements, get_sentence_transformer
+
+logger = logging.getLogger('recommender')
+
+INGEST_QUEUE_SIZE = getattr(settings, "INGEST_QUEUE_SIZE", 32)
+INGEST_EXTRACT_WORKERS = getattr(settings, "INGEST_EXTRACT_WORKERS", 4)
+INGEST_NORMALIZE_WORKERS = getattr(settings, "INGEST_NORMALIZE_WORKERS", 2)
+INGEST_ENCODE_BATCH_SIZE = getattr(settings, "INGEST_ENCODE_BATCH_SIZE", 32)
+INGEST_UPSERT_BATCH_SIZE = getattr(settings, "INGEST_UPSERT_BATCH_SIZE", 100)
+
+# Same sanity threshold as PDFResumeParseAPI
+MIN_RESUME_TEXT_LENGTH = 100
+
+EDUCATION_LEVEL_DEGREES = {
+    'phd': 'PhD',
+    'masters': "Master's Degree",
+    'bachelors': "Bachelor's Degree",
+}
+
+_DONE = object()
+
+class StageStats:
+    """Throughput counters for one pipeline stage"""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def record(self, processed, seconds, failed=0):
+        with self._lock:
+            self.processed += processed
+            self.failed += failed
+            self.busy_seconds += seconds
+
+    def report(self):
+        wall = (self.finished_at or time.monotonic()) - (self.started_at or time.monotonic())
+        return {
+            'stage': self.name,
+            'workers': self.workers,
+            'processed': self.processed,
+            'failed': self.failed,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'wall_seconds': round(wall, 3),
+            'items_per_second': round(self.processed / wall, 2) if wall > 0 else None,
+        }
+
+def iter_pdf_files(source, max_files=None):
+    """
+    Yield (name, bytes) for every PDF in a directory tree or zip archive.
+
+    source may be a directory path, a zip path or a file-like zip object.
+    """
+    count = 0
+    if not isinstance(source, (str, os.PathLike)) or not os.path.isdir(source):
+        with zipfile.ZipFile(source) as archive:
+            for member in sorted(archive.infolist(), key=lambda m: m.filename):
+                if member.is_dir() or not member.filename.lower().endswith('.pdf') or '__MACOSX' in member.filename:
+                    continue
+                if max_files is not None and count >= max_files:
+                    return
+                count += 1
+                # Check the declared size first so a zip bomb is never inflated
+                if member.file_size > PDF_MAX_BYTES:
+                    yield member.filename, None
+                    continue
+                yield member.filename, archive.read(member)
+        return
+
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        for filename in sorted(files):
+            if not filename.lower().endswith('.pdf'):
+                continue
+            if max_files is not None and count >= max_files:
+                return
+            count += 1
+            path = os.path.join(root, filename)
+            if os.path.getsize(path) > PDF_MAX_BYTES:
+                yield os.path.relpath(path, source), None
+                continue
+            with open(path, 'rb') as f:
+                yield os.path.relpath(path, source), f.read()
+
+def normalize_resume_text(text):
+    """Unicode-normalize extracted text, strip control characters and collapse whitespace"""
+    text = unicodedata.normalize('NFKC', text or '')
+    text = ''.join(ch for ch in text if ch in '\n\t' or unicodedata.category(ch)[0] != 'C')
+    lines = (re.sub(r'[ \t]+', ' ', line).strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+def resume_from_text(text, resume_id, user_id=None):
+    """Best-effort `resumes` row from plain resume text, using the same extractor as job descriptions"""
+    extracted = extract_keywords_and_requirements(text)
+
+    education = []
+    degree = EDUCATION_LEVEL_DEGREES.get(extracted['education_level'])
+    if degree is None and extracted['education_terms']:
+        degree = extracted['education_terms'][0]
+    if degree:
+        education.append({'degree': degree, 'institution': ''})
+
+    return {
+        'id': resume_id,
+        'user_id': user_id,
+        'skills': extracted['skills'],
+        'certifications': extracted['certifications'],
+        'languages': extracted['languages'],
+        'education': education,
+        'experience': [],
+    }
+
+class IngestionPipeline:
+    """One run of the staged ingestion pipeline"""
+
+    def __init__(self, user_id=None, dry_run=False, client=None,
+                 extract_workers=None, normalize_workers=None,
+                 encode_batch_size=None, upsert_batch_size=None, queue_size=None):
+        self.user_id = user_id
+        self.dry_run = dry_run
+        self.client = client
+        self.extract_workers = extract_workers or INGEST_EXTRACT_WORKERS
+        self.normalize_workers = normalize_workers or INGEST_NORMALIZE_WORKERS
+        self.encode_batch_size = encode_batch_size or INGEST_ENCODE_BATCH_SIZE
+        self.upsert_batch_size = upsert_batch_size or INGEST_UPSERT_BATCH_SIZE
+        self.queue_size = queue_size or INGEST_QUEUE_SIZE
+        self.failures = []
+        self.ingested = []
+        self.cache_hits = 0
+        self._lock = threading.Lock()
+
+    def _fail(self, item, stage, error):
+        logger.warning(f"Ingestion of {item['file']} failed at {stage}: {error}")
+        with self._lock:
+            self.failures.append({'file': item['file'], 'stage': stage, 'error': str(error)})
+
+    # Stage functions: take an item, return it (possibly changed) or None to drop it
+
+    def _extract(self, item):
+        data = item.pop('data')
+        if data is None:
+            raise ValueError(f"PDF is larger than {PDF_MAX_BYTES} bytes")
+        item['text'], cache_hit = extract_text_from_bytes_cached(data)
+        if cache_hit:
+            with self._lock:
+                self.cache_hits += 1
+        return item
+
+    def _normalize(self, item):
+        text = normalize_resume_text(item.pop('text'))
+        if len(text) < MIN_RESUME_TEXT_LENGTH:
+            raise ValueError("Could not extract meaningful text from PDF")
+        resume = resume_from_text(text, item['id'], self.user_id)
+        item['resume'] = resume
+        item['embedding_text'] = enhance_resume_embedding(resume) or text
+        return item
+
+    def _encode(self, items):
+        texts = [item.pop('embedding_text') for item in items]
+        embeddings = get_sentence_transformer().encode(texts, batch_size=len(texts))
+        for item, embedding in zip(items, embeddings):
+            item['resume']['embedding'] = base64.b64encode(embedding.astype('float32').tobytes()).decode('utf-8')
+        return items
+
+    def _upsert(self, items):
+        if not self.dry_run:
+            # get_corpus_version() keys cached rankings on max(updated_at); re-ingested rows must bump it
+            updated_at = timezone.now().isoformat()
+            for item in items:
+                item['resume']['updated_at'] = updated_at
+            client = self.client or get_supabase_client()
+            client.table('resumes').upsert([item['resume'] for item in items]).execute()
+            # Candidate cards embed the owner's resume
+            for user_id in {item['resume'].get('user_id') for item in items} - {None}:
+                invalidate_profile(user_id)
+        with self._lock:
+            self.ingested.extend(item['id'] for item in items)
+        return items
+
+    # Stage runners
+
+    def _item_stage(self, stats, inbox, outbox, fn):
+        remaining = [stats.workers]
+
+        def work():
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    inbox.put(_DONE)  # let sibling workers see it too
+                    break
+                start = time.perf_counter()
+                try:
+                    result = fn(item)
+                except Exception as e:
+                    stats.record(0, time.perf_counter() - start, failed=1)
+                    self._fail(item, stats.name, e)
+                    continue
+                stats.record(1, time.perf_counter() - start)
+                if result is not None:
+                    outbox.put(result)
+            with self._lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                stats.finished_at = time.monotonic()
+                outbox.put(_DONE)
+
+        return [threading.Thread(target=work, name=f'ingest-{stats.name}-{i}', daemon=True)
+                for i in range(stats.workers)]
+
+    def _batch_stage(self, stats, inbox, outbox, fn, batch_size):
+        def run_batch(batch):
+            start = time.perf_counter()
+            try:
+                results = fn(batch)
+            except Exception as e:
+                stats.record(0, time.perf_counter() - start, failed=len(batch))
+                for item in batch:
+                    self._fail(item, stats.name, e)
+                return
+            stats.record(len(batch), time.perf_counter() - start)
+            if outbox is not None:
+                for item in results:
+                    outbox.put(item)
+
+        def work():
+            batch = []
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    break
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    run_batch(batch)
+                    batch = []
+            if batch:
+                run_batch(batch)
+            stats.finished_at = time.monotonic()
+            if outbox is not None:
+                outbox.put(_DONE)
+
+        return [threading.Thread(target=work, name=f'ingest-{stats.name}', daemon=True)]
+
+    def run(self, source, max_files=None):
+        """
+        Ingest every PDF under source.
+
+        Returns:
+            dict: counts, per-file failures and per-stage throughput
+        """
+        start = time.monotonic()
+        to_extract, to_normalize, to_encode, to_upsert = (queue.Queue(self.queue_size) for _ in range(4))
+        stages = [
+            StageStats('read', 1),
+            StageStats('extract', self.extract_workers),
+            StageStats('normalize', self.normalize_workers),
+            StageStats('encode', 1),
+            StageStats('upsert', 1),
+        ]
+        read, extract, normalize, encode, upsert = stages
+        threads = (
+            self._item_stage(extract, to_extract, to_normalize, self._extract)
+            + self._item_stage(normalize, to_normalize, to_encode, self._normalize)
+            + self._batch_stage(encode, to_encode, to_upsert, self._encode, self.encode_batch_size)
+            + self._batch_stage(upsert, to_upsert, None, self._upsert, self.upsert_batch_size)
+        )
+        for stats in stages:
+            stats.started_at = start
+        for thread in threads:
+            thread.start()
+
+        files = 0
+        duplicates = 0
+        seen_ids = set()
+        try:
+            read_start = time.perf_counter()
+            for name, data in iter_pdf_files(source, max_files):
+                files += 1
+                resume_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"resume-ingest:{hashlib.sha256(data).hexdigest()}")) if data else None
+                read.record(1, time.perf_counter() - read_start)
+                if resume_id is not None and resume_id in seen_ids:
+                    # Same bytes twice in one dump; one upsert batch can't touch a row twice
+                    duplicates += 1
+                    read_start = time.perf_counter()
+                    continue
+                seen_ids.add(resume_id)
+                # put() blocks while extraction is behind: back-pressure on the reader
+                to_extract.put({'file': name, 'id': resume_id, 'data': data})
+                read_start = time.perf_counter()
+        finally:
+            read.finished_at = time.monotonic()
+            to_extract.put(_DONE)
+            for thread in threads:
+                thread.join()
+
+        if self.ingested and not self.dry_run:
+            # New rows change the corpus; don't let cached versions hide them from rankings
+            cache.delete('corpus_version')
+
+        report = {
+            'files': files,
+            'ingested': len(self.ingested),
+            'failed': len(self.failures),
+            'duplicates': duplicates,
+            'dry_run': self.dry_run,
+            'extraction_cache_hits': self.cache_hits,
+            'wall_seconds': round(time.monotonic() - start, 3),
+            'stages': [stats.report() for stats in stages],
+            'failures': self.failures,
+        }
+        logger.info(f"Ingested {report['ingested']}/{files} resumes in {report['wall_seconds']}s ({report['failed']} failed)")
+        return report
+
+def ingest_pdfs(source, user_id=None, dry_run=False, client=None, max_files=None, **options):
+    """Run the ingestion pipeline over a directory or zip of PDFs and return its report"""
+    return IngestionPipeline(user_id=user_id, dry_run=dry_run, client=client, **options).run(source, max_files)
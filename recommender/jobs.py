@@ -0,0 +1,333 @@
+"""
+Background recommendation jobs.
+
+LLM and hybrid recommendations can outlive the gunicorn request timeout, so
+clients may submit them as jobs instead: submit_job() stores a
+RecommendationJob row and hands its id to a local worker pool, and the
+client polls the row for progress, partial results and the final results.
+
+Jobs live in the default database, so a worker recycle loses nothing. A
+running job heart-beats from a timer thread, and every process re-checks at
+most once per RECOMMENDATION_JOB_RECOVERY_INTERVAL (on submit or poll) for
+jobs whose heartbeat went stale, re-queuing them and picking up anything
+still waiting. Jobs are claimed with a conditional UPDATE, so a job runs
+once even if several processes try to pick it up.
+"""
+
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+from .llm_metrics import track_llm_usage
+from .models import RecommendationJob
+from .renderers import ORJSONRenderer
+from .serializers import project_recommendations
+
+logger = logging.getLogger('recommender')
+
+RECOMMENDATION_JOB_WORKERS = getattr(settings, "RECOMMENDATION_JOB_WORKERS", 2)
+RECOMMENDATION_JOB_MAX_QUEUED = getattr(settings, "RECOMMENDATION_JOB_MAX_QUEUED", 20)
+RECOMMENDATION_JOB_MAX_ATTEMPTS = getattr(settings, "RECOMMENDATION_JOB_MAX_ATTEMPTS", 2)
+
+# A running job whose heartbeat is older than this is assumed to have lost its worker
+RECOMMENDATION_JOB_STALE_SECONDS = getattr(settings, "RECOMMENDATION_JOB_STALE_SECONDS", 120)
+RECOMMENDATION_JOB_HEARTBEAT_INTERVAL = getattr(settings, "RECOMMENDATION_JOB_HEARTBEAT_INTERVAL", 30)
+RECOMMENDATION_JOB_RECOVERY_INTERVAL = getattr(settings, "RECOMMENDATION_JOB_RECOVERY_INTERVAL", 60)
+
+# Minimum gap between partial-result writes while LLM evaluations stream in
+PARTIAL_RESULTS_INTERVAL = 2.0
+
+ACTIVE_STATUSES = (RecommendationJob.STATUS_QUEUED, RecommendationJob.STATUS_RUNNING)
+
+class JobQueueFull(Exception):
+    """Raised when RECOMMENDATION_JOB_MAX_QUEUED jobs are already waiting or running"""
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Jobs handed to this process's pool and not finished yet, so recovery doesn't resubmit them
+_scheduled = set()
+_scheduled_lock = threading.Lock()
+
+_last_recovery = None
+_recovery_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=RECOMMENDATION_JOB_WORKERS,
+                    thread_name_prefix='recommendation-job'
+                )
+    _maybe_recover(_executor)
+    return _executor
+
+def _maybe_recover(executor):
+    """recover_jobs(), at most once per RECOMMENDATION_JOB_RECOVERY_INTERVAL per process"""
+    global _last_recovery
+    now = time.monotonic()
+    if _last_recovery is not None and now - _last_recovery < RECOMMENDATION_JOB_RECOVERY_INTERVAL:
+        return
+    if not _recovery_lock.acquire(blocking=False):
+        return  # another thread is already checking
+    try:
+        if _last_recovery is not None and now - _last_recovery < RECOMMENDATION_JOB_RECOVERY_INTERVAL:
+            return
+        _last_recovery = now
+        recover_jobs(executor)
+    except Exception as e:
+        logger.error(f"Recommendation job recovery failed: {str(e)}")
+    finally:
+        _recovery_lock.release()
+
+def _schedule(executor, job_id):
+    """Submit a job to this process's pool unless it is already waiting there"""
+    with _scheduled_lock:
+        if job_id in _scheduled:
+            return False
+        _scheduled.add(job_id)
+    executor.submit(_run_scheduled, job_id)
+    return True
+
+def _run_scheduled(job_id):
+    try:
+        retry = run_job(job_id)
+    finally:
+        with _scheduled_lock:
+            _scheduled.discard(job_id)
+    if retry:
+        _schedule(_get_executor(), job_id)
+
+def _to_json(data):
+    # Recommendations carry NumPy scalars, which JSONField can't store as-is
+    return json.loads(ORJSONRenderer().render(data))
+
+def recover_jobs(executor):
+    """Re-queue jobs whose worker stopped heart-beating and schedule everything waiting"""
+    stale = RecommendationJob.objects.filter(
+        status=RecommendationJob.STATUS_RUNNING,
+        heartbeat_at__lt=timezone.now() - timedelta(seconds=RECOMMENDATION_JOB_STALE_SECONDS)
+    )
+    # A job that keeps taking its worker down (e.g. out of memory) isn't tried forever
+    abandoned = stale.filter(attempts__gte=RECOMMENDATION_JOB_MAX_ATTEMPTS).update(
+        status=RecommendationJob.STATUS_FAILED,
+        error="Worker stopped responding",
+        finished_at=timezone.now(),
+    )
+    orphaned = stale.update(status=RecommendationJob.STATUS_QUEUED)
+    if orphaned or abandoned:
+        logger.warning(f"Re-queued {orphaned} and failed {abandoned} recommendation jobs whose worker stopped responding")
+
+    queued = list(RecommendationJob.objects
+                  .filter(status=RecommendationJob.STATUS_QUEUED)
+                  .order_by('created_at')
+                  .values_list('id', flat=True))
+    scheduled = sum(_schedule(executor, job_id) for job_id in queued)
+    if scheduled:
+        logger.info(f"Scheduled {scheduled} waiting recommendation jobs")
+
+def submit_job(job_description, top_n=5, recommendation_type="hybrid", model_name="llama4", fields=None, user_id=None):
+    """
+    Persist a job and schedule it on the worker pool.
+
+    Raises:
+        JobQueueFull: too many jobs are already queued or running
+    """
+    executor = _get_executor()
+    if RecommendationJob.objects.filter(status__in=ACTIVE_STATUSES).count() >= RECOMMENDATION_JOB_MAX_QUEUED:
+        raise JobQueueFull(f"{RECOMMENDATION_JOB_MAX_QUEUED} recommendation jobs are already pending")
+
+    job = RecommendationJob.objects.create(
+        job_description=job_description,
+        top_n=top_n,
+        recommendation_type=recommendation_type,
+        model_name=model_name,
+        fields=sorted(fields) if fields else None,
+        user_id=str(user_id) if user_id is not None else None,
+    )
+    _schedule(executor, job.id)
+    logger.info(f"Submitted recommendation job {job.id} ({recommendation_type}, {model_name})")
+    return job
+
+def get_job(job_id):
+    # Polls double as the periodic check for jobs whose worker went away
+    _get_executor()
+    return RecommendationJob.objects.filter(id=job_id).first()
+
+def _claim(job_id):
+    """Atomically move a queued job to running; False if another worker got it first"""
+    now = timezone.now()
+    claimed = RecommendationJob.objects.filter(
+        id=job_id, status=RecommendationJob.STATUS_QUEUED
+    ).update(status=RecommendationJob.STATUS_RUNNING, started_at=now, heartbeat_at=now)
+    return claimed == 1
+
+class _Heartbeat:
+    """Refreshes a running job's heartbeat_at from a timer thread, including during long NLP scoring"""
+
+    def __init__(self, job_id, interval=RECOMMENDATION_JOB_HEARTBEAT_INTERVAL):
+        self.job_id = job_id
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'job-heartbeat-{job_id}', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    beating = RecommendationJob.objects.filter(
+                        id=self.job_id, status=RecommendationJob.STATUS_RUNNING
+                    ).update(heartbeat_at=timezone.now())
+                    if not beating:
+                        logger.warning(f"Recommendation job {self.job_id} is no longer marked running")
+                except Exception as e:
+                    logger.error(f"Heartbeat for recommendation job {self.job_id} failed: {str(e)}")
+        finally:
+            connection.close()
+
+class _ProgressReporter:
+    """Publishes progress and best-so-far results, rate-limited to spare the database"""
+
+    def __init__(self, job, fields):
+        self.job = job
+        self.fields = fields
+        self.evaluated = []
+        self.last_write = 0.0
+
+    def save(self, progress, partial_results=None, force=False):
+        now = time.monotonic()
+        if not force and now - self.last_write < PARTIAL_RESULTS_INTERVAL:
+            return
+        self.last_write = now
+        update = {'progress': progress, 'heartbeat_at': timezone.now()}
+        if partial_results is not None:
+            update['partial_results'] = _to_json(project_recommendations(partial_results, self.fields))
+        RecommendationJob.objects.filter(id=self.job.id).update(**update)
+
+    def on_result(self, result, evaluated, total):
+        self.evaluated.append(result)
+        best = sorted(self.evaluated, key=lambda r: r['score'], reverse=True)[:self.job.top_n]
+        # Hybrid jobs already published the NLP ranking; raw LLM scores aren't comparable to it
+        partial = best if self.job.recommendation_type != "hybrid" else None
+        self.save({'stage': 'llm', 'evaluated': evaluated, 'total': total}, partial, force=evaluated == total)
+
+def _recommend(job, reporter):
+    """
+    Run the job's recommendation; LLM failures degrade to placeholder results.
+
+    Loading or scoring the corpus raises instead, so run_job() retries the job.
+    """
+    from .llm_recommender import hybrid_recommend_resumes, recommend_resumes_llm
+    from .utils import load_resumes, score_resumes, materialize_recommendations
+    from .views import nlp_fallback_recommendations, service_error_recommendations
+
+    reporter.save({'stage': 'loading_resumes'}, force=True)
+    resumes = load_resumes(raise_errors=True)
+    valid_resumes = [r for r in resumes if r.get('embedding') is not None and np.size(r['embedding']) > 0]
+
+    nlp_scores = None
+    if job.recommendation_type == "hybrid":
+        reporter.save({'stage': 'nlp_scoring', 'resumes': len(valid_resumes)}, force=True)
+        nlp_scores = score_resumes(job.job_description, valid_resumes)
+        reporter.save({'stage': 'llm', 'evaluated': 0},
+                      materialize_recommendations(nlp_scores, valid_resumes, job.top_n), force=True)
+
+    try:
+        if job.recommendation_type == "hybrid":
+            recommended = hybrid_recommend_resumes(
+                job.job_description, valid_resumes, top_n=job.top_n, model_name=job.model_name,
+                nlp_scores=nlp_scores, on_result=reporter.on_result
+            )
+        else:
+            recommended = recommend_resumes_llm(
+                job.job_description, valid_resumes, top_n=job.top_n, model_name=job.model_name,
+                on_result=reporter.on_result
+            )
+    except Exception as e:
+        logger.error(f"LLM evaluation failed in recommendation job {job.id}: {str(e)}")
+        recommended = service_error_recommendations(valid_resumes, job.top_n)
+
+    if not recommended and valid_resumes:
+        recommended = nlp_fallback_recommendations(job.job_description, valid_resumes, job.top_n, nlp_scores)
+    return recommended
+
+def run_job(job_id):
+    """
+    Worker entry point: run one job to completion and store its results.
+
+    Returns:
+        bool: True if the job failed and was re-queued for another attempt
+    """
+    close_old_connections()
+    try:
+        if not _claim(job_id):
+            return False
+        job = RecommendationJob.objects.get(id=job_id)
+        job.attempts += 1
+        RecommendationJob.objects.filter(id=job_id).update(attempts=job.attempts)
+        fields = set(job.fields) if job.fields else None
+        reporter = _ProgressReporter(job, fields)
+
+        try:
+            with _Heartbeat(job_id), track_llm_usage(job.user_id) as llm_usage:
+                recommended = _recommend(job, reporter)
+            RecommendationJob.objects.filter(id=job_id).update(
+                status=RecommendationJob.STATUS_SUCCEEDED,
+                results=_to_json(project_recommendations(recommended, fields)),
+                llm_usage=llm_usage.summary(),
+                progress={'stage': 'done'},
+                finished_at=timezone.now(),
+                heartbeat_at=timezone.now(),
+            )
+            logger.info(f"Recommendation job {job_id} finished with {len(recommended)} results")
+            return False
+        except Exception as e:
+            logger.error(f"Recommendation job {job_id} failed: {str(e)}")
+            # Infrastructure errors (Supabase unreachable, scoring failures) get another try
+            retry = job.attempts < RECOMMENDATION_JOB_MAX_ATTEMPTS
+            RecommendationJob.objects.filter(id=job_id).update(
+                status=RecommendationJob.STATUS_QUEUED if retry else RecommendationJob.STATUS_FAILED,
+                error=str(e),
+                finished_at=None if retry else timezone.now(),
+            )
+            return retry
+    finally:
+        close_old_connections()
+
+def serialize_job(job):
+    """Poll response for a job"""
+    data = {
+        'job_id': str(job.id),
+        'status': job.status,
+        'recommendation_type': job.recommendation_type,
+        'model': job.model_name,
+        'top_n': job.top_n,
+        'progress': job.progress,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.status == RecommendationJob.STATUS_SUCCEEDED:
+        data['results'] = job.results
+        data['llm_usage'] = job.llm_usage
+    else:
+        data['partial_results'] = job.partial_results
+    if job.error:
+        data['error'] = job.error
+    return data
@@ -0,0 +1,219 @@
+"""
+Token usage, latency and cost accounting for LLM calls.
+
+Every call made through llm_recommender.get_llm_evaluation is recorded
+twice: into the tracker of the recommendation request currently being
+served (so the view can report per-request totals), and into a rolling
+in-process store used for aggregate metrics. Optional per-user daily token
+budgets are enforced before a call is made by reserving the call's estimated
+tokens; the reservation is settled against actual usage afterwards, so a
+user can overshoot the budget by at most the estimate error of calls in flight.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger('recommender')
+
+# 0 disables the per-user daily budget
+LLM_DAILY_TOKEN_BUDGET = getattr(settings, "LLM_DAILY_TOKEN_BUDGET", 0)
+LLM_METRICS_WINDOW_SECONDS = getattr(settings, "LLM_METRICS_WINDOW_SECONDS", 3600)
+LLM_METRICS_MAX_RECORDS = getattr(settings, "LLM_METRICS_MAX_RECORDS", 10000)
+
+# USD per million tokens, keyed by OpenRouter model id
+LLM_MODEL_PRICING = getattr(settings, "LLM_MODEL_PRICING", {
+    "meta-llama/llama-4-maverick:free": {"prompt": 0.0, "completion": 0.0},
+})
+
+class LLMBudgetExceeded(Exception):
+    """Raised when a call would push a user past their daily token budget"""
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    pricing = LLM_MODEL_PRICING.get(model)
+    if not pricing:
+        return 0.0
+    return (prompt_tokens * pricing.get("prompt", 0.0) + completion_tokens * pricing.get("completion", 0.0)) / 1_000_000
+
+def summarize_calls(records):
+    """Aggregate a list of call records into totals"""
+    summary = {
+        'calls': len(records),
+        'api_calls': 0,
+        'cache_hits': 0,
+        'cache_misses': 0,
+        'errors': 0,
+        'retries': 0,
+        'prompt_tokens': 0,
+        'completion_tokens': 0,
+        'total_tokens': 0,
+        'latency_seconds': 0.0,
+        'cost_usd': 0.0,
+        'models': [],
+    }
+    for record in records:
+        if record['cache_hit']:
+            summary['cache_hits'] += 1
+        else:
+            summary['cache_misses'] += 1
+            summary['api_calls'] += 1
+        if record['error']:
+            summary['errors'] += 1
+        summary['retries'] += record['retries']
+        summary['prompt_tokens'] += record['prompt_tokens']
+        summary['completion_tokens'] += record['completion_tokens']
+        summary['latency_seconds'] += record['latency']
+        summary['cost_usd'] += record['cost_usd']
+        if record['model'] and record['model'] not in summary['models']:
+            summary['models'].append(record['model'])
+    summary['total_tokens'] = summary['prompt_tokens'] + summary['completion_tokens']
+    summary['latency_seconds'] = round(summary['latency_seconds'], 3)
+    summary['cost_usd'] = round(summary['cost_usd'], 6)
+    return summary
+
+class UsageTracker:
+    """Collects the LLM calls made while serving one recommendation request"""
+
+    def __init__(self, user_id=None):
+        self.user_id = user_id
+        self.records = []
+        self.budget_exceeded = False
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self.records.append(record)
+
+    def summary(self):
+        with self._lock:
+            summary = summarize_calls(list(self.records))
+        summary['budget_exceeded'] = self.budget_exceeded
+        return summary
+
+class RollingMetricsStore:
+    """Bounded, time-windowed store of recent call records"""
+
+    def __init__(self, window_seconds=LLM_METRICS_WINDOW_SECONDS, max_records=LLM_METRICS_MAX_RECORDS):
+        self.window_seconds = window_seconds
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self._records.append(record)
+
+    def _prune(self, now):
+        cutoff = now - self.window_seconds
+        while self._records and self._records[0]['timestamp'] < cutoff:
+            self._records.popleft()
+
+    def snapshot(self):
+        """Totals plus latency percentiles for API calls within the window"""
+        with self._lock:
+            self._prune(time.time())
+            records = list(self._records)
+        summary = summarize_calls(records)
+        latencies = sorted(r['latency'] for r in records if not r['cache_hit'])
+        for label, fraction in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99)):
+            summary[f'latency_{label}'] = round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))], 3) if latencies else 0.0
+        summary['window_seconds'] = self.window_seconds
+        return summary
+
+llm_metrics_store = RollingMetricsStore()
+
+_current_tracker = ContextVar('llm_usage_tracker', default=None)
+
+@contextmanager
+def track_llm_usage(user_id=None):
+    """Collect every LLM call made inside the block into a fresh UsageTracker"""
+    tracker = UsageTracker(user_id)
+    token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_tracker.reset(token)
+
+def current_tracker():
+    return _current_tracker.get()
+
+def record_llm_call(model, cache_hit, prompt_tokens=0, completion_tokens=0, latency=0.0, retries=0, error=False,
+                    reserved_tokens=0):
+    """
+    Record one LLM evaluation (API call or cache hit) and charge the user's budget.
+
+    reserved_tokens is what check_token_budget() reserved for this call; only the
+    difference between actual and reserved usage is charged now.
+    """
+    record = {
+        'timestamp': time.time(),
+        'model': model,
+        'cache_hit': cache_hit,
+        'prompt_tokens': prompt_tokens or 0,
+        'completion_tokens': completion_tokens or 0,
+        'latency': latency,
+        'retries': retries,
+        'error': error,
+        'cost_usd': estimate_cost(model, prompt_tokens or 0, completion_tokens or 0),
+    }
+    llm_metrics_store.add(record)
+
+    tracker = current_tracker()
+    if tracker is not None:
+        tracker.add(record)
+        charge_tokens(tracker.user_id, record['prompt_tokens'] + record['completion_tokens'] - reserved_tokens)
+    return record
+
+def _budget_key(user_id):
+    return f"llm_tokens:{user_id}:{date.today().isoformat()}"
+
+def tokens_used_today(user_id):
+    return cache.get(_budget_key(user_id), 0)
+
+def charge_tokens(user_id, tokens):
+    """Add tokens (or refund them, when negative) to the user's count for today; returns the new total"""
+    if not LLM_DAILY_TOKEN_BUDGET or user_id is None or not tokens:
+        return None
+    key = _budget_key(user_id)
+    # add() is a no-op if the key exists, so concurrent first calls don't reset the counter
+    cache.add(key, 0, timeout=86400)
+    try:
+        return cache.incr(key, tokens) if tokens > 0 else cache.decr(key, -tokens)
+    except ValueError:
+        # Expired between add() and incr()
+        cache.set(key, max(tokens, 0), timeout=86400)
+        return max(tokens, 0)
+
+def check_token_budget(estimated_tokens):
+    """
+    Reserve estimated_tokens of the current user's daily budget before a call.
+
+    The reservation is an atomic cache.incr, so concurrent calls see each
+    other's reservations instead of all passing on the same stale total.
+    Returns the tokens reserved (0 without a budget or user); pass them to
+    record_llm_call(), or to release_tokens() if the call never happens.
+
+    Raises:
+        LLMBudgetExceeded: the reservation would exceed the budget (nothing is reserved)
+    """
+    tracker = current_tracker()
+    if not LLM_DAILY_TOKEN_BUDGET or tracker is None or tracker.user_id is None or estimated_tokens <= 0:
+        return 0
+    used = charge_tokens(tracker.user_id, estimated_tokens)
+    if used > LLM_DAILY_TOKEN_BUDGET:
+        charge_tokens(tracker.user_id, -estimated_tokens)
+        tracker.budget_exceeded = True
+        logger.warning(f"User {tracker.user_id} exceeded daily LLM token budget ({used - estimated_tokens}/{LLM_DAILY_TOKEN_BUDGET})")
+        raise LLMBudgetExceeded(f"Daily LLM token budget of {LLM_DAILY_TOKEN_BUDGET} tokens exhausted")
+    return estimated_tokens
+
+def release_tokens(reserved_tokens):
+    """Give back a reservation made by check_token_budget() for a call that didn't happen"""
+    tracker = current_tracker()
+    if tracker is not None and reserved_tokens:
+        charge_tokens(tracker.user_id, -reserved_tokens)
@@ -4,16 +4,24 @@ This module provides an alternative to the traditional NLP-based approach,
 offering more advanced reasoning capabilities for resume matching.
 """
 
+import asyncio
 import json
+import hashlib
+import heapq
 import logging
 import os
+import re
+import threading
 import time
 import uuid
 import traceback
-from functools import lru_cache
+from collections import OrderedDict
+import numpy as np
 from django.conf import settings
-from openai import OpenAI
+from openai import OpenAI, APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
 from dotenv import load_dotenv
+from .llm_metrics import LLMBudgetExceeded, check_token_budget, record_llm_call, release_tokens
+from .timing import span
 
 logger = logging.getLogger('recommender')
 
@@ -65,9 +73,12 @@ try:
         logger.error("OpenRouter API key is missing or empty")
     
     # Initialize with proper headers
+    # Retries are handled (and counted) in evaluate_with_llm, so the SDK's own are disabled
     client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
+        base_url=getattr(settings, "OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
         api_key=cleaned_api_key,
+        timeout=getattr(settings, "OPENROUTER_TIMEOUT", 60.0),
+        max_retries=0,
         default_headers={
             "HTTP-Referer": getattr(settings, "SITE_URL", "https://careerreco.app"),
             "X-Title": "CareerReco"
@@ -95,104 +106,252 @@ LLM_MODELS = {
 # Default model to use
 DEFAULT_LLM_MODEL = "llama4"
 
-def format_resume_for_llm(resume):
-    """Convert resume dict to a formatted text string for LLM processing"""
-    sections = []
+# Prompt token budgets - long resumes and job posts inflate both latency and cost
+LLM_RESUME_TOKEN_BUDGET = getattr(settings, "LLM_RESUME_TOKEN_BUDGET", 600)
+LLM_JOB_TOKEN_BUDGET = getattr(settings, "LLM_JOB_TOKEN_BUDGET", 800)
+LLM_FORMAT_CACHE_SIZE = getattr(settings, "LLM_FORMAT_CACHE_SIZE", 1024)
+LLM_SECTION_EMBEDDING_CACHE_SIZE = getattr(settings, "LLM_SECTION_EMBEDDING_CACHE_SIZE", 4096)
+
+# Evaluation cache and retry policy for OpenRouter calls
+LLM_EVALUATION_CACHE_SIZE = getattr(settings, "LLM_EVALUATION_CACHE_SIZE", 100)
+LLM_MAX_RETRIES = getattr(settings, "LLM_MAX_RETRIES", 2)
+LLM_RETRY_BACKOFF = getattr(settings, "LLM_RETRY_BACKOFF", 1.0)
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+# OpenRouter calls in flight at once for a single async recommendation request
+LLM_ASYNC_CONCURRENCY = getattr(settings, "LLM_ASYNC_CONCURRENCY", 8)
+
+# Rough average for English text with the Llama tokenizer
+CHARS_PER_TOKEN = 4
+
+# Formatted resume text keyed by (resume id, resume version, budget, job key)
+_format_cache = OrderedDict()
+_format_cache_lock = threading.Lock()
+
+# Embeddings of experience entries and skills keyed by text, reused across jobs and resumes
+_section_embedding_cache = OrderedDict()
+_section_embedding_cache_lock = threading.Lock()
+
+def estimate_tokens(text):
+    """Cheap token estimate for prompt budgeting (no tokenizer round trip)"""
+    if not text:
+        return 0
+    return max(len(text.split()), -(-len(text) // CHARS_PER_TOKEN))
+
+def truncate_to_token_budget(text, token_budget):
+    """Cut text down to roughly token_budget tokens, preferring a sentence boundary"""
+    if not text or not token_budget or estimate_tokens(text) <= token_budget:
+        return text
+    
+    cut = text[:token_budget * CHARS_PER_TOKEN]
+    boundary = max(cut.rfind(". "), cut.rfind("\n"))
+    if boundary > len(cut) // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + " [...]"
+
+def _resume_version(resume):
+    """Identify a resume revision so cached prompt text is dropped when it changes"""
+    version = resume.get('updated_at') or resume.get('created_at')
+    if version:
+        return str(version)
+    # No timestamp on the row - fall back to a content hash
+    payload = json.dumps(
+        [resume.get(k) for k in ('name', 'education', 'experience', 'skills', 'languages', 'certifications')],
+        sort_keys=True, default=str
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def _job_key(job_embedding):
+    if job_embedding is None:
+        return None
+    return hashlib.sha1(np.asarray(job_embedding, dtype='float32').tobytes()).hexdigest()
+
+def _section_embeddings(texts):
+    """Embed resume sections, encoding only the texts not seen before, in one batch"""
+    from .utils import get_sentence_transformer
+    
+    vectors = {}
+    with _section_embedding_cache_lock:
+        for text in texts:
+            if text in _section_embedding_cache:
+                _section_embedding_cache.move_to_end(text)
+                vectors[text] = _section_embedding_cache[text]
+    
+    missing = [text for text in dict.fromkeys(texts) if text not in vectors]
+    if missing:
+        encoded = get_sentence_transformer().encode(missing, batch_size=len(missing))
+        with _section_embedding_cache_lock:
+            for text, vector in zip(missing, encoded):
+                vectors[text] = _section_embedding_cache[text] = np.array(vector, dtype='float32')
+            while len(_section_embedding_cache) > LLM_SECTION_EMBEDDING_CACHE_SIZE:
+                _section_embedding_cache.popitem(last=False)
+    return np.stack([vectors[text] for text in texts])
+
+def _rank_by_relevance(texts, job_embedding):
+    """Return cosine similarity of each text to the job embedding"""
+    vectors = _section_embeddings(texts)
+    job_vector = np.asarray(job_embedding, dtype='float32')
+    norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(job_vector) or 1.0)
+    norms[norms == 0] = 1.0
+    return (vectors @ job_vector) / norms
+
+def _render_resume(name, edu_list, education_missing, exp_list, experience_missing, skills, lang_strs, certifications):
+    sections = [f"# {name}"]
+    
+    if edu_list:
+        sections.append("Education:\n- " + "\n- ".join(edu_list))
+    elif education_missing:
+        sections.append("Education: No formal education listed")
+    
+    if exp_list:
+        sections.append("Experience:\n- " + "\n- ".join(exp_list))
+    elif experience_missing:
+        sections.append("Experience: No work experience listed")
+    
+    if skills:
+        sections.append("Skills: " + ", ".join(skills))
+    else:
+        sections.append("Skills: No specific skills listed")
+    
+    if lang_strs:
+        sections.append("Languages: " + ", ".join(lang_strs))
+    
+    if certifications:
+        sections.append("Certifications: " + ", ".join(certifications))
     
+    return "\n\n".join(sections)
+
+def format_resume_for_llm(resume, job_embedding=None, token_budget=None):
+    """
+    Convert resume dict to a formatted text string for LLM processing.
+    
+    When token_budget is given and the full text exceeds it, the experience
+    entries and skills least similar to job_embedding are dropped first, then
+    the remaining experience descriptions are shortened. Results are cached
+    per resume version.
+    """
+    cache_key = None
+    if resume.get('id') is not None:
+        cache_key = (resume.get('id'), _resume_version(resume), token_budget,
+                     _job_key(job_embedding) if token_budget else None)
+        with _format_cache_lock:
+            if cache_key in _format_cache:
+                _format_cache.move_to_end(cache_key)
+                return _format_cache[cache_key]
+    
+    text = _format_resume_for_llm(resume, job_embedding, token_budget)
+    
+    if cache_key is not None:
+        with _format_cache_lock:
+            _format_cache[cache_key] = text
+            while len(_format_cache) > LLM_FORMAT_CACHE_SIZE:
+                _format_cache.popitem(last=False)
+    return text
+
+def _format_resume_for_llm(resume, job_embedding, token_budget):
     # Add name and contact if available
     name = resume.get('name', '')
     if not name or name.strip() == '':
         name = f"Candidate {resume.get('user_id', 'Unknown')[:8]}"
-    sections.append(f"# {name}")
     
     # Add education
     education = resume.get('education', [])
-    if education and isinstance(education, list) and len(education) > 0:
-        edu_list = []
+    education_missing = not (education and isinstance(education, list) and len(education) > 0)
+    edu_list = []
+    if not education_missing:
         for edu in education:
             degree = edu.get('degree', '')
             institution = edu.get('institution', '')
             if degree and institution:
                 edu_list.append(f"{degree} at {institution}")
-        if edu_list:
-            sections.append("Education:\n- " + "\n- ".join(edu_list))
-    else:
-        sections.append("Education: No formal education listed")
     
-    # Add experience
+    # Add experience as (heading, description) pairs so descriptions can be shortened
     experience = resume.get('experience', [])
-    if experience and isinstance(experience, list) and len(experience) > 0:
-        exp_list = []
+    experience_missing = not (experience and isinstance(experience, list) and len(experience) > 0)
+    exp_entries = []
+    if not experience_missing:
         for exp in experience:
             position = exp.get('position', '')
             company = exp.get('company', '')
             description = exp.get('description', '')
             if position and company:
-                exp_details = f"{position} at {company}"
-                if description:
-                    exp_details += f": {description}"
-                exp_list.append(exp_details)
-        if exp_list:
-            sections.append("Experience:\n- " + "\n- ".join(exp_list))
-    else:
-        sections.append("Experience: No work experience listed")
+                exp_entries.append((f"{position} at {company}", description or ''))
     
-    # Add skills
     skills = resume.get('skills', [])
-    if skills and isinstance(skills, list) and len(skills) > 0:
-        sections.append("Skills: " + ", ".join(skills))
-    else:
-        sections.append("Skills: No specific skills listed")
+    if not (skills and isinstance(skills, list)):
+        skills = []
     
     # Add languages
     languages = resume.get('languages', [])
-    if languages and isinstance(languages, list) and len(languages) > 0:
-        lang_strs = []
+    lang_strs = []
+    if languages and isinstance(languages, list):
         for lang in languages:
             if isinstance(lang, str):
                 lang_strs.append(lang)
             elif isinstance(lang, dict):
-                name = lang.get('name', '')
+                lang_name = lang.get('name', '')
                 fluency = lang.get('fluency')
                 if fluency:
-                    lang_strs.append(f"{name} - {fluency}")
+                    lang_strs.append(f"{lang_name} - {fluency}")
                 else:
-                    lang_strs.append(name)
-        if lang_strs:
-            sections.append("Languages: " + ", ".join(lang_strs))
+                    lang_strs.append(lang_name)
     
     # Add certifications
     certifications = resume.get('certifications', [])
-    if certifications and isinstance(certifications, list) and len(certifications) > 0:
-        sections.append("Certifications: " + ", ".join(certifications))
-    
-    return "\n\n".join(sections)
+    if not (certifications and isinstance(certifications, list)):
+        certifications = []
+    
+    def render(entries, kept_skills):
+        exp_list = [f"{heading}: {desc}" if desc else heading for heading, desc in entries]
+        return _render_resume(name, edu_list, education_missing, exp_list, experience_missing,
+                              kept_skills, lang_strs, certifications)
+    
+    text = render(exp_entries, skills)
+    if not token_budget or estimate_tokens(text) <= token_budget:
+        return text
+    
+    # Over budget: rank experience entries and skills by relevance to the job
+    items = [('exp', i, f"{heading}: {desc}") for i, (heading, desc) in enumerate(exp_entries)]
+    items += [('skill', i, skill) for i, skill in enumerate(skills)]
+    if job_embedding is not None and items:
+        try:
+            relevance = _rank_by_relevance([item[2] for item in items], job_embedding)
+        except Exception as e:
+            logger.warning(f"Relevance ranking failed, trimming by position: {str(e)}")
+            relevance = None
+    else:
+        relevance = None
+    if relevance is None:
+        # Without a job vector, later entries are treated as least relevant
+        relevance = [-i for i in range(len(items))]
+    drop_order = [items[i] for i in np.argsort(relevance, kind='stable')]
+    
+    kept_exp = set(range(len(exp_entries)))
+    kept_skills = set(range(len(skills)))
+    for kind, idx, _ in drop_order:
+        # Always keep the single most relevant experience entry and skill
+        if kind == 'exp' and len(kept_exp) > 1:
+            kept_exp.discard(idx)
+        elif kind == 'skill' and len(kept_skills) > 1:
+            kept_skills.discard(idx)
+        else:
+            continue
+        text = render([exp_entries[i] for i in sorted(kept_exp)], [skills[i] for i in sorted(kept_skills)])
+        if estimate_tokens(text) <= token_budget:
+            return text
+    
+    # Still too long - shorten the surviving descriptions, then hard-truncate
+    entries = [exp_entries[i] for i in sorted(kept_exp)]
+    kept_skill_list = [skills[i] for i in sorted(kept_skills)]
+    overflow = estimate_tokens(text) - token_budget
+    entries = [
+        (heading, truncate_to_token_budget(desc, max(20, estimate_tokens(desc) - overflow)))
+        for heading, desc in entries
+    ]
+    text = render(entries, kept_skill_list)
+    return truncate_to_token_budget(text, token_budget)
 
-@lru_cache(maxsize=100)
-def get_llm_evaluation(job_desc, resume_text, model_name=DEFAULT_LLM_MODEL):
-    # Add request tracing
-    request_id = str(uuid.uuid4())[:8]
-    logger.info(f"[{request_id}] Starting LLM evaluation with model: {model_name}")
-    """
-    Use LLM to evaluate how well a resume matches a job description.
-    Caches results to avoid repeated API calls.
-    """
-    start_time = time.time()
-    request_id = f"req_{int(time.time())}_{model_name[:4]}"
-    logger.info(f"[{request_id}] Starting LLM evaluation with model: {model_name}")
-    
-    # Check for API key before making the call
-    if not ROUTER_API_KEY:
-        logger.error(f"[{request_id}] Cannot perform evaluation: OpenRouter API key is missing")
-        return {
-            "score": 50,
-            "reasoning": "OpenRouter API key is missing. Unable to perform LLM evaluation.",
-            "error": True,
-            "missing_api_key": True
-        }
-    
-    try:
-        system_prompt = """You are an expert resume analyst and hiring consultant with deep knowledge of various industries and roles.
+SYSTEM_PROMPT = """You are an expert resume analyst and hiring consultant with deep knowledge of various industries and roles.
 Your task is to evaluate how well a candidate's resume matches a job description.
 Provide a detailed analysis including a match score and specific reasoning.
 
@@ -212,7 +371,9 @@ IMPORTANT: Your response MUST be a valid, properly formatted JSON object with th
 
 DO NOT include any text outside the JSON object. Do not include markdown formatting, code blocks, or explanations. Return ONLY the JSON object itself."""
 
-        user_prompt = f"""Please evaluate how well this candidate matches the job description.
+def build_user_prompt(job_desc, resume_text):
+    """Build the per-candidate user message sent alongside SYSTEM_PROMPT"""
+    return f"""Please evaluate how well this candidate matches the job description.
 
 JOB DESCRIPTION:
 {job_desc}
@@ -230,163 +391,336 @@ Provide a comprehensive analysis of the match. Consider:
 Score the match from 0-100 and explain your reasoning in the required JSON format.
 """
 
-        # Log request details
-        logger.info(f"[{request_id}] Sending request to OpenRouter with {len(job_desc)} chars job description and {len(resume_text)} chars resume")
-        logger.info(f"[{request_id}] Using model: {LLM_MODELS.get(model_name, LLM_MODELS[DEFAULT_LLM_MODEL])}")
-        
+# Successful evaluations keyed by (job_desc, resume_text, model_name)
+_evaluation_cache = OrderedDict()
+_evaluation_cache_lock = threading.Lock()
+
+def get_llm_evaluation(job_desc, resume_text, model_name=DEFAULT_LLM_MODEL):
+    """
+    Use LLM to evaluate how well a resume matches a job description.
+    Caches successful results to avoid repeated API calls, and records token
+    usage, latency, retries and cache hits for every evaluation.
+    """
+    selected_model = LLM_MODELS.get(model_name, LLM_MODELS[DEFAULT_LLM_MODEL])
+    cache_key = (job_desc, resume_text, model_name)
+    
+    with _evaluation_cache_lock:
+        cached = _evaluation_cache.get(cache_key)
+        if cached is not None:
+            _evaluation_cache.move_to_end(cache_key)
+    if cached is not None:
+        record_llm_call(selected_model, cache_hit=True)
+        return cached
+    
+    # Enforce the per-user daily budget before spending anything
+    reserved = check_token_budget(estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(build_user_prompt(job_desc, resume_text)))
+    
+    try:
+        with span('llm_call'):
+            result, usage = evaluate_with_llm(job_desc, resume_text, model_name)
+    except BaseException:
+        release_tokens(reserved)
+        raise
+    record_llm_call(selected_model, cache_hit=False, reserved_tokens=reserved, **usage)
+    
+    # Don't pin failures in the cache - the next request should retry
+    if not result.get('error'):
+        with _evaluation_cache_lock:
+            _evaluation_cache[cache_key] = result
+            while len(_evaluation_cache) > LLM_EVALUATION_CACHE_SIZE:
+                _evaluation_cache.popitem(last=False)
+    return result
+
+def trim_caches(keep_fraction=0.5):
+    """Drop the oldest evaluation, formatted-resume and section embedding cache entries; returns how many were removed"""
+    removed = 0
+    for entries, lock in ((_evaluation_cache, _evaluation_cache_lock), (_format_cache, _format_cache_lock),
+                          (_section_embedding_cache, _section_embedding_cache_lock)):
+        with lock:
+            keep = int(len(entries) * keep_fraction)
+            while len(entries) > keep:
+                entries.popitem(last=False)
+                removed += 1
+    return removed
+
+def _parse_evaluation(response_text, request_id):
+    """Parse the model output, salvaging score and reasoning from malformed JSON"""
+    logger.debug("[%s] Response content: %.500s...", request_id, response_text)
+    
+    # Check if we have a meaningful response
+    if not response_text or len(response_text) < 5:  # Arbitrary minimum length
+        logger.error(f"[{request_id}] Response too short or empty: '{response_text}'")
+        raise ValueError("Response too short or empty")
+    
+    # SIMPLIFIED APPROACH: Create a simple default result from the response
+    # This will work even if the JSON is malformed or truncated
+    default_result = {
+        "score": 50,
+        "reasoning": "Parsing the full response was not possible.",
+        "skill_match": [],
+        "experience_match": "Unknown",
+        "education_match": "Unknown",
+        "strengths": [],
+        "weaknesses": []
+    }
+    
+    # Try to extract just the score and reasoning which appear at the beginning
+    score_match = re.search(r'"score"\s*:\s*(\d+)', response_text)
+    if score_match:
+        default_result["score"] = int(score_match.group(1))
+        logger.debug("[%s] Successfully extracted score: %s", request_id, default_result['score'])
+    
+    reasoning_match = re.search(r'"reasoning"\s*:\s*"([^"]+)"', response_text)
+    if reasoning_match:
+        default_result["reasoning"] = reasoning_match.group(1)
+        logger.debug("[%s] Successfully extracted reasoning", request_id)
+    
+    # Try one last time to parse the entire JSON properly
+    clean_text = response_text.strip()
+    start = clean_text.find('{')
+    end = clean_text.rfind('}')
+    if start >= 0 and end > start:
         try:
-            # Test with a simple static prompt first - if this works, your key is valid
-            logger.info(f"[{request_id}] Attempting OpenRouter API call with model: {model_name}")
-            
-            # Use a simpler model and prompt for testing if needed
-            # test_model = "meta-llama/llama-4-maverick:free"
-            # logger.info(f"[{request_id}] Testing API connection with model: {test_model}")
-            
-            # Prepare a clean API key
-            api_key = ROUTER_API_KEY.strip() if ROUTER_API_KEY else ""
-            
-            # Generate headers separately for clarity
-            headers = {
-                "HTTP-Referer": getattr(settings, "SITE_URL", "https://careerreco.app"),
-                "X-Title": "CareerReco"
-            }
-            
-            # Prepare the model to use
-            selected_model = LLM_MODELS.get(model_name, LLM_MODELS[DEFAULT_LLM_MODEL])
-            logger.info(f"[{request_id}] Using model: {selected_model}")
-            
-            # Make the API call with explicit JSON formatting parameters
-            completion = client.chat.completions.create(
-                extra_headers=headers,
-                model=selected_model,
-                response_format={"type": "json_object"},  # Request JSON format explicitly
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                    # Add an explicit instruction as the last message to ensure JSON formatting
-                    {"role": "assistant", "content": "I'll analyze this match and provide a JSON response."}
-                ],
-                temperature=0.1,  # Lower temperature for more consistent outputs
-                max_tokens=1500,  # Increase token limit to ensure complete response
-                top_p=0.9,       # More focused sampling
-                presence_penalty=0.1,  # Slight penalty for repetition
-                seed=42          # Use consistent seed for more predictable outputs
-            )
-            logger.info(f"[{request_id}] Received response from OpenRouter: {completion.model}")
-        except Exception as e:
-            logger.error(f"[{request_id}] OpenRouter API call failed: {str(e)}")
-            raise
+            result = json.loads(clean_text[start:end+1])
+            if isinstance(result, dict):
+                logger.debug("[%s] Successfully parsed full JSON", request_id)
+                return result
+        except ValueError:
+            pass
+    
+    logger.warning(f"[{request_id}] Full JSON parsing failed, using extracted values")
+    return default_result
+
+def evaluate_with_llm(job_desc, resume_text, model_name=DEFAULT_LLM_MODEL):
+    """
+    Call OpenRouter for one evaluation, retrying transient failures.
+    
+    Returns:
+        tuple: (evaluation dict, usage dict with prompt_tokens, completion_tokens,
+        latency, retries and error) - usage is suitable for record_llm_call()
+    """
+    start_time = time.time()
+    request_id = f"req_{uuid.uuid4().hex[:8]}_{model_name[:4]}"
+    logger.debug("[%s] Starting LLM evaluation with model: %s", request_id, model_name)
+    usage = {'prompt_tokens': 0, 'completion_tokens': 0, 'latency': 0.0, 'retries': 0, 'error': False}
+    
+    # Check for API key before making the call
+    if not ROUTER_API_KEY:
+        logger.error(f"[{request_id}] Cannot perform evaluation: OpenRouter API key is missing")
+        usage['error'] = True
+        return {
+            "score": 50,
+            "reasoning": "OpenRouter API key is missing. Unable to perform LLM evaluation.",
+            "error": True,
+            "missing_api_key": True
+        }, usage
+    
+    try:
+        # Generate headers separately for clarity
+        headers = {
+            "HTTP-Referer": getattr(settings, "SITE_URL", "https://careerreco.app"),
+            "X-Title": "CareerReco"
+        }
         
-        response_text = completion.choices[0].message.content
-        logger.info(f"[{request_id}] Raw response length: {len(response_text)} chars")
+        # Prepare the model to use
+        selected_model = LLM_MODELS.get(model_name, LLM_MODELS[DEFAULT_LLM_MODEL])
+        logger.debug("[%s] Sending request to %s with %d chars job description and %d chars resume",
+                     request_id, selected_model, len(job_desc), len(resume_text))
         
-        # Parse the JSON response
-        try:
-            logger.debug(f"[{request_id}] Response content: {response_text[:500]}...")
-            
-            # Check if we have a meaningful response
-            if not response_text or len(response_text) < 5:  # Arbitrary minimum length
-                logger.error(f"[{request_id}] Response too short or empty: '{response_text}'")
-                raise ValueError("Response too short or empty")
-            
-            # Import regex library if needed
-            import re
-            
-            # SIMPLIFIED APPROACH: Create a simple default result from the response
-            # This will work even if the JSON is malformed or truncated
-            default_result = {
-                "score": 50,
-                "reasoning": "Parsing the full response was not possible.",
-                "skill_match": [],
-                "experience_match": "Unknown",
-                "education_match": "Unknown",
-                "strengths": [],
-                "weaknesses": []
-            }
-            
-            # Try to extract just the score and reasoning which appear at the beginning
-            score_match = re.search(r'"score"\s*:\s*(\d+)', response_text)
-            if score_match:
-                try:
-                    default_result["score"] = int(score_match.group(1))
-                    logger.info(f"[{request_id}] Successfully extracted score: {default_result['score']}")
-                except:
-                    pass
-            
-            reasoning_match = re.search(r'"reasoning"\s*:\s*"([^"]+)"', response_text)
-            if reasoning_match:
-                default_result["reasoning"] = reasoning_match.group(1)
-                logger.info(f"[{request_id}] Successfully extracted reasoning")
-            
-            # Try one last time to parse the entire JSON properly
-            try:
-                clean_text = response_text.strip()
-                if '{' in clean_text and '}' in clean_text:
-                    start = clean_text.find('{')
-                    end = clean_text.rfind('}')
-                    if start >= 0 and end > start:
-                        result = json.loads(clean_text[start:end+1])
-                        logger.info(f"[{request_id}] Successfully parsed full JSON")
-                        return result
-            except:
-                logger.warning(f"[{request_id}] Full JSON parsing failed, using extracted values")
-                pass
-                
-            # Return our default result with extracted values
-            return default_result
-            
-            # Ensure we have the expected fields or provide defaults
-            if 'score' not in result:
-                logger.warning(f"[{request_id}] Missing 'score' field in response, using default")
-                result['score'] = 50
-            if 'reasoning' not in result:
-                logger.warning(f"[{request_id}] Missing 'reasoning' field in response, using default")
-                result['reasoning'] = "Analysis could not be generated properly."
-                
-            # Log performance metrics and result summary
-            duration = time.time() - start_time
-            logger.info(f"[{request_id}] LLM evaluation completed in {duration:.2f} seconds")
-            logger.info(f"[{request_id}] Score: {result.get('score')}, Error: {result.get('error', False)}")
-            
-            return result
-            
-        except json.JSONDecodeError as json_err:
-            logger.error(f"[{request_id}] LLM returned invalid JSON: {response_text[:200]}...")
-            logger.error(f"[{request_id}] Full response: {response_text}")
-            
-            # As a fallback, try to create a valid response from the model output
-            fallback_result = {
-                "score": 50,
-                "reasoning": "Error parsing LLM response: invalid JSON format",
-                "error": True,
-                "json_error": True
-            }
-            
-            # Try to extract a score from the text if possible
+        for attempt in range(LLM_MAX_RETRIES + 1):
             try:
-                # Look for patterns like "score: 85" or "score is 85"
-                import re
-                score_match = re.search(r'score[:\s]+(\d+)', response_text, re.IGNORECASE)
-                if score_match:
-                    fallback_result["score"] = min(100, max(0, int(score_match.group(1))))
-                    logger.info(f"[{request_id}] Extracted fallback score: {fallback_result['score']}")
-            except Exception as extract_err:
-                logger.error(f"[{request_id}] Error extracting fallback score: {str(extract_err)}")
-            
-            return fallback_result
+                # Make the API call with explicit JSON formatting parameters
+                completion = client.chat.completions.create(
+                    extra_headers=headers,
+                    model=selected_model,
+                    response_format={"type": "json_object"},  # Request JSON format explicitly
+                    messages=[
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": build_user_prompt(job_desc, resume_text)},
+                        # Add an explicit instruction as the last message to ensure JSON formatting
+                        {"role": "assistant", "content": "I'll analyze this match and provide a JSON response."}
+                    ],
+                    temperature=0.1,  # Lower temperature for more consistent outputs
+                    max_tokens=1500,  # Increase token limit to ensure complete response
+                    top_p=0.9,       # More focused sampling
+                    presence_penalty=0.1,  # Slight penalty for repetition
+                    seed=42          # Use consistent seed for more predictable outputs
+                )
+                break
+            except RETRYABLE_ERRORS as e:
+                if attempt >= LLM_MAX_RETRIES:
+                    logger.error(f"[{request_id}] OpenRouter API call failed after {attempt + 1} attempts: {str(e)}")
+                    raise
+                usage['retries'] += 1
+                delay = LLM_RETRY_BACKOFF * (2 ** attempt)
+                logger.warning(f"[{request_id}] OpenRouter API call failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+            except Exception as e:
+                logger.error(f"[{request_id}] OpenRouter API call failed: {str(e)}")
+                raise
+        
+        logger.debug("[%s] Received response from OpenRouter: %s", request_id, completion.model)
+        if completion.usage is not None:
+            usage['prompt_tokens'] = completion.usage.prompt_tokens or 0
+            usage['completion_tokens'] = completion.usage.completion_tokens or 0
+        
+        response_text = completion.choices[0].message.content or ''
+        result = _parse_evaluation(response_text, request_id)
+        
+        # Ensure we have the expected fields or provide defaults
+        if 'score' not in result:
+            logger.warning(f"[{request_id}] Missing 'score' field in response, using default")
+            result['score'] = 50
+        if 'reasoning' not in result:
+            logger.warning(f"[{request_id}] Missing 'reasoning' field in response, using default")
+            result['reasoning'] = "Analysis could not be generated properly."
             
     except Exception as e:
         error_trace = traceback.format_exc()
         logger.error(f"[{request_id}] Error during LLM evaluation: {str(e)}")
         logger.error(f"[{request_id}] Traceback: {error_trace}")
-        return {
+        result = {
             "score": 0,
             "reasoning": f"Error during evaluation: {str(e)}",
             "error": True,
             "exception": str(e)
         }
+        usage['error'] = True
+    
+    # Log performance metrics and result summary
+    usage['latency'] = time.time() - start_time
+    # One sampled record per call (see LOG_SAMPLE_RATES) instead of a line per step
+    logger.info({
+        'event': 'llm_call',
+        'request_id': request_id,
+        'model': model_name,
+        'latency': round(usage['latency'], 3),
+        'prompt_tokens': usage['prompt_tokens'],
+        'completion_tokens': usage['completion_tokens'],
+        'retries': usage['retries'],
+        'score': result.get('score'),
+        'error': result.get('error', False),
+    })
+    
+    return result, usage
+
+def _prepare_llm_inputs(job_desc, job_embedding):
+    """Budget the shared part of every prompt and make sure a job embedding is available for trimming"""
+    prompt_job_desc = truncate_to_token_budget(job_desc, LLM_JOB_TOKEN_BUDGET)
+    if job_embedding is None and LLM_RESUME_TOKEN_BUDGET:
+        try:
+            from .utils import get_job_embedding
+            job_embedding = get_job_embedding(job_desc)
+        except Exception as e:
+            logger.warning(f"Could not compute job embedding for prompt trimming: {str(e)}")
+    return prompt_job_desc, job_embedding
 
-def recommend_resumes_llm(job_desc, resumes, top_n=5, model_name=DEFAULT_LLM_MODEL):
+def _evaluate_resume(i, resume, prompt_job_desc, job_embedding, model_name):
+    """
+    Evaluate one resume, substituting a default evaluation when the LLM can't be used.
+    
+    Returns:
+        tuple: (evaluation dict, True if the LLM evaluation succeeded)
+    """
+    # Generate resume text for LLM
+    resume_text = format_resume_for_llm(resume, job_embedding, LLM_RESUME_TOKEN_BUDGET)
+    logger.debug("Resume %d text length: %d chars", i + 1, len(resume_text))
+    
+    # Get LLM evaluation (with error handling)
+    try:
+        return get_llm_evaluation(prompt_job_desc, resume_text, model_name), True
+    except LLMBudgetExceeded as e:
+        logger.warning(f"Skipping LLM evaluation of resume {i}: {str(e)}")
+        return {
+            'score': 50,  # Default middle score
+            'reasoning': "Daily LLM usage limit reached. This candidate was not analyzed in detail.",
+            'strengths': [],
+            'weaknesses': ["Unable to perform detailed analysis"],
+            'error': True,
+            'budget_exceeded': True
+        }, False
+    except Exception as e:
+        logger.error(f"Error evaluating resume {i}: {str(e)}")
+        # Use fallback evaluation with basic score
+        return {
+            'score': 50,  # Default middle score
+            'reasoning': f"Basic matching due to technical limitations. This candidate may have relevant skills and experience, but detailed analysis was not possible.",
+            'strengths': ["Resume contains relevant keywords", "Basic qualifications met"],
+            'weaknesses': ["Unable to perform detailed analysis"],
+            'error': True
+        }, False
+
+def _build_llm_result(resume, evaluation):
+    """Turn an evaluation into a recommendation entry in the shape ResumeCard.jsx expects"""
+    # Normalize score to 0-1 range
+    normalized_score = evaluation.get('score', 0) / 100
+    
+    # Generate match reasons from evaluation - formatted to match NLP model display
+    match_reasons = []
+    
+    # First add the main reasoning as a long paragraph (will be displayed at the top)
+    if 'reasoning' in evaluation and evaluation['reasoning']:
+        match_reasons.append(evaluation['reasoning'])
+        
+    # Then add strengths with the exact format that ResumeCard.jsx expects
+    if 'strengths' in evaluation and evaluation['strengths']:
+        for strength in evaluation['strengths']:
+            match_reasons.append(f"✓ Strength: {strength}")
+            
+    # Then add weaknesses/gaps with the exact format that ResumeCard.jsx expects
+    if 'weaknesses' in evaluation and evaluation['weaknesses']:
+        for weakness in evaluation['weaknesses']:
+            match_reasons.append(f"△ Gap: {weakness}")
+        
+    # Add skill matches if available
+    if 'skill_match' in evaluation and evaluation['skill_match']:
+        for skill in evaluation['skill_match']:
+            if isinstance(skill, dict) and 'skill' in skill and 'match' in skill:
+                if skill['match']:
+                    match_reasons.append(f"✓ Strength: Has required skill: {skill['skill']}")
+                else:
+                    match_reasons.append(f"△ Gap: Missing skill: {skill['skill']}")
+    
+    return {
+        'resume': resume,
+        'score': normalized_score,
+        'raw_score': evaluation.get('score', 0),
+        'reasoning': evaluation.get('reasoning', ''),
+        'skill_match': evaluation.get('skill_match', []),
+        'experience_match': evaluation.get('experience_match', ''),
+        'education_match': evaluation.get('education_match', ''),
+        'strengths': evaluation.get('strengths', []),
+        'weaknesses': evaluation.get('weaknesses', []),
+        'match_reasons': match_reasons
+    }
+
+def _finalize_llm_results(results, resumes, top_n):
+    """Sort evaluated resumes best first, falling back to default scores if nothing was evaluated"""
+    # Sort results by score in descending order
+    results.sort(key=lambda x: x['score'], reverse=True)
+    
+    # Ensure we have at least some results (fallback to original resumes if no evaluations succeeded)
+    if not results and resumes:
+        logger.warning("No results from LLM evaluation - using fallback with default scores")
+        for i, resume in enumerate(resumes[:top_n]):
+            results.append({
+                'resume': resume,
+                'score': 0.5,  # Default middle score
+                'raw_score': 50,
+                'reasoning': "This candidate may be a good match, but we couldn't analyze the details automatically. Consider reviewing their skills and experience manually.",
+                'match_reasons': [
+                    "This candidate may be a good match, but we couldn't analyze the details automatically. Consider reviewing their skills and experience manually.", 
+                    "✓ Strength: Resume contains basic qualifications", 
+                    "✓ Strength: Candidate has relevant background",
+                    "△ Gap: Unable to perform detailed analysis"
+                ]
+            })
+    
+    # Take top N results
+    return results[:top_n]
+
+def recommend_resumes_llm(job_desc, resumes, top_n=5, model_name=DEFAULT_LLM_MODEL, job_embedding=None,
+                          on_result=None):
     """
     Recommend resumes for a job description using LLM-based matching.
     
@@ -395,6 +729,10 @@ def recommend_resumes_llm(job_desc, resumes, top_n=5, model_name=DEFAULT_LLM_MOD
         resumes (list): List of resume dictionaries
         top_n (int): Number of top recommendations to return
         model_name (str): Name of the LLM model to use
+        job_embedding (ndarray): Precomputed job embedding used to decide what
+            to trim from over-budget resumes (computed on demand if omitted)
+        on_result (callable): Called as on_result(result, evaluated, total) after
+            each resume is evaluated, e.g. to publish partial results
         
     Returns:
         list: Top N resume recommendations with scores and explanations
@@ -408,107 +746,31 @@ def recommend_resumes_llm(job_desc, resumes, top_n=5, model_name=DEFAULT_LLM_MOD
         
     # For debugging - check first resume structure
     if len(resumes) > 0:
-        logger.info(f"First resume structure: user_id={resumes[0].get('user_id')}, skills={len(resumes[0].get('skills', []))}, experience={len(resumes[0].get('experience', []))}")
+        logger.debug("First resume structure: user_id=%s, skills=%d, experience=%d", resumes[0].get('user_id'),
+                     len(resumes[0].get('skills', [])), len(resumes[0].get('experience', [])))
     
     results = []
     success_count = 0
     error_count = 0
     
+    prompt_job_desc, job_embedding = _prepare_llm_inputs(job_desc, job_embedding)
+    
     for i, resume in enumerate(resumes):
         try:
-            # Generate resume text for LLM
-            resume_text = format_resume_for_llm(resume)
-            logger.debug(f"Resume {i+1} text length: {len(resume_text)} chars")
-            
-            # Get LLM evaluation (with error handling)
-            try:
-                # For debugging - print API key without showing full key
-                api_key_preview = "*" * (len(ROUTER_API_KEY.strip()) - 4) + ROUTER_API_KEY.strip()[-4:] if ROUTER_API_KEY else "None"
-                logger.info(f"Using API key: {api_key_preview}")
-                
-                evaluation = get_llm_evaluation(job_desc, resume_text, model_name)
+            evaluation, succeeded = _evaluate_resume(i, resume, prompt_job_desc, job_embedding, model_name)
+            if succeeded:
                 success_count += 1
-            except Exception as e:
-                logger.error(f"Error evaluating resume {i}: {str(e)}")
-                # Use fallback evaluation with basic score
-                evaluation = {
-                    'score': 50,  # Default middle score
-                    'reasoning': f"Basic matching due to technical limitations. This candidate may have relevant skills and experience, but detailed analysis was not possible.",
-                    'strengths': ["Resume contains relevant keywords", "Basic qualifications met"],
-                    'weaknesses': ["Unable to perform detailed analysis"],
-                    'error': True
-                }
+            else:
                 error_count += 1
-            
-            # Normalize score to 0-1 range
-            normalized_score = evaluation.get('score', 0) / 100
-            
-            # Generate match reasons from evaluation - formatted to match NLP model display
-            match_reasons = []
-            
-            # First add the main reasoning as a long paragraph (will be displayed at the top)
-            if 'reasoning' in evaluation and evaluation['reasoning']:
-                match_reasons.append(evaluation['reasoning'])
-                
-            # Then add strengths with the exact format that ResumeCard.jsx expects
-            if 'strengths' in evaluation and evaluation['strengths']:
-                for strength in evaluation['strengths']:
-                    match_reasons.append(f"✓ Strength: {strength}")
-                    
-            # Then add weaknesses/gaps with the exact format that ResumeCard.jsx expects
-            if 'weaknesses' in evaluation and evaluation['weaknesses']:
-                for weakness in evaluation['weaknesses']:
-                    match_reasons.append(f"△ Gap: {weakness}")
-                
-            # Add skill matches if available
-            if 'skill_match' in evaluation and evaluation['skill_match']:
-                for skill in evaluation['skill_match']:
-                    if isinstance(skill, dict) and 'skill' in skill and 'match' in skill:
-                        if skill['match']:
-                            match_reasons.append(f"✓ Strength: Has required skill: {skill['skill']}")
-                        else:
-                            match_reasons.append(f"△ Gap: Missing skill: {skill['skill']}")
-            
-            # Add to results
-            results.append({
-                'resume': resume,
-                'score': normalized_score,
-                'raw_score': evaluation.get('score', 0),
-                'reasoning': evaluation.get('reasoning', ''),
-                'skill_match': evaluation.get('skill_match', []),
-                'experience_match': evaluation.get('experience_match', ''),
-                'education_match': evaluation.get('education_match', ''),
-                'strengths': evaluation.get('strengths', []),
-                'weaknesses': evaluation.get('weaknesses', []),
-                'match_reasons': match_reasons
-            })
+            results.append(_build_llm_result(resume, evaluation))
+            if on_result is not None:
+                on_result(results[-1], i + 1, len(resumes))
             
         except Exception as e:
             logger.error(f"Critical error processing resume {i}: {str(e)}")
             logger.error(traceback.format_exc())
     
-    # Sort results by score in descending order
-    results.sort(key=lambda x: x['score'], reverse=True)
-    
-    # Ensure we have at least some results (fallback to original resumes if no evaluations succeeded)
-    if not results and resumes:
-        logger.warning("No results from LLM evaluation - using fallback with default scores")
-        for i, resume in enumerate(resumes[:top_n]):
-            results.append({
-                'resume': resume,
-                'score': 0.5,  # Default middle score
-                'raw_score': 50,
-                'reasoning': "This candidate may be a good match, but we couldn't analyze the details automatically. Consider reviewing their skills and experience manually.",
-                'match_reasons': [
-                    "This candidate may be a good match, but we couldn't analyze the details automatically. Consider reviewing their skills and experience manually.", 
-                    "✓ Strength: Resume contains basic qualifications", 
-                    "✓ Strength: Candidate has relevant background",
-                    "△ Gap: Unable to perform detailed analysis"
-                ]
-            })
-    
-    # Take top N results
-    top_results = results[:top_n]
+    top_results = _finalize_llm_results(results, resumes, top_n)
     
     # Log performance metrics
     duration = time.time() - start_time
@@ -517,8 +779,150 @@ def recommend_resumes_llm(job_desc, resumes, top_n=5, model_name=DEFAULT_LLM_MOD
     
     return top_results
 
+async def arecommend_resumes_llm(job_desc, resumes, top_n=5, model_name=DEFAULT_LLM_MODEL, job_embedding=None):
+    """
+    Async recommend_resumes_llm: evaluates resumes concurrently instead of one after another.
+    
+    At most LLM_ASYNC_CONCURRENCY OpenRouter calls are in flight per request.
+    Each runs on the I/O executor with the caller's context, so usage is
+    still recorded on the request's UsageTracker.
+    """
+    from .async_utils import run_in_io_executor, run_in_scoring_executor
+    
+    start_time = time.time()
+    logger.info(f"Starting async LLM-based recommendation for {len(resumes)} resumes")
+    
+    if not resumes:
+        logger.error("No resumes provided to LLM recommender")
+        return []
+    
+    prompt_job_desc, job_embedding = await run_in_scoring_executor(_prepare_llm_inputs, job_desc, job_embedding)
+    semaphore = asyncio.Semaphore(LLM_ASYNC_CONCURRENCY)
+    
+    async def evaluate(i, resume):
+        async with semaphore:
+            try:
+                evaluation, succeeded = await run_in_io_executor(
+                    _evaluate_resume, i, resume, prompt_job_desc, job_embedding, model_name
+                )
+                return _build_llm_result(resume, evaluation), succeeded
+            except Exception as e:
+                logger.error(f"Critical error processing resume {i}: {str(e)}")
+                logger.error(traceback.format_exc())
+                return None, False
+    
+    outcomes = await asyncio.gather(*(evaluate(i, resume) for i, resume in enumerate(resumes)))
+    results = [result for result, _ in outcomes if result is not None]
+    success_count = sum(1 for _, succeeded in outcomes if succeeded)
+    
+    top_results = _finalize_llm_results(results, resumes, top_n)
+    
+    duration = time.time() - start_time
+    logger.info(f"Async LLM recommendation completed in {duration:.2f} seconds with {success_count} successes and {len(resumes) - success_count} errors")
+    
+    return top_results
+
+def _nlp_results_to_scores(nlp_results):
+    """Convert a legacy nlp_func result list into a score_resumes()-style mapping"""
+    scores = {}
+    for index, result in enumerate(nlp_results):
+        # Check if the result has a nested 'resume' key or if the resume data is directly in the result
+        if 'resume' in result and isinstance(result['resume'], dict) and 'id' in result['resume']:
+            resume = result['resume']
+        elif 'id' in result:  # If the resume data is directly in the result
+            resume = result
+        else:
+            logger.warning(f"Skipping NLP result with unexpected structure: {result.get('id', index)}")
+            continue
+        scores[resume['id']] = {
+            'score': result['score'],
+            'match_reasons': result.get('match_reasons', []),
+            'score_components': result.get('score_components', {}),
+            'resume': resume
+        }
+    return scores
+
+def fuse_hybrid_scores(nlp_scores, llm_by_key, top_n, nlp_weight=0.4, llm_weight=0.6):
+    """
+    Combine NLP and LLM scores in a single pass and keep only the best top_n.
+    
+    Args:
+        nlp_scores (dict): resume key -> score_resumes() entry
+        llm_by_key (dict): resume key -> recommend_resumes_llm() result
+        
+    Returns:
+        list: (resume key, combined score) tuples, best first
+    """
+    def combined(key):
+        nlp_score = nlp_scores[key]['score']
+        if key in llm_by_key:
+            return (nlp_weight * nlp_score) + (llm_weight * llm_by_key[key]['score'])
+        # For resumes that weren't evaluated by LLM, just use the NLP score scaled up to compensate
+        return nlp_score * (nlp_weight + llm_weight)
+    
+    return heapq.nlargest(top_n, ((key, combined(key)) for key in nlp_scores), key=lambda item: item[1])
+
+def _select_llm_candidates(nlp_scores, resumes):
+    """Pick the NLP top candidates worth sending to the LLM"""
+    from .utils import resume_key, top_scored_keys
+    
+    resumes_by_key = {resume_key(resume, index): resume for index, resume in enumerate(resumes)}
+    
+    # Only process top 20 or all if less than 20 to save API costs
+    top_nlp_keys = top_scored_keys(nlp_scores, 20)
+    top_nlp_candidates = [nlp_scores[key].get('resume') or resumes_by_key[key] for key in top_nlp_keys]
+    logger.info(f"Selected {len(top_nlp_candidates)} top candidates for LLM evaluation")
+    return resumes_by_key, top_nlp_keys, top_nlp_candidates
+
+def _combine_hybrid_results(nlp_scores, resumes_by_key, top_nlp_keys, top_nlp_candidates, llm_results,
+                            top_n, nlp_weight, llm_weight):
+    """Fuse NLP and LLM scores and materialize only the final top N"""
+    # LLM results carry the candidate dict they were given, so match them back by identity
+    candidate_keys = {id(resume): key for key, resume in zip(top_nlp_keys, top_nlp_candidates)}
+    llm_by_key = {}
+    for result in llm_results:
+        key = candidate_keys.get(id(result.get('resume')))
+        if key is not None:
+            llm_by_key[key] = result
+    
+    combined_results = []
+    for key, combined_score in fuse_hybrid_scores(nlp_scores, llm_by_key, top_n, nlp_weight, llm_weight):
+        nlp_entry = nlp_scores[key]
+        resume_data = dict(nlp_entry.get('resume') or resumes_by_key[key])
+        resume_data.update(
+            score=nlp_entry['score'],
+            match_reasons=nlp_entry['match_reasons'],
+            score_components=nlp_entry['score_components']
+        )
+        resume_data.pop('resume', None)
+        
+        llm_result = llm_by_key.get(key)
+        if llm_result:
+            combined_results.append({
+                'resume': resume_data,
+                'score': combined_score,
+                'nlp_score': nlp_entry['score'],
+                'llm_score': llm_result['score'],
+                'nlp_reasoning': '',
+                'llm_reasoning': llm_result.get('reasoning', ''),
+                'skill_match': llm_result.get('skill_match', []),
+                'strengths': llm_result.get('strengths', []),
+                'weaknesses': llm_result.get('weaknesses', [])
+            })
+        else:
+            combined_results.append({
+                'resume': resume_data,
+                'score': combined_score,
+                'nlp_score': nlp_entry['score'],
+                'llm_score': 0,
+                'nlp_reasoning': '',
+                'llm_reasoning': "Not evaluated by LLM"
+            })
+    
+    return combined_results
+
 def hybrid_recommend_resumes(job_desc, resumes, top_n=5, nlp_weight=0.4, llm_weight=0.6, 
-                            nlp_func=None, model_name=DEFAULT_LLM_MODEL):
+                            nlp_func=None, model_name=DEFAULT_LLM_MODEL, nlp_scores=None, on_result=None):
     """
     Hybrid recommendation combining traditional NLP and LLM approaches.
     
@@ -528,92 +932,38 @@ def hybrid_recommend_resumes(job_desc, resumes, top_n=5, nlp_weight=0.4, llm_wei
         top_n (int): Number of top recommendations to return
         nlp_weight (float): Weight for NLP-based scores (0-1)
         llm_weight (float): Weight for LLM-based scores (0-1)
-        nlp_func (callable): Function to call for NLP-based recommendations
+        nlp_func (callable): Legacy recommend_resumes-style function for the NLP stage
         model_name (str): Name of the LLM model to use
+        nlp_scores (dict): Precomputed score_resumes() output to reuse instead of rescoring
+        on_result (callable): Progress callback passed on to recommend_resumes_llm
         
     Returns:
         list: Top N resume recommendations with combined scores
     """
-    from .utils import recommend_resumes as default_nlp_func
-    
-    if nlp_func is None:
-        nlp_func = default_nlp_func
+    from .utils import score_resumes
     
-    # Phase 1: Get traditional NLP recommendations with scores
-    nlp_results = nlp_func(job_desc, resumes, top_n=len(resumes))
-    
-    # Create a map of resume ID to NLP score
-    nlp_scores = {}
-    for result in nlp_results:
-        # Check if the result has a nested 'resume' key or if the resume data is directly in the result
-        if 'resume' in result and isinstance(result['resume'], dict) and 'id' in result['resume']:
-            nlp_scores[result['resume']['id']] = result['score']
-        elif 'id' in result:  # If the resume data is directly in the result
-            nlp_scores[result['id']] = result['score']
+    # Phase 1: NLP scores keyed by resume id, without copying resume payloads
+    if nlp_scores is None:
+        if nlp_func is None:
+            nlp_scores = score_resumes(job_desc, resumes)
         else:
-            logger.warning(f"Skipping NLP result with unexpected structure: {result}")
+            nlp_scores = _nlp_results_to_scores(nlp_func(job_desc, resumes, top_n=len(resumes)))
     
     # Phase 2: Get LLM recommendations for top candidates from NLP
-    # Only process top 20 or all if less than 20 to save API costs
-    top_nlp_candidates = []
-    for r in nlp_results[:min(20, len(nlp_results))]:
-        if 'resume' in r and isinstance(r['resume'], dict):
-            top_nlp_candidates.append(r['resume'])
-        elif 'id' in r:  # If the resume data is directly in the result
-            top_nlp_candidates.append(r)
-    logger.info(f"Selected {len(top_nlp_candidates)} top candidates for LLM evaluation")
-    llm_results = recommend_resumes_llm(job_desc, top_nlp_candidates, top_n=len(top_nlp_candidates), model_name=model_name)
-    
-    # Create a map of resume ID to LLM score
-    llm_scores = {}
-    for result in llm_results:
-        if 'resume' in result and isinstance(result['resume'], dict) and 'id' in result['resume']:
-            llm_scores[result['resume']['id']] = result['score']
-    
-    # Phase 3: Combine scores
-    combined_results = []
-    for resume_id, nlp_score in nlp_scores.items():
-        # If we have an LLM score for this resume, combine them
-        if resume_id in llm_scores:
-            llm_score = llm_scores[resume_id]
-            combined_score = (nlp_weight * nlp_score) + (llm_weight * llm_score)
-            
-            # Find the full result objects to get reasoning
-            nlp_result = next((r for r in nlp_results if ('resume' in r and r['resume'].get('id') == resume_id) or r.get('id') == resume_id), None)
-            llm_result = next((r for r in llm_results if 'resume' in r and r['resume'].get('id') == resume_id), None)
-            
-            if nlp_result and llm_result:
-                # Get the resume data from the appropriate location
-                resume_data = nlp_result.get('resume') if 'resume' in nlp_result else nlp_result
-                combined_results.append({
-                    'resume': resume_data,
-                    'score': combined_score,
-                    'nlp_score': nlp_score,
-                    'llm_score': llm_score,
-                    'nlp_reasoning': nlp_result.get('reasoning', ''),
-                    'llm_reasoning': llm_result.get('reasoning', ''),
-                    'skill_match': llm_result.get('skill_match', []),
-                    'strengths': llm_result.get('strengths', []),
-                    'weaknesses': llm_result.get('weaknesses', [])
-                })
-        else:
-            # For resumes that weren't evaluated by LLM, just use the NLP score
-            # This shouldn't happen often with our design, but handles edge cases
-            nlp_result = next((r for r in nlp_results if ('resume' in r and r['resume'].get('id') == resume_id) or r.get('id') == resume_id), None)
-            if nlp_result:
-                # Get the resume data from the appropriate location
-                resume_data = nlp_result.get('resume') if 'resume' in nlp_result else nlp_result
-                combined_results.append({
-                    'resume': resume_data,
-                    'score': nlp_score * (nlp_weight + llm_weight),  # Scale up to compensate
-                    'nlp_score': nlp_score,
-                    'llm_score': 0,
-                    'nlp_reasoning': nlp_result.get('reasoning', ''),
-                    'llm_reasoning': "Not evaluated by LLM"
-                })
-    
-    # Sort by combined score
-    combined_results.sort(key=lambda x: x['score'], reverse=True)
-    
-    # Return top N
-    return combined_results[:top_n]
+    resumes_by_key, top_nlp_keys, top_nlp_candidates = _select_llm_candidates(nlp_scores, resumes)
+    llm_results = recommend_resumes_llm(job_desc, top_nlp_candidates, top_n=len(top_nlp_candidates),
+                                        model_name=model_name, on_result=on_result)
+    
+    # Phase 3: Combine scores and materialize only the final top N
+    with span('fusion'):
+        return _combine_hybrid_results(nlp_scores, resumes_by_key, top_nlp_keys, top_nlp_candidates, llm_results,
+                                       top_n, nlp_weight, llm_weight)
+
+async def ahybrid_recommend_resumes(job_desc, resumes, nlp_scores, top_n=5, nlp_weight=0.4, llm_weight=0.6,
+                                    model_name=DEFAULT_LLM_MODEL):
+    """Async hybrid_recommend_resumes; the caller scores on the scoring executor and passes nlp_scores in"""
+    resumes_by_key, top_nlp_keys, top_nlp_candidates = _select_llm_candidates(nlp_scores, resumes)
+    llm_results = await arecommend_resumes_llm(job_desc, top_nlp_candidates, top_n=len(top_nlp_candidates), model_name=model_name)
+    with span('fusion'):
+        return _combine_hybrid_results(nlp_scores, resumes_by_key, top_nlp_keys, top_nlp_candidates, llm_results,
+                                       top_n, nlp_weight, llm_weight)
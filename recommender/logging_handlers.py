@@ -0,0 +1,108 @@
+"""
+Logging building blocks referenced from settings.LOGGING.
+
+- AsyncFileHandler: hands records to a queue and writes them to the log
+  file on a background thread. Formatting (including str() of dict
+  payloads) happens there too, so request threads only pay for an enqueue.
+  When the queue is full, records are dropped and counted rather than
+  blocking the request.
+- SamplingFilter: keeps a configured fraction of each event. Events are
+  named by the 'event' key of dict messages, extra={'event': ...}, or the
+  logger name. WARNING and above are never sampled out.
+- TruncatingFormatter: caps the message part of each line so a full job
+  description or resume can't balloon the log.
+
+This module must not import Django or the rest of the app: it is loaded
+while settings are being configured.
+"""
+
+import copy
+import logging
+import os
+import queue
+import random
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+def event_name(record):
+    if isinstance(record.msg, dict):
+        return record.msg.get('event')
+    return getattr(record, 'event', None)
+
+class SamplingFilter(logging.Filter):
+    """Keep rates[event] of each event's records (default_rate for unnamed events)"""
+
+    def __init__(self, rates=None, default_rate=1.0):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self.default_rate = default_rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(event_name(record) or record.name, self.default_rate)
+        return rate >= 1.0 or (rate > 0 and random.random() < rate)
+
+class TruncatingFormatter(logging.Formatter):
+    """Formatter that shortens messages beyond max_length characters (tracebacks are kept whole)"""
+
+    def __init__(self, fmt=None, datefmt=None, style='%', validate=True, max_length=2000):
+        super().__init__(fmt, datefmt, style, validate)
+        self.max_length = max_length
+
+    def format(self, record):
+        message = record.getMessage()
+        if self.max_length and len(message) > self.max_length:
+            record = copy.copy(record)
+            record.msg = f"{message[:self.max_length]}... [{len(message) - self.max_length} more chars]"
+            record.args = None
+        return super().format(record)
+
+class AsyncFileHandler(QueueHandler):
+    """FileHandler whose formatting and writes run on a background listener thread"""
+
+    def __init__(self, filename, mode='a', encoding=None, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.queue_size = queue_size
+        self.file_handler = logging.FileHandler(filename, mode, encoding, delay=True)
+        self.dropped = 0
+        self.listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def setFormatter(self, fmt):
+        # Formatting happens on the listener thread, with the file handler's formatter
+        self.file_handler.setFormatter(fmt)
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Forked child: the parent's listener thread didn't come along
+                self.queue = queue.Queue(self.queue_size)
+            self.listener = QueueListener(self.queue, self.file_handler)
+            self.listener.start()
+            self._pid = os.getpid()
+
+    def prepare(self, record):
+        # Unlike QueueHandler.prepare, leave msg/args unformatted; the listener formats them
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self.listener is not None and self._pid == os.getpid():
+            # Drains the queue before returning
+            self.listener.stop()
+            self.listener = None
+            self._pid = None
+        self.file_handler.close()
+        super().close()
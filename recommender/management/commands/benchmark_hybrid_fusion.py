@@ -0,0 +1,95 @@
+import random
+import time
+import logging
+from django.core.management.base import BaseCommand
+from recommender.llm_recommender import fuse_hybrid_scores
+from recommender.utils import top_scored_keys, materialize_recommendations
+
+logger = logging.getLogger(__name__)
+
+LLM_CANDIDATES = 20
+
+def _synthetic_resumes(count, rng):
+    return [{
+        'id': f"resume-{i}",
+        'user_id': f"user-{i}",
+        'name': f"Candidate {i}",
+        'skills': [f"skill-{rng.randrange(500)}" for _ in range(8)],
+        'experience': [{'position': 'Engineer', 'company': f"Company {i % 97}", 'description': 'x' * 200}],
+        'education': [{'degree': 'Bachelor', 'institution': 'University'}],
+        'embedding_text': 'y' * 400,
+    } for i in range(count)]
+
+def _fake_llm_results(candidates, rng):
+    return [{'resume': resume, 'score': rng.random(), 'reasoning': 'stub'} for resume in candidates]
+
+def _legacy_fusion(resumes, raw_scores, top_n, rng, nlp_weight=0.4, llm_weight=0.6):
+    """The pre-rewrite stage: full copies of every resume plus next() scans per id"""
+    nlp_results = []
+    for resume in resumes:
+        result = resume.copy()
+        result['score'] = raw_scores[resume['id']]
+        nlp_results.append(result)
+    nlp_results.sort(key=lambda r: r['score'], reverse=True)
+    nlp_scores = {r['id']: r['score'] for r in nlp_results}
+
+    llm_results = _fake_llm_results(nlp_results[:LLM_CANDIDATES], rng)
+    llm_scores = {r['resume']['id']: r['score'] for r in llm_results}
+
+    combined = []
+    for resume_id, nlp_score in nlp_scores.items():
+        nlp_result = next((r for r in nlp_results if r.get('id') == resume_id), None)
+        if resume_id in llm_scores:
+            llm_result = next((r for r in llm_results if r['resume'].get('id') == resume_id), None)
+            combined.append({'resume': nlp_result, 'score': nlp_weight * nlp_score + llm_weight * llm_result['score']})
+        else:
+            combined.append({'resume': nlp_result, 'score': nlp_score * (nlp_weight + llm_weight)})
+    combined.sort(key=lambda x: x['score'], reverse=True)
+    return combined[:top_n]
+
+def _single_pass_fusion(resumes, raw_scores, top_n, rng):
+    nlp_scores = {
+        resume['id']: {'score': raw_scores[resume['id']], 'match_reasons': [], 'score_components': {}}
+        for resume in resumes
+    }
+    resumes_by_key = {resume['id']: resume for resume in resumes}
+    top_keys = top_scored_keys(nlp_scores, LLM_CANDIDATES)
+    llm_by_key = {
+        key: result for key, result in
+        zip(top_keys, _fake_llm_results([resumes_by_key[key] for key in top_keys], rng))
+    }
+    fused = fuse_hybrid_scores(nlp_scores, llm_by_key, top_n)
+    fused_scores = {key: {'score': score} for key, score in fused}
+    return materialize_recommendations(fused_scores, [resumes_by_key[key] for key, _ in fused], top_n)
+
+class Command(BaseCommand):
+    help = 'Benchmark the hybrid NLP/LLM fusion stage (LLM and scoring are stubbed out)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000],
+                            help='Corpus sizes to benchmark')
+        parser.add_argument('--top-n', type=int, default=10, help='Number of results to materialize')
+        parser.add_argument('--legacy-max', type=int, default=10000,
+                            help='Skip the quadratic legacy fusion above this corpus size')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the synthetic corpus')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'resumes':>10}{'legacy (s)':>14}{'single-pass (s)':>18}{'speedup':>10}")
+        for size in options['sizes']:
+            rng = random.Random(options['seed'])
+            resumes = _synthetic_resumes(size, rng)
+            raw_scores = {resume['id']: rng.random() for resume in resumes}
+
+            started = time.perf_counter()
+            _single_pass_fusion(resumes, raw_scores, options['top_n'], random.Random(options['seed']))
+            single_pass = time.perf_counter() - started
+
+            if size <= options['legacy_max']:
+                started = time.perf_counter()
+                _legacy_fusion(resumes, raw_scores, options['top_n'], random.Random(options['seed']))
+                legacy = time.perf_counter() - started
+                self.stdout.write(f"{size:>10}{legacy:>14.3f}{single_pass:>18.4f}{legacy / single_pass:>9.0f}x")
+            else:
+                self.stdout.write(f"{size:>10}{'skipped':>14}{single_pass:>18.4f}{'-':>10}")
+
+        self.stdout.write("\nFusion benchmark complete!", self.style.SUCCESS)
@@ -0,0 +1,103 @@
+import copy
+import logging
+import logging.config
+import os
+import statistics
+import tempfile
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from recommender.llm_recommender import hybrid_recommend_resumes
+from recommender.management.commands.benchmark_recommender import _local_llm, _local_supabase, _stand_ins
+from recommender.synthetic import JOB_DESCRIPTION, HashingEncoder, synthetic_corpus
+from recommender import utils
+
+logger = logging.getLogger('recommender')
+
+def _legacy_logging(filename):
+    """The configuration before async logging: synchronous FileHandler at DEBUG, nothing sampled or truncated"""
+    return {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {'verbose': {'format': '{levelname} {asctime} {module} {message}', 'style': '{'}},
+        'handlers': {'file': {'class': 'logging.FileHandler', 'filename': filename, 'formatter': 'verbose'}},
+        'loggers': {'recommender': {'handlers': ['file'], 'level': 'DEBUG'}},
+    }
+
+def _current_logging(filename):
+    config = copy.deepcopy(settings.LOGGING)
+    config['handlers']['file']['filename'] = filename
+    return config
+
+def _disabled_logging(filename):
+    return {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'loggers': {'recommender': {'handlers': [], 'level': 'CRITICAL', 'propagate': False}},
+    }
+
+class Command(BaseCommand):
+    requires_system_checks = []
+    help = 'Measure per-request logging overhead of the legacy and current LOGGING configurations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--resumes', type=int, default=50, help='Synthetic corpus size')
+        parser.add_argument('--requests', type=int, default=20, help='Hybrid recommendation requests per configuration')
+        parser.add_argument('--rounds', type=int, default=5, help='Rounds per configuration (median is kept)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def _request(self, job_desc, resumes):
+        """One hybrid recommendation plus the view's structured request log"""
+        scores = utils.score_resumes(job_desc, resumes)
+        hybrid_recommend_resumes(job_desc, resumes, top_n=5, nlp_scores=scores)
+        logger.info({'event': 'recommendation_request', 'params': {'job_description': job_desc, 'top_n': 5}})
+
+    def _run(self, configure, resumes, options, label, round_index):
+        """One round: seconds per request and log bytes written per request"""
+        fd, filename = tempfile.mkstemp(suffix='.log')
+        os.close(fd)
+        logging.config.dictConfig(configure(filename))
+        try:
+            started = time.perf_counter()
+            for i in range(options['requests']):
+                # Distinct job text per request so LLM evaluations aren't served from cache
+                self._request(f"{JOB_DESCRIPTION} [{label} {round_index}-{i}]", resumes)
+            elapsed = time.perf_counter() - started
+        finally:
+            # Stops async listeners, so everything queued is on disk before it is measured
+            logging.config.dictConfig(_disabled_logging(None))
+            written = os.path.getsize(filename)
+            os.remove(filename)
+        return elapsed / options['requests'], written / options['requests']
+
+    def handle(self, *args, **options):
+        resume_rows, profile_rows = synthetic_corpus(options['resumes'], options['seed'])
+        encoder = HashingEncoder()
+        configurations = (
+            ('disabled', _disabled_logging),
+            ('legacy', _legacy_logging),
+            ('current', _current_logging),
+        )
+        results = {}
+        try:
+            with _local_supabase({'resumes': resume_rows, 'profiles': profile_rows}) as client, \
+                    _stand_ins(encoder, client), _local_llm():
+                resumes = utils.load_resumes()
+                # Warm-up: model stand-ins, HTTP keep-alive to the local LLM
+                logging.config.dictConfig(_disabled_logging(None))
+                self._request(JOB_DESCRIPTION, resumes)
+                # Configurations take turns each round so drift (thermal, page cache) hits them equally
+                for round_index in range(options['rounds']):
+                    for label, configure in configurations:
+                        results.setdefault(label, []).append(self._run(configure, resumes, options, label, round_index))
+        finally:
+            logging.config.dictConfig(settings.LOGGING)
+
+        medians = {label: (statistics.median(s for s, _ in runs), statistics.median(w for _, w in runs))
+                   for label, runs in results.items()}
+        baseline = medians['disabled'][0]
+        self.stdout.write(f"\n{'config':<10}{'ms/request':>12}{'overhead ms':>13}{'log KB/request':>16}")
+        for label, (seconds, written) in medians.items():
+            overhead = (seconds - baseline) * 1000
+            self.stdout.write(f"{label:<10}{seconds * 1000:>12.2f}{overhead:>13.2f}{written / 1024:>16.1f}")
+        self.stdout.write("\nLogging benchmark complete!", self.style.SUCCESS)
@@ -0,0 +1,88 @@
+import random
+import time
+import logging
+import numpy as np
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from recommender.renderers import ORJSONRenderer
+from recommender.serializers import project_recommendations
+
+logger = logging.getLogger(__name__)
+
+def _synthetic_result(i, rng):
+    resume = {
+        'id': f"resume-{i}",
+        'user_id': f"00000000-0000-0000-0000-{i:012d}",
+        'name': f"Candidate {i}",
+        'email': f"candidate{i}@example.com",
+        'phone': '+216 20 000 000',
+        'address': 'Monastir, Tunisia',
+        'created_at': '2025-01-01T00:00:00',
+        'updated_at': '2025-02-01T00:00:00',
+        'education': [{'degree': 'Bachelor of Computer Science', 'institution': 'ESPRIT'}],
+        'experience': [{
+            'position': 'Software Engineer', 'company': f"Company {i}",
+            'description': 'Built and operated backend services. ' * 8,
+            'start_date': '2019-01-01', 'end_date': '2024-01-01',
+        } for _ in range(3)],
+        'skills': [f"skill-{rng.randrange(300)}" for _ in range(15)],
+        'languages': ['English', 'French', 'Arabic'],
+        'certifications': ['AWS Certified Developer'],
+        'embedding': np.asarray([rng.random() for _ in range(384)], dtype='float32'),
+        'embedding_text': 'Professional Experience: Worked as Software Engineer ' * 20,
+    }
+    resume['score'] = rng.random()
+    resume['match_reasons'] = ['Has required skill: Python', 'Has 5 years of experience (required: 3)']
+    resume['score_components'] = {name: np.float32(rng.random()) for name in
+                                  ('similarity', 'skill_match', 'experience', 'education', 'certifications', 'languages')}
+    return resume
+
+def _hybrid_result(resume, rng):
+    return {
+        'resume': resume,
+        'score': rng.random(),
+        'nlp_score': resume['score'],
+        'llm_score': rng.random(),
+        'nlp_reasoning': '',
+        'llm_reasoning': 'Strong backend background with relevant cloud experience.',
+        'skill_match': [{'skill': 'Python', 'match': True, 'importance': 'critical'}],
+        'strengths': ['Python', 'Django'],
+        'weaknesses': ['No Kubernetes'],
+    }
+
+def _time_render(renderer, data, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        body = renderer.render(data)
+    return body, (time.perf_counter() - started) / iterations
+
+class Command(BaseCommand):
+    requires_system_checks = []
+    help = 'Measure recommendation payload size and serialization time before and after lean projection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-n', type=int, nargs='+', default=[5, 20, 100], help='Result list sizes to measure')
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'shape':<8}{'top_n':>6}{'bytes before':>14}{'bytes after':>13}{'ms before':>11}{'ms after':>10}")
+        for top_n in options['top_n']:
+            rng = random.Random(options['seed'])
+            nlp_results = [_synthetic_result(i, rng) for i in range(top_n)]
+            hybrid_results = [_hybrid_result(resume, rng) for resume in nlp_results]
+
+            for shape, results in (('nlp', nlp_results), ('hybrid', hybrid_results)):
+                before, before_time = _time_render(JSONRenderer(), results, options['iterations'])
+
+                started = time.perf_counter()
+                for _ in range(options['iterations']):
+                    after = ORJSONRenderer().render(project_recommendations(results))
+                after_time = (time.perf_counter() - started) / options['iterations']
+
+                self.stdout.write(
+                    f"{shape:<8}{top_n:>6}{len(before):>14}{len(after):>13}"
+                    f"{before_time * 1000:>11.2f}{after_time * 1000:>10.2f}"
+                )
+
+        self.stdout.write("\nPayload benchmark complete!", self.style.SUCCESS)
@@ -0,0 +1,225 @@
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from recommender import utils
+from recommender.fake_postgrest import FakePostgrestConfig, FakePostgrestServer
+from recommender.supabase_client import get_supabase_client
+from recommender.synthetic import EMBEDDING_DIM, JOB_DESCRIPTION, HashingEncoder, synthetic_corpus
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'benchmarks', 'recommender_baseline.json')
+
+@contextmanager
+def _local_supabase(tables):
+    """Serve tables from a zero-latency local PostgREST stand-in; yields a Supabase client for it"""
+    server = FakePostgrestServer(('127.0.0.1', 0), FakePostgrestConfig(latency_mean=0, seed=0), tables)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield get_supabase_client(server.url, 'benchmark', scope='benchmark')
+    finally:
+        server.shutdown()
+        server.server_close()
+
+@contextmanager
+def _stand_ins(encoder, client):
+    """Swap in the given Supabase client and the deterministic encoder for the duration of a run"""
+    originals = (utils.get_supabase_client, utils.get_sentence_transformer, utils.get_job_embedding)
+    utils.get_supabase_client = lambda: client
+    utils.get_sentence_transformer = lambda: encoder
+    utils.get_job_embedding = encoder.encode
+    try:
+        yield
+    finally:
+        utils.get_supabase_client, utils.get_sentence_transformer, utils.get_job_embedding = originals
+
+def _measure(fn, repeats, memory):
+    """Median wall time over repeats, then one traced run for peak Python/NumPy allocation"""
+    timings = []
+    result = None
+    for _ in range(repeats):
+        gc.collect()
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, {'seconds': round(statistics.median(timings), 6), 'peak_bytes': peak}
+
+@contextmanager
+def _local_llm():
+    """Point llm_recommender at a zero-latency local OpenRouter stand-in"""
+    from openai import OpenAI
+    from recommender import llm_recommender
+    from recommender.fake_openrouter import FakeOpenRouterConfig, FakeOpenRouterServer
+
+    server = FakeOpenRouterServer(('127.0.0.1', 0), FakeOpenRouterConfig(latency_dist='fixed', latency_mean=0, seed=0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # client is never created when no OpenRouter key is configured
+    original_client, original_key = getattr(llm_recommender, 'client', None), llm_recommender.ROUTER_API_KEY
+    llm_recommender.client = OpenAI(
+        base_url=f"http://127.0.0.1:{server.server_address[1]}/api/v1", api_key='benchmark', max_retries=0
+    )
+    # Without a key evaluate_with_llm returns early and no call is timed
+    llm_recommender.ROUTER_API_KEY = 'benchmark'
+    try:
+        yield
+    finally:
+        llm_recommender.client, llm_recommender.ROUTER_API_KEY = original_client, original_key
+        server.shutdown()
+        server.server_close()
+
+class Command(BaseCommand):
+    requires_system_checks = []
+    help = 'Benchmark the NLP recommender on synthetic corpora and compare against a JSON baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                            help='Corpus sizes to benchmark')
+        parser.add_argument('--top-n', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42, help='Seed for the synthetic corpus')
+        parser.add_argument('--dim', type=int, default=EMBEDDING_DIM, help='Embedding dimension')
+        parser.add_argument('--repeats', type=int, default=1, help='Timed runs per stage (median is kept)')
+        parser.add_argument('--no-memory', action='store_true', help='Skip the traced run that records peak memory')
+        parser.add_argument('--batch-jobs', type=int, nargs='*', default=[],
+                            help='Also time N job descriptions one by one against recommend_resumes_batch, per N')
+        parser.add_argument('--hybrid', action='store_true',
+                            help='Also time hybrid_recommend_resumes against a zero-latency local LLM stand-in')
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON to compare against')
+        parser.add_argument('--save-baseline', action='store_true', help='Write this run as the new baseline')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed slowdown / memory growth over the baseline before flagging (0.25 = 25%%)')
+        parser.add_argument('--min-seconds', type=float, default=0.05,
+                            help='Ignore slowdowns smaller than this many seconds (timer noise on fast stages)')
+        parser.add_argument('--output', help='Also write this run\'s results to a JSON file')
+
+    def handle(self, *args, **options):
+        encoder = HashingEncoder(options['dim'])
+        memory = not options['no_memory']
+        results = {}
+
+        for size in options['sizes']:
+            started = time.perf_counter()
+            resume_rows, profile_rows = synthetic_corpus(size, options['seed'], options['dim'])
+            self.stdout.write(f"Generated {size} resumes in {time.perf_counter() - started:.1f}s")
+            stages = {}
+
+            with _local_supabase({'resumes': resume_rows, 'profiles': profile_rows}) as client, \
+                    _stand_ins(encoder, client):
+                resumes, stages['load_resumes'] = _measure(utils.load_resumes, options['repeats'], memory)
+                if len(resumes) != size:
+                    raise CommandError(f"load_resumes returned {len(resumes)} of {size} resumes")
+                scores, stages['score_resumes'] = _measure(
+                    lambda: utils.score_resumes(JOB_DESCRIPTION, resumes), options['repeats'], memory)
+                _, stages['materialize'] = _measure(
+                    lambda: utils.materialize_recommendations(scores, resumes, options['top_n']), options['repeats'], memory)
+                _, stages['rank_scores'] = _measure(lambda: utils.rank_scores(scores), options['repeats'], memory)
+                _, stages['recommend_resumes'] = _measure(
+                    lambda: utils.recommend_resumes(JOB_DESCRIPTION, resumes, options['top_n']), options['repeats'], memory)
+
+                for jobs in options['batch_jobs']:
+                    # Distinct descriptions, so nothing is shared through the job embedding cache
+                    job_descs = [f"{JOB_DESCRIPTION} Posting {i}." for i in range(jobs)]
+                    _, stages[f'recommend_x{jobs}'] = _measure(
+                        lambda: [utils.recommend_resumes(job, resumes, options['top_n']) for job in job_descs],
+                        options['repeats'], memory)
+                    _, stages[f'recommend_batch_x{jobs}'] = _measure(
+                        lambda: utils.recommend_resumes_batch(job_descs, resumes, options['top_n']),
+                        options['repeats'], memory)
+
+                if options['hybrid']:
+                    from recommender.llm_recommender import hybrid_recommend_resumes
+                    with _local_llm():
+                        _, stages['hybrid_recommend_resumes'] = _measure(
+                            lambda: hybrid_recommend_resumes(JOB_DESCRIPTION, resumes, top_n=options['top_n'], nlp_scores=scores),
+                            options['repeats'], memory)
+
+            results[str(size)] = stages
+            del resume_rows, profile_rows, resumes, scores
+            gc.collect()
+
+        report = {
+            'environment': {
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'machine': platform.machine(),
+                'cpu_count': os.cpu_count(),
+                'spacy_model': '{lang}_{name}-{version}'.format(**utils.get_nlp().meta),
+            },
+            'parameters': {key: options[key] for key in ('seed', 'dim', 'top_n', 'repeats')},
+            'results': results,
+        }
+
+        baseline = None
+        if os.path.exists(options['baseline']) and not options['save_baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            # Timings only compare like with like; say so rather than silently flagging (or hiding) regressions
+            differs = [key for key, value in report['environment'].items()
+                       if baseline.get('environment', {}).get(key) != value]
+            if differs:
+                self.stdout.write(
+                    "Baseline was recorded in a different environment (" +
+                    ", ".join(f"{key}: {baseline.get('environment', {}).get(key)} -> {report['environment'][key]}"
+                              for key in differs) + "); regenerate it with --save-baseline on this machine",
+                    self.style.WARNING)
+        regressions = self._print_report(results, baseline, options['tolerance'], options['min_seconds'])
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+        if options['save_baseline']:
+            os.makedirs(os.path.dirname(options['baseline']) or '.', exist_ok=True)
+            with open(options['baseline'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"\nSaved baseline to {options['baseline']}", self.style.SUCCESS)
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} regression(s) beyond {options['tolerance']:.0%}: " + ", ".join(regressions))
+        self.stdout.write("\nRecommender benchmark complete!", self.style.SUCCESS)
+
+    def _print_report(self, results, baseline, tolerance, min_seconds):
+        """Print the stage table and return 'size/stage metric' labels that regressed"""
+        baseline_results = (baseline or {}).get('results', {})
+        regressions = []
+        self.stdout.write(f"\n{'resumes':>8}  {'stage':<26}{'seconds':>10}{'base s':>10}{'Δ time':>9}"
+                          f"{'peak MB':>10}{'base MB':>10}{'Δ mem':>9}")
+        for size, stages in results.items():
+            for stage, measured in stages.items():
+                base = baseline_results.get(size, {}).get(stage, {})
+                cells = []
+                for metric, scale in (('seconds', 1), ('peak_bytes', 1024 * 1024)):
+                    value, reference = measured.get(metric), base.get(metric)
+                    delta = None
+                    if value is not None and reference:
+                        delta = value / reference - 1
+                        noise = metric == 'seconds' and value - reference < min_seconds
+                        if delta > tolerance and not noise:
+                            regressions.append(f"{size}/{stage} {metric}")
+                    cells.append((
+                        f"{value / scale:.3f}" if value is not None else '-',
+                        f"{reference / scale:.3f}" if reference else '-',
+                        f"{delta:+.0%}" if delta is not None else '-',
+                    ))
+                (seconds, base_seconds, time_delta), (peak, base_peak, mem_delta) = cells
+                self.stdout.write(f"{size:>8}  {stage:<26}{seconds:>10}{base_seconds:>10}{time_delta:>9}"
+                                  f"{peak:>10}{base_peak:>10}{mem_delta:>9}")
+        return regressions
@@ -0,0 +1,51 @@
+import logging
+from django.core.management.base import BaseCommand
+from recommender.fake_openrouter import FakeOpenRouterConfig, FakeOpenRouterServer, LATENCY_DISTRIBUTIONS
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    # Standalone tool - skip system checks, which import the URLconf and load the NLP models
+    requires_system_checks = []
+    help = 'Run a local OpenAI-compatible stand-in for OpenRouter (set OPENROUTER_BASE_URL to use it)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency-dist', choices=LATENCY_DISTRIBUTIONS, default='lognormal',
+                            help='Distribution used to sample response latency')
+        parser.add_argument('--latency-mean', type=float, default=1.5, help='Mean latency in seconds')
+        parser.add_argument('--latency-stddev', type=float, default=0.5,
+                            help='Latency standard deviation (half-width for uniform)')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 500')
+        parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 429')
+        parser.add_argument('--malformed-rate', type=float, default=0.0,
+                            help='Fraction of successful responses whose JSON content is truncated')
+        parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429 responses')
+        parser.add_argument('--seed', type=int, help='Random seed for reproducible runs')
+
+    def handle(self, *args, **options):
+        config = FakeOpenRouterConfig(
+            latency_dist=options['latency_dist'],
+            latency_mean=options['latency_mean'],
+            latency_stddev=options['latency_stddev'],
+            error_rate=options['error_rate'],
+            rate_limit_rate=options['rate_limit_rate'],
+            malformed_rate=options['malformed_rate'],
+            retry_after=options['retry_after'],
+            seed=options['seed'],
+        )
+        server = FakeOpenRouterServer((options['host'], options['port']), config)
+        self.stdout.write(
+            f"Fake OpenRouter listening on http://{options['host']}:{options['port']}/api/v1 "
+            f"(latency {options['latency_dist']} {options['latency_mean']}s, 429 {options['rate_limit_rate']:.0%}, "
+            f"500 {options['error_rate']:.0%}, malformed {options['malformed_rate']:.0%})",
+            self.style.SUCCESS
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"\nServed: {server.counters}")
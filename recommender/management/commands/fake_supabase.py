@@ -0,0 +1,59 @@
+import json
+import logging
+from django.core.management.base import BaseCommand
+from recommender.fake_openrouter import LATENCY_DISTRIBUTIONS
+from recommender.fake_postgrest import FakePostgrestConfig, FakePostgrestServer
+from recommender.synthetic import synthetic_corpus
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    # Standalone tool - skip system checks, which import the URLconf and load the NLP models
+    requires_system_checks = []
+    help = 'Run a local PostgREST-compatible stand-in for the Supabase data API (set SUPABASE_URL to use it)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8766)
+        parser.add_argument('--latency-dist', choices=LATENCY_DISTRIBUTIONS, default='fixed',
+                            help='Distribution used to sample per-request latency')
+        parser.add_argument('--latency-mean', type=float, default=0.02, help='Mean latency in seconds')
+        parser.add_argument('--latency-stddev', type=float, default=0.01,
+                            help='Latency standard deviation (half-width for uniform)')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 500')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for latency sampling and synthetic data')
+        parser.add_argument('--resumes', type=int, default=0,
+                            help='Seed resumes/resumes_duplicate/profiles with this many synthetic candidates')
+        parser.add_argument('--fixture', help='JSON file mapping table names to lists of rows to load')
+
+    def handle(self, *args, **options):
+        tables = {}
+        if options['resumes']:
+            resumes, profiles = synthetic_corpus(options['resumes'], options['seed'])
+            tables.update(resumes=resumes, resumes_duplicate=[dict(row) for row in resumes], profiles=profiles)
+        if options['fixture']:
+            with open(options['fixture']) as f:
+                for name, rows in json.load(f).items():
+                    tables.setdefault(name, []).extend(rows)
+
+        config = FakePostgrestConfig(
+            latency_dist=options['latency_dist'],
+            latency_mean=options['latency_mean'],
+            latency_stddev=options['latency_stddev'],
+            error_rate=options['error_rate'],
+            seed=options['seed'],
+        )
+        server = FakePostgrestServer((options['host'], options['port']), config, tables)
+        self.stdout.write(
+            f"Fake Supabase (PostgREST) listening on {server.url} "
+            f"(latency {options['latency_dist']} {options['latency_mean']}s, 500 {options['error_rate']:.0%}); "
+            f"tables: {', '.join(f'{name}={len(table.rows)}' for name, table in server.tables.items()) or 'none'}",
+            self.style.SUCCESS
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"\nServed: {server.counters}")
@@ -1,8 +1,10 @@
 import os
 import django
 import logging
+from django.core.cache import cache
 from django.core.management.base import BaseCommand
-from supabase import create_client
+from django.utils import timezone
+from recommender.supabase_client import get_supabase_client
 from sentence_transformers import SentenceTransformer
 import numpy as np
 import base64
@@ -24,7 +26,7 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
-        supabase = create_client(
+        supabase = get_supabase_client(
             os.getenv("SUPABASE_URL"),
             os.getenv("SUPABASE_SERVICE_KEY")
         )
@@ -62,7 +64,7 @@ class Command(BaseCommand):
 
                 if not dry_run:
                     supabase.table('resumes_duplicate') \
-                        .update({'embedding': embedding_b64}) \
+                        .update({'embedding': embedding_b64, 'updated_at': timezone.now().isoformat()}) \
                         .eq('id', resume['id']) \
                         .execute()
                     
@@ -75,4 +77,8 @@ class Command(BaseCommand):
                 self.stderr.write(f"Error: {str(e)}", self.style.ERROR)
                 continue
 
+        if not dry_run:
+            # New embeddings change every score; stop serving rankings keyed on the old corpus version
+            cache.delete('corpus_version')
+
         self.stdout.write("\nEmbedding generation complete!", self.style.SUCCESS) 
\ No newline at end of file
@@ -0,0 +1,65 @@
+import json
+import os
+import logging
+from django.core.management.base import BaseCommand, CommandError
+from recommender.ingestion import ingest_pdfs
+from recommender.supabase_client import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    requires_system_checks = []
+    help = 'Bulk-ingest a directory or zip of PDF resumes into the resumes table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Directory of PDFs (searched recursively) or a .zip archive')
+        parser.add_argument('--user-id', help='Owner user_id for every ingested resume')
+        parser.add_argument('--max-files', type=int, help='Stop after this many PDFs')
+        parser.add_argument('--extract-workers', type=int)
+        parser.add_argument('--normalize-workers', type=int)
+        parser.add_argument('--encode-batch-size', type=int)
+        parser.add_argument('--upsert-batch-size', type=int)
+        parser.add_argument('--dry-run', action='store_true', help='Run every stage except the upsert')
+        parser.add_argument('--json', action='store_true', help='Print the full report as JSON')
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['source']):
+            raise CommandError(f"{options['source']} does not exist")
+
+        # Bulk writes need the service key, like generate_embeddings
+        client = None
+        if not options['dry_run']:
+            client = get_supabase_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_KEY"))
+
+        report = ingest_pdfs(
+            options['source'],
+            user_id=options['user_id'],
+            dry_run=options['dry_run'],
+            client=client,
+            max_files=options['max_files'],
+            extract_workers=options['extract_workers'],
+            normalize_workers=options['normalize_workers'],
+            encode_batch_size=options['encode_batch_size'],
+            upsert_batch_size=options['upsert_batch_size'],
+        )
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"{'stage':<11}{'workers':>8}{'done':>7}{'failed':>8}{'busy s':>9}{'wall s':>9}{'items/s':>9}")
+        for stage in report['stages']:
+            rate = stage['items_per_second']
+            self.stdout.write(
+                f"{stage['stage']:<11}{stage['workers']:>8}{stage['processed']:>7}{stage['failed']:>8}"
+                f"{stage['busy_seconds']:>9.2f}{stage['wall_seconds']:>9.2f}{rate if rate is not None else '-':>9}"
+            )
+        for failure in report['failures']:
+            self.stderr.write(f"{failure['file']}: {failure['stage']} failed: {failure['error']}", self.style.ERROR)
+
+        prefix = "[Dry Run] " if options['dry_run'] else ""
+        self.stdout.write(
+            f"\n{prefix}Ingested {report['ingested']}/{report['files']} resumes in {report['wall_seconds']:.2f}s "
+            f"({report['duplicates']} duplicates skipped, {report['extraction_cache_hits']} extraction cache hits)",
+            self.style.SUCCESS if not report['failed'] else self.style.WARNING
+        )
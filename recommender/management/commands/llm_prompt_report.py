@@ -0,0 +1,102 @@
+import json
+import os
+import logging
+from django.core.management.base import BaseCommand
+from recommender.llm_recommender import (
+    SYSTEM_PROMPT,
+    DEFAULT_LLM_MODEL,
+    LLM_RESUME_TOKEN_BUDGET,
+    LLM_JOB_TOKEN_BUDGET,
+    build_user_prompt,
+    estimate_tokens,
+    format_resume_for_llm,
+    evaluate_with_llm,
+    truncate_to_token_budget,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIXTURE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+    'fixtures', 'llm_prompt_report.json'
+)
+
+class Command(BaseCommand):
+    help = 'Compare LLM prompt token counts (and optionally latency) with and without token budgets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fixture', default=DEFAULT_FIXTURE,
+                            help='JSON file with a job_description and a list of resumes')
+        parser.add_argument('--resume-budget', type=int, default=LLM_RESUME_TOKEN_BUDGET,
+                            help='Token budget for each formatted resume')
+        parser.add_argument('--job-budget', type=int, default=LLM_JOB_TOKEN_BUDGET,
+                            help='Token budget for the job description')
+        parser.add_argument('--call-llm', action='store_true',
+                            help='Also time real OpenRouter calls for both prompt variants')
+        parser.add_argument('--model', default=DEFAULT_LLM_MODEL, help='LLM model key to use with --call-llm')
+        parser.add_argument('--output', help='Write the report as JSON to this path')
+
+    def handle(self, *args, **options):
+        with open(options['fixture'], 'r') as f:
+            fixture = json.load(f)
+
+        job_desc = fixture['job_description']
+        resumes = fixture['resumes']
+        budgeted_job_desc = truncate_to_token_budget(job_desc, options['job_budget'])
+
+        job_embedding = None
+        try:
+            from recommender.utils import get_job_embedding
+            job_embedding = get_job_embedding(job_desc)
+        except Exception as e:
+            self.stderr.write(f"Job embedding unavailable, trimming by position: {str(e)}", self.style.WARNING)
+
+        system_tokens = estimate_tokens(SYSTEM_PROMPT)
+        rows = []
+        for resume in resumes:
+            full_text = format_resume_for_llm(resume)
+            budgeted_text = format_resume_for_llm(resume, job_embedding, options['resume_budget'])
+
+            row = {
+                'resume_id': resume.get('id'),
+                'before_tokens': system_tokens + estimate_tokens(build_user_prompt(job_desc, full_text)),
+                'after_tokens': system_tokens + estimate_tokens(build_user_prompt(budgeted_job_desc, budgeted_text)),
+            }
+
+            if options['call_llm']:
+                # Call the API directly (no evaluation cache) and use the billed token counts
+                _, usage = evaluate_with_llm(job_desc, full_text, options['model'])
+                row['before_latency'] = usage['latency']
+                row['before_billed_tokens'] = usage['prompt_tokens']
+
+                _, usage = evaluate_with_llm(budgeted_job_desc, budgeted_text, options['model'])
+                row['after_latency'] = usage['latency']
+                row['after_billed_tokens'] = usage['prompt_tokens']
+
+            rows.append(row)
+
+        self.stdout.write(f"{'resume':<24}{'before':>10}{'after':>10}{'saved':>8}")
+        for row in rows:
+            saved = 1 - row['after_tokens'] / max(1, row['before_tokens'])
+            line = f"{str(row['resume_id']):<24}{row['before_tokens']:>10}{row['after_tokens']:>10}{saved:>8.0%}"
+            if options['call_llm']:
+                line += (f"  billed {row['before_billed_tokens']} -> {row['after_billed_tokens']}"
+                         f"  latency {row['before_latency']:.2f}s -> {row['after_latency']:.2f}s")
+            self.stdout.write(line)
+
+        before_total = sum(row['before_tokens'] for row in rows)
+        after_total = sum(row['after_tokens'] for row in rows)
+        self.stdout.write(
+            f"\nTotal prompt tokens: {before_total} -> {after_total} "
+            f"({1 - after_total / max(1, before_total):.0%} saved)",
+            self.style.SUCCESS
+        )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({
+                    'resume_budget': options['resume_budget'],
+                    'job_budget': options['job_budget'],
+                    'rows': rows,
+                }, f, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
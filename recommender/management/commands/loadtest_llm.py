@@ -0,0 +1,129 @@
+import json
+import time
+import logging
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_DESCRIPTION = (
+    "Senior Backend Engineer with 5+ years of experience in Python and Django, "
+    "PostgreSQL, Docker and AWS. Bachelor degree in computer science required."
+)
+
+# Markers LLMRecommendAPI puts in results when it had to fall back to NLP or defaults
+FALLBACK_MARKERS = (
+    "traditional NLP matching (LLM unavailable)",
+    "Using basic matching due to service error.",
+)
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+class Command(BaseCommand):
+    # Standalone tool - skip system checks, which import the URLconf and load the NLP models
+    requires_system_checks = []
+    help = 'Drive /recommend/llm/ (or its async twin) at a target concurrency and report latency, throughput and fallback rates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', nargs='+', default=['http://127.0.0.1:8000/recommend/llm/'],
+                            help='Endpoint(s) to drive; give several (e.g. the WSGI and ASGI deployments) to compare them')
+        parser.add_argument('--concurrency', type=int, default=4, help='Number of requests kept in flight')
+        parser.add_argument('--requests', type=int, default=50, help='Total number of requests to send')
+        parser.add_argument('--recommendation-type', choices=['hybrid', 'llm_only'], default='hybrid')
+        parser.add_argument('--top-n', type=int, default=5)
+        parser.add_argument('--model', default='llama4')
+        parser.add_argument('--job-description', default=DEFAULT_JOB_DESCRIPTION)
+        parser.add_argument('--vary-job', action='store_true',
+                            help='Append the request number to each job description to defeat caches')
+        parser.add_argument('--timeout', type=float, default=300.0, help='Per-request timeout in seconds')
+        parser.add_argument('--output', help='Write the summary as JSON to this path')
+
+    def _send(self, url, index, options):
+        job_desc = options['job_description']
+        if options['vary_job']:
+            job_desc = f"{job_desc} (load test request {index})"
+        body = json.dumps({
+            'job_description': job_desc,
+            'top_n': options['top_n'],
+            'model': options['model'],
+            'recommendation_type': options['recommendation_type'],
+        }).encode('utf-8')
+        request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+
+        started = time.perf_counter()
+        outcome = {'status': None, 'fallback': False, 'llm_errors': 0, 'llm_calls': 0}
+        try:
+            with urllib.request.urlopen(request, timeout=options['timeout']) as response:
+                payload = response.read()
+                outcome['status'] = response.status
+                usage = response.headers.get('X-LLM-Usage')
+            if usage:
+                usage = json.loads(usage)
+                outcome['llm_errors'] = usage.get('errors', 0)
+                outcome['llm_calls'] = usage.get('api_calls', 0)
+            results = json.loads(payload)
+            if isinstance(results, list):
+                outcome['fallback'] = any(
+                    isinstance(item, dict) and any(marker in (item.get('reasoning') or '') for marker in FALLBACK_MARKERS)
+                    for item in results
+                )
+        except urllib.error.HTTPError as e:
+            outcome['status'] = e.code
+        except Exception as e:
+            outcome['status'] = 'error'
+            logger.warning(f"Load test request {index} failed: {str(e)}")
+        outcome['latency'] = time.perf_counter() - started
+        return outcome
+
+    def _run(self, url, options):
+        self.stdout.write(
+            f"Sending {options['requests']} {options['recommendation_type']} requests to {url} "
+            f"with concurrency {options['concurrency']}"
+        )
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            outcomes = list(pool.map(lambda i: self._send(url, i, options), range(options['requests'])))
+        elapsed = time.perf_counter() - started
+
+        ok = [o for o in outcomes if o['status'] == 200]
+        latencies = sorted(o['latency'] for o in ok)
+        llm_calls = sum(o['llm_calls'] for o in ok)
+        return {
+            'requests': len(outcomes),
+            'succeeded': len(ok),
+            'failed': len(outcomes) - len(ok),
+            'elapsed_seconds': round(elapsed, 3),
+            'throughput_rps': round(len(ok) / elapsed, 3) if elapsed else 0.0,
+            'latency_p50': round(percentile(latencies, 0.50), 3),
+            'latency_p95': round(percentile(latencies, 0.95), 3),
+            'latency_p99': round(percentile(latencies, 0.99), 3),
+            'fallback_rate': round(sum(1 for o in ok if o['fallback']) / len(ok), 3) if ok else 0.0,
+            'llm_calls': llm_calls,
+            'llm_error_rate': round(sum(o['llm_errors'] for o in ok) / llm_calls, 3) if llm_calls else 0.0,
+        }
+
+    def handle(self, *args, **options):
+        summaries = {}
+        for url in options['url']:
+            summaries[url] = self._run(url, options)
+            for key, value in summaries[url].items():
+                self.stdout.write(f"{key:>18}: {value}")
+
+        if len(summaries) > 1:
+            self.stdout.write("\nComparison:")
+            self.stdout.write(f"{'url':<48}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'failed':>8}")
+            for url, summary in summaries.items():
+                self.stdout.write(
+                    f"{url:<48}{summary['throughput_rps']:>9}{summary['latency_p50']:>9}"
+                    f"{summary['latency_p95']:>9}{summary['latency_p99']:>9}{summary['failed']:>8}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(summaries if len(summaries) > 1 else summaries[options['url'][0]], f, indent=2)
+            self.stdout.write(f"Summary written to {options['output']}")
@@ -0,0 +1,53 @@
+import json
+import logging
+from django.core.management.base import BaseCommand
+from recommender import utils
+from recommender.memory import memory_report
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+def _mb(value):
+    return f"{value / MB:.1f}" if value else '-'
+
+class Command(BaseCommand):
+    requires_system_checks = []
+    help = 'Load the models (and optionally the corpus) in this process and report per-component memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-models', action='store_true', help='Skip loading the SentenceTransformer and spaCy models')
+        parser.add_argument('--corpus', action='store_true', help='Also load and decode the resume corpus from Supabase')
+        parser.add_argument('--json', action='store_true', help='Print the full report as JSON')
+
+    def handle(self, *args, **options):
+        if not options['no_models']:
+            self.stdout.write("Loading SentenceTransformer and spaCy models...")
+            utils.get_sentence_transformer()
+            utils.get_nlp()
+        if options['corpus']:
+            self.stdout.write("Loading resume corpus...")
+            resumes = utils.load_resumes()
+            self.stdout.write(f"Loaded {len(resumes)} resumes")
+
+        report = memory_report()
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2, default=str))
+            return
+
+        self.stdout.write(f"\nRSS {_mb(report['rss_bytes'])} MB (peak {_mb(report['peak_rss_bytes'])} MB)")
+        self.stdout.write(f"{'component':<24}{'RSS at load MB':>16}{'size MB':>10}  detail")
+        for name, stats in report['components'].items():
+            size = stats.get('parameter_bytes') or stats.get('vectors_bytes') or stats.get('bytes')
+            detail = ', '.join(f"{key}={value}" for key, value in stats.items()
+                               if key in ('loaded', 'entries', 'resumes', 'embedding_dtype', 'tracked_keys', 'load_seconds'))
+            self.stdout.write(f"{name:<24}{_mb(stats.get('rss_delta_bytes')):>16}{_mb(size):>10}  {detail}")
+
+        traced = report['tracemalloc']
+        if traced['enabled']:
+            self.stdout.write(f"\ntracemalloc: {_mb(traced['current_bytes'])} MB current, {_mb(traced['peak_bytes'])} MB peak")
+            for component, size in traced['by_component'].items():
+                self.stdout.write(f"  {component:<22}{_mb(size):>10} MB")
+        else:
+            self.stdout.write("\ntracemalloc is off (set MEMORY_TRACEMALLOC=True for allocation attribution)")
+        self.stdout.write("\nMemory report complete!", self.style.SUCCESS)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from recommender.profiling import PROFILING_MODES, PROFILING_TOKEN_MAX_AGE, make_profile_token
+
+class Command(BaseCommand):
+    requires_system_checks = []
+    help = 'Print a signed X-Profile-Request header value that profiles any request carrying it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=PROFILING_MODES, default='sample',
+                            help='sample (low overhead) or deterministic (cProfile, exact call counts)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_profile_token(options['mode']))
+        self.stderr.write(f"Valid for {PROFILING_TOKEN_MAX_AGE}s; send as: X-Profile-Request: <token>")
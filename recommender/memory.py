@@ -0,0 +1,261 @@
+"""
+Memory accounting and a memory budget guard.
+
+memory_report() attributes the worker's memory to the SentenceTransformer
+model, the spaCy pipeline, the last decoded corpus and the in-process
+result caches, using:
+- RSS growth measured while each model loaded
+- model parameter / vector sizes
+- an estimate of the decoded corpus
+- tracemalloc, when MEMORY_TRACEMALLOC is on, with allocations grouped by
+  the package that made them
+
+With MEMORY_BUDGET_MB set, check_memory_budget() (run by
+MemoryGuardMiddleware) compares RSS to the budget:
+- Above MEMORY_SOFT_LIMIT it degrades: corpus embeddings are decoded as
+  float16 (half the memory, negligible ranking change), and the LLM and
+  job-embedding caches are trimmed.
+- Above MEMORY_HARD_LIMIT it also drops the LLM caches and the cached
+  rankings, coalesced results and profile cards this worker wrote.
+- Full precision comes back once RSS falls below MEMORY_RECOVER_LIMIT.
+"""
+
+import gc
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger('recommender')
+
+# 0 disables the budget guard
+MEMORY_BUDGET_MB = getattr(settings, "MEMORY_BUDGET_MB", 0)
+MEMORY_SOFT_LIMIT = getattr(settings, "MEMORY_SOFT_LIMIT", 0.80)
+MEMORY_HARD_LIMIT = getattr(settings, "MEMORY_HARD_LIMIT", 0.92)
+MEMORY_RECOVER_LIMIT = getattr(settings, "MEMORY_RECOVER_LIMIT", 0.65)
+MEMORY_CHECK_INTERVAL = getattr(settings, "MEMORY_CHECK_INTERVAL", 5.0)
+MEMORY_TRACEMALLOC = getattr(settings, "MEMORY_TRACEMALLOC", False)
+
+# tracemalloc attribution: first matching path fragment wins
+COMPONENT_PATHS = (
+    ('sentence_transformer', ('sentence_transformers', 'transformers', 'torch', 'tokenizers', 'huggingface_hub', 'safetensors')),
+    ('spacy', ('spacy', 'thinc', 'srsly', 'cymem', 'preshed', 'blis')),
+    ('llm_caches', (os.path.join('recommender', 'llm_recommender.py'), 'openai')),
+    ('corpus', (os.path.join('recommender', 'utils.py'), 'postgrest', 'httpx', 'json')),
+    ('django_cache', (os.path.join('django', 'core', 'cache'), 'pickle')),
+)
+
+# Resumes sampled for the per-resume payload estimate
+CORPUS_SAMPLE_SIZE = 50
+
+if MEMORY_TRACEMALLOC and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+_lock = threading.Lock()
+_model_loads = {}
+_corpus = {'resumes': 0, 'bytes': 0, 'peak_bytes': 0, 'loaded_at': None}
+_state = {'pressure': 'ok', 'degraded': False, 'last_check': 0.0, 'last_action': None}
+
+def rss_bytes():
+    """Current resident set size (Linux /proc), falling back to the peak RSS elsewhere"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def approx_size(obj, _seen=None, _depth=0):
+    """Rough deep size of plain containers, strings and NumPy arrays"""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen or _depth > 6:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is None else 0)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approx_size(k, seen, _depth + 1) + approx_size(v, seen, _depth + 1) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approx_size(item, seen, _depth + 1) for item in obj)
+    return size
+
+@contextmanager
+def measure_load(component):
+    """Record how much RSS a model load added (first load only)"""
+    before = rss_bytes()
+    started = time.perf_counter()
+    yield
+    with _lock:
+        _model_loads.setdefault(component, {
+            'rss_delta_bytes': max(0, rss_bytes() - before),
+            'load_seconds': round(time.perf_counter() - started, 3),
+        })
+
+def corpus_embedding_dtype():
+    """dtype load_resumes should decode embeddings to under the current memory pressure"""
+    return 'float16' if _state['degraded'] else 'float32'
+
+def record_corpus(resumes):
+    """Estimate the decoded corpus from its embeddings plus a sample of the rest of each resume"""
+    embedding_bytes = sum(r['embedding'].nbytes for r in resumes if isinstance(r.get('embedding'), np.ndarray))
+    sample = resumes[:CORPUS_SAMPLE_SIZE]
+    if sample:
+        payload = sum(approx_size({k: v for k, v in r.items() if k != 'embedding'}) for r in sample) / len(sample)
+    else:
+        payload = 0
+    estimate = int(embedding_bytes + payload * len(resumes))
+    with _lock:
+        _corpus.update(resumes=len(resumes), bytes=estimate, loaded_at=time.time())
+        _corpus['peak_bytes'] = max(_corpus['peak_bytes'], estimate)
+
+def _model_components():
+    from . import utils
+
+    components = {}
+    # cache_info is missing when a benchmark has swapped in a stand-in encoder
+    loader_cache = getattr(utils.get_sentence_transformer, 'cache_info', None)
+    transformer = {'loaded': bool(loader_cache and loader_cache().currsize)}
+    if transformer['loaded']:
+        model = utils.get_sentence_transformer()
+        try:
+            tensors = list(model.parameters()) + list(model.buffers())
+            transformer['parameter_bytes'] = sum(t.numel() * t.element_size() for t in tensors)
+        except AttributeError:  # stand-in encoders in benchmarks
+            pass
+    components['sentence_transformer'] = {**transformer, **_model_loads.get('sentence_transformer', {})}
+
+    spacy_stats = {'loaded': utils._nlp is not None}
+    if spacy_stats['loaded']:
+        vectors = getattr(utils._nlp.vocab, 'vectors', None)
+        spacy_stats['vectors_bytes'] = int(getattr(getattr(vectors, 'data', None), 'nbytes', 0))
+        spacy_stats['vocab_strings'] = len(utils._nlp.vocab.strings)
+    components['spacy'] = {**spacy_stats, **_model_loads.get('spacy', {})}
+    return components
+
+def _cache_components():
+    from . import llm_recommender, ranking, utils
+
+    with llm_recommender._evaluation_cache_lock:
+        evaluations = list(llm_recommender._evaluation_cache.values())
+    with llm_recommender._format_cache_lock:
+        formatted = list(llm_recommender._format_cache.values())
+    with llm_recommender._section_embedding_cache_lock:
+        sections = list(llm_recommender._section_embedding_cache.values())
+    job_embeddings = utils.get_job_embedding.cache_info().currsize if hasattr(utils.get_job_embedding, 'cache_info') else 0
+    return {
+        'llm_evaluation_cache': {'entries': len(evaluations), 'bytes': approx_size(evaluations)},
+        'llm_format_cache': {'entries': len(formatted), 'bytes': approx_size(formatted)},
+        'llm_section_embedding_cache': {'entries': len(sections), 'bytes': approx_size(sections)},
+        # 384 float32 values each
+        'job_embedding_cache': {'entries': job_embeddings, 'bytes': job_embeddings * 384 * 4},
+        'rankings': {'tracked_keys': ranking.tracked_ranking_count()},
+    }
+
+def _tracemalloc_components(top=10):
+    if not tracemalloc.is_tracing():
+        return {'enabled': False}
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    ))
+    by_component = {}
+    for stat in snapshot.statistics('filename'):
+        filename = stat.traceback[0].filename
+        component = next((name for name, fragments in COMPONENT_PATHS if any(f in filename for f in fragments)), 'other')
+        by_component[component] = by_component.get(component, 0) + stat.size
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        'enabled': True,
+        'current_bytes': current,
+        'peak_bytes': peak,
+        'by_component': dict(sorted(by_component.items(), key=lambda item: item[1], reverse=True)),
+        'top': [{'location': str(stat.traceback[0]), 'bytes': stat.size, 'blocks': stat.count}
+                for stat in snapshot.statistics('lineno')[:top]],
+    }
+
+def memory_report():
+    """RSS, budget state and per-component attribution for this worker"""
+    rss = rss_bytes()
+    with _lock:
+        corpus = {**_corpus, 'embedding_dtype': corpus_embedding_dtype()}
+        state = dict(_state)
+    return {
+        'pid': os.getpid(),
+        'rss_bytes': rss,
+        'peak_rss_bytes': peak_rss_bytes(),
+        'budget_bytes': MEMORY_BUDGET_MB * 1024 * 1024 or None,
+        'budget_used': round(rss / (MEMORY_BUDGET_MB * 1024 * 1024), 3) if MEMORY_BUDGET_MB else None,
+        'pressure': state['pressure'],
+        'degraded': state['degraded'],
+        'last_action': state['last_action'],
+        'components': {**_model_components(), 'corpus': corpus, **_cache_components()},
+        'tracemalloc': _tracemalloc_components(),
+    }
+
+def shed_memory(level):
+    """Free cache memory: 'soft' trims caches, 'hard' drops them; returns what was done"""
+    from . import coalescing, llm_recommender, profiles, ranking, utils
+
+    actions = []
+    keep = 0.5 if level == 'soft' else 0.0
+    freed = llm_recommender.trim_caches(keep)
+    actions.append(f"trimmed LLM caches by {freed} entries")
+    if hasattr(utils.get_job_embedding, 'cache_clear'):
+        utils.get_job_embedding.cache_clear()
+        actions.append("cleared job embedding cache")
+    if level == 'hard':
+        actions.append(f"dropped {ranking.drop_tracked_rankings()} cached rankings")
+        actions.append(f"dropped {coalescing.drop_cached_results()} coalesced results")
+        actions.append(f"dropped {profiles.drop_cached_cards()} profile cards")
+    gc.collect()
+    return actions
+
+def check_memory_budget(force=False):
+    """Compare RSS with the budget and degrade, shed or recover; returns the pressure level"""
+    if not MEMORY_BUDGET_MB:
+        return 'ok'
+    now = time.monotonic()
+    with _lock:
+        if not force and now - _state['last_check'] < MEMORY_CHECK_INTERVAL:
+            return _state['pressure']
+        _state['last_check'] = now
+
+    budget = MEMORY_BUDGET_MB * 1024 * 1024
+    rss = rss_bytes()
+    used = rss / budget
+    if used >= MEMORY_HARD_LIMIT:
+        pressure = 'hard'
+    elif used >= MEMORY_SOFT_LIMIT:
+        pressure = 'soft'
+    else:
+        pressure = 'ok'
+
+    actions = []
+    if pressure != 'ok':
+        if not _state['degraded']:
+            actions.append("decoding corpus embeddings as float16")
+        _state['degraded'] = True
+        actions.extend(shed_memory(pressure))
+    elif _state['degraded'] and used < MEMORY_RECOVER_LIMIT:
+        _state['degraded'] = False
+        actions.append("restored float32 corpus embeddings")
+
+    with _lock:
+        _state['pressure'] = pressure
+        if actions:
+            _state['last_action'] = {'at': time.time(), 'rss_bytes': rss, 'pressure': pressure, 'actions': actions}
+    if actions:
+        log = logger.warning if pressure != 'ok' else logger.info
+        log(f"Memory {pressure} ({rss / 1024 / 1024:.0f}/{MEMORY_BUDGET_MB} MB): {'; '.join(actions)}")
+    return pressure
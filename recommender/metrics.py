@@ -0,0 +1,93 @@
+"""
+Prometheus text exposition of the in-process metrics.
+
+Stage and request latency histograms come from timing.py; the rolling LLM
+and Supabase windows are exported as gauges, since they cover the last
+LLM_METRICS_WINDOW_SECONDS / SUPABASE_METRICS_WINDOW_SECONDS rather than
+the process lifetime. Feedback buffer counters are process totals.
+"""
+
+from .feedback import feedback_buffer
+from .llm_metrics import llm_metrics_store
+from .supabase_client import supabase_metrics
+from .timing import request_histograms, stage_histograms
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _histogram_lines(name, help_text, label_names, snapshot):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, series in sorted(snapshot.items()):
+        for le, count in series['buckets']:
+            lines.append(f"{name}_bucket{_labels(label_names, labels, [('le', _number(le))])} {count}")
+        lines.append(f"{name}_sum{_labels(label_names, labels)} {_number(series['sum'])}")
+        lines.append(f"{name}_count{_labels(label_names, labels)} {series['count']}")
+    return lines
+
+def _gauge_lines(name, help_text, samples):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        lines.append(f"{name}{labels} {_number(value)}")
+    return lines
+
+def render_prometheus():
+    """All metrics as one Prometheus text-format document"""
+    lines = []
+    lines += _histogram_lines('recommender_stage_duration_seconds', 'Time spent in each recommendation stage.',
+                              ('stage',), stage_histograms.snapshot())
+    lines += _histogram_lines('recommender_request_duration_seconds', 'End-to-end request latency by view.',
+                              ('view', 'method', 'status'), request_histograms.snapshot())
+
+    llm = llm_metrics_store.snapshot()
+    for key, help_text in (
+        ('calls', 'LLM evaluations in the window, including cache hits.'),
+        ('api_calls', 'LLM API calls in the window.'),
+        ('cache_hits', 'LLM evaluation cache hits in the window.'),
+        ('errors', 'Failed LLM calls in the window.'),
+        ('retries', 'LLM call retries in the window.'),
+        ('total_tokens', 'Prompt plus completion tokens in the window.'),
+        ('cost_usd', 'Estimated LLM spend in the window.'),
+    ):
+        lines += _gauge_lines(f'recommender_llm_{key}', help_text, [('', llm[key])])
+    lines += _gauge_lines('recommender_llm_latency_seconds', 'LLM API call latency percentiles in the window.', [
+        (_labels(('quantile',), (quantile,)), llm[f'latency_{label}'])
+        for label, quantile in (('p50', '0.5'), ('p95', '0.95'), ('p99', '0.99'))
+    ])
+
+    supabase = supabase_metrics.snapshot()
+    tables = sorted(supabase['tables'].items())
+    lines += _gauge_lines('recommender_supabase_queries', 'PostgREST queries per table in the window.',
+                          [(_labels(('table',), (table,)), stats['queries']) for table, stats in tables])
+    lines += _gauge_lines('recommender_supabase_errors', 'Failed PostgREST queries per table in the window.',
+                          [(_labels(('table',), (table,)), stats['errors']) for table, stats in tables])
+    lines += _gauge_lines('recommender_supabase_latency_seconds', 'PostgREST latency percentiles per table in the window.', [
+        (_labels(('table', 'quantile'), (table, quantile)), stats[f'latency_{label}'])
+        for table, stats in tables
+        for label, quantile in (('p50', '0.5'), ('p95', '0.95'), ('p99', '0.99'))
+    ])
+
+    feedback = feedback_buffer.snapshot()
+    lines += _gauge_lines('recommender_feedback_buffered', 'Feedback events waiting for the next flush.',
+                          [('', feedback['buffered'])])
+    for key, help_text in (
+        ('accepted', 'Feedback events accepted by this process.'),
+        ('dropped', 'Feedback events dropped because the buffer was full.'),
+        ('flushed', 'Feedback events written to the database.'),
+        ('failed_flushes', 'Feedback flushes that failed and were retried.'),
+    ):
+        lines += [f"# HELP recommender_feedback_{key}_total {help_text}", f"# TYPE recommender_feedback_{key}_total counter",
+                  f"recommender_feedback_{key}_total {feedback[key]}"]
+    return '\n'.join(lines) + '\n'
@@ -1,41 +1,296 @@
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
-from .supabase_client import supabase
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from whitenoise.middleware import WhiteNoiseMiddleware
+import time
+from .supabase_client import get_auth_client
+from .supabase_jwt import (
+    SigningKeyUnavailable,
+    identity_ttl,
+    token_cache,
+    token_digest,
+    user_cache,
+    verify_token_locally,
+)
+import jwt
 import logging
-from django.contrib.auth.models import User
+from .models import User
+from .memory import check_memory_budget
+from .profiling import RequestProfiler, requested_mode
+from .timing import request_histograms, track_timings
 
 logger = logging.getLogger(__name__)
 
+# Confirm never-seen tokens with Supabase once (catches revoked sessions) before caching them
+AUTH_REMOTE_CHECK_FIRST_SEEN = getattr(settings, "AUTH_REMOTE_CHECK_FIRST_SEEN", True)
+
+# Local User rows change rarely; keep them for an hour
+AUTH_USER_CACHE_TTL = getattr(settings, "AUTH_USER_CACHE_TTL", 3600)
+
+# Responses smaller than this aren't worth the CPU to gzip
+RESPONSE_COMPRESSION_MIN_BYTES = getattr(settings, "RESPONSE_COMPRESSION_MIN_BYTES", 1024)
+
+class CompressionMiddleware(GZipMiddleware):
+    """GZipMiddleware with a configurable size threshold instead of Django's fixed 200 bytes"""
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < RESPONSE_COMPRESSION_MIN_BYTES:
+            return response
+        return super().process_response(request, response)
+
+class SyncAndAsyncMiddleware:
+    """
+    Base for middleware that runs natively under WSGI and ASGI.
+
+    Django adapts sync-only middleware under ASGI by running it, and every
+    layer inside it, on a worker thread for the whole request. Subclasses
+    implement __call__ for WSGI and __acall__ for ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoiseMiddleware that also runs natively under ASGI; only static files are served on a thread"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        static_file = (await sync_to_async(self.find_file)(request.path_info) if self.autorefresh
+                       else self.files.get(request.path_info))
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+class ServerTimingMiddleware(SyncAndAsyncMiddleware):
+    """Collect stage spans per request into a Server-Timing header and the request latency histogram"""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        with track_timings() as timings:
+            response = self.get_response(request)
+        return self._finish(request, response, timings, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        # Spans recorded on the executors arrive through the copied context
+        with track_timings() as timings:
+            response = await self.get_response(request)
+        return self._finish(request, response, timings, time.perf_counter() - start)
+
+    def _finish(self, request, response, timings, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view = match.url_name if match and match.url_name else 'unmatched'
+        request_histograms.observe((view, request.method, str(response.status_code)), elapsed)
+
+        entries = timings.server_timing()
+        total = f"total;dur={elapsed * 1000:.1f}"
+        response['Server-Timing'] = f"{entries}, {total}" if entries else total
+        return response
+
+class MemoryGuardMiddleware(SyncAndAsyncMiddleware):
+    """Check RSS against MEMORY_BUDGET_MB after requests (rate-limited) and shed cache memory before an OOM kill"""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self._check()
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        # Usually a rate-limited no-op; shedding may touch the cache backend
+        await sync_to_async(self._check, thread_sensitive=False)()
+        return response
+
+    def _check(self):
+        try:
+            check_memory_budget()
+        except Exception as e:
+            logger.error(f"Memory budget check failed: {str(e)}")
+
+class ProfilingMiddleware(SyncAndAsyncMiddleware):
+    """
+    Run opted-in or sampled requests under the request profiler and return the profile id.
+
+    Under ASGI the profiler follows the event-loop thread, so other requests'
+    coroutines can show up in the profile and work done on the executors doesn't.
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        mode = requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+
+        profiler = RequestProfiler(mode)
+        profiler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+        return self._save(request, profiler, response)
+
+    async def __acall__(self, request):
+        # The Django session user is loaded from the database, which can't be touched here
+        mode = requested_mode(request, session=False)
+        if mode is None:
+            return await self.get_response(request)
+
+        profiler = RequestProfiler(mode)
+        profiler.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.stop()
+        return await sync_to_async(self._save, thread_sensitive=False)(request, profiler, response)
+
+    def _save(self, request, profiler, response):
+        try:
+            profile_id = profiler.save(path=request.path, method=request.method, status=response.status_code)
+        except OSError as e:
+            logger.error(f"Could not save request profile: {str(e)}")
+            return response
+        response['X-Profile-Id'] = profile_id
+        logger.info(f"Profiled {request.method} {request.path} ({profiler.mode}, {profiler.duration:.3f}s) as {profile_id}")
+        return response
+
+def request_user_id(request, session=True):
+    """
+    Id of the user making the request: the Supabase user set by
+    SupabaseAuthentication, else (with session=True) the Django session user.
+
+    Pass session=False from async code: request.user is resolved lazily from
+    the session database, which can't be touched there.
+    """
+    user = getattr(request, 'supabase_user', None)
+    if user is None and session:
+        user = getattr(request, 'user', None)
+    return getattr(user, 'id', None)
+
 class SupabaseAuthentication(BaseAuthentication):
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response=None):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
         # Process the request
-        self.authenticate(request)
+        result = self.authenticate(request)
+        if result:
+            request.supabase_user = result[0]
         response = self.get_response(request)
         return response
 
+    async def __acall__(self, request):
+        # Tokens and users seen recently are answered from memory; anything else
+        # (Supabase check, local user row) runs on a thread just for the lookup
+        result = None
+        if request.headers.get('Authorization'):
+            result = self._cached(request) or await sync_to_async(self.authenticate)(request)
+        if result:
+            request.supabase_user = result[0]
+        return await self.get_response(request)
+
+    def _cached(self, request):
+        """authenticate() result if the token and its user are both cached, else None"""
+        parts = request.headers['Authorization'].split(' ')
+        identity = token_cache.get(token_digest(parts[1])) if len(parts) > 1 else None
+        user = user_cache.get(identity['supabase_id']) if identity is not None else None
+        return (user, None) if user is not None else None
+
     def authenticate(self, request):
         auth_header = request.headers.get('Authorization')
-        
+
         if not auth_header:
             return None
-            
+
         try:
             token = auth_header.split(' ')[1]
-            user = supabase.auth.get_user(token)
-            
-            if user:
-                # Get or create user in your database
-                user_profile, created = User.objects.get_or_create(
-                    supabase_id=user.id,
-                    defaults={'email': user.email}
-                )
-                return (user_profile, None)
-            else:
-                raise AuthenticationFailed('Invalid authentication token')
-                
+            identity = self._resolve_identity(token)
+            return (self._get_local_user(identity), None)
+
+        except AuthenticationFailed:
+            raise
         except Exception as e:
             logger.error(f'Authentication error: {str(e)}')
-            raise AuthenticationFailed('Authentication failed') 
\ No newline at end of file
+            raise AuthenticationFailed('Authentication failed')
+
+    def _resolve_identity(self, token):
+        """Map a bearer token to the Supabase identity, hitting the network only when needed"""
+        digest = token_digest(token)
+        identity = token_cache.get(digest)
+        if identity is not None:
+            return identity
+
+        claims, rotated = None, False
+        try:
+            claims, rotated = verify_token_locally(token)
+        except SigningKeyUnavailable as e:
+            logger.debug(f'Local token verification unavailable: {str(e)}')
+        except jwt.ExpiredSignatureError:
+            raise AuthenticationFailed('Authentication token expired')
+        except jwt.InvalidTokenError as e:
+            logger.warning(f'Rejected invalid token: {str(e)}')
+            raise AuthenticationFailed('Invalid authentication token')
+
+        if claims is None or rotated or AUTH_REMOTE_CHECK_FIRST_SEEN:
+            response = get_auth_client().auth.get_user(token)
+            if not response or not response.user:
+                raise AuthenticationFailed('Invalid authentication token')
+            identity = {
+                'supabase_id': response.user.id,
+                'email': response.user.email,
+                'role': (response.user.user_metadata or {}).get('role'),
+            }
+        else:
+            identity = {
+                'supabase_id': claims['sub'],
+                'email': claims.get('email'),
+                'role': (claims.get('user_metadata') or {}).get('role'),
+            }
+
+        token_cache.set(digest, identity, identity_ttl(claims))
+        return identity
+
+    def _get_local_user(self, identity):
+        user = user_cache.get(identity['supabase_id'])
+        if user is None:
+            # Get or create user in your database
+            defaults = {'email': identity['email']}
+            if identity.get('role'):
+                defaults['role'] = identity['role']
+            user, created = User.objects.get_or_create(
+                supabase_id=identity['supabase_id'],
+                defaults=defaults
+            )
+            user_cache.set(identity['supabase_id'], user, AUTH_USER_CACHE_TTL)
+        return user
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='User',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('supabase_id', models.CharField(max_length=255, unique=True)),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('role', models.CharField(choices=[('candidate', 'Candidate'), ('recruiter', 'Recruiter')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'users',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecommendationFeedback',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resume_id', models.CharField(max_length=36)),
+                ('job_description', models.TextField()),
+                ('score', models.FloatField()),
+                ('feedback', models.IntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['resume_id'], name='recommender_resume__93ff99_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Profile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bio', models.TextField(blank=True)),
+                ('website', models.URLField(blank=True)),
+                ('linkedin', models.URLField(blank=True)),
+                ('github', models.URLField(blank=True)),
+                ('twitter', models.URLField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='user_profile', to='recommender.user')),
+            ],
+        ),
+    ]
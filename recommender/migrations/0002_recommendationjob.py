@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:30
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Databases created with syncdb after jobs were added already have this table; see migrate --fake-initial
+    initial = True
+
+    dependencies = [
+        ('recommender', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('recommendation_type', models.CharField(default='hybrid', max_length=20)),
+                ('model_name', models.CharField(default='llama4', max_length=50)),
+                ('job_description', models.TextField()),
+                ('top_n', models.IntegerField(default=5)),
+                ('fields', models.JSONField(blank=True, null=True)),
+                ('user_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('progress', models.JSONField(default=dict)),
+                ('partial_results', models.JSONField(blank=True, null=True)),
+                ('results', models.JSONField(blank=True, null=True)),
+                ('llm_usage', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='recommender_status_314fd8_idx')],
+            },
+        ),
+    ]
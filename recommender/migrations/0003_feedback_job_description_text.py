@@ -0,0 +1,95 @@
+import hashlib
+import re
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def job_description_hash(text):
+    """Frozen copy of feedback.job_description_hash() as of this migration"""
+    normalized = re.sub(r"\s+", " ", (text or "").strip().lower())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def hash_job_descriptions(apps, schema_editor):
+    """Move each feedback row's job description text into JobDescriptionText, keyed like feedback.job_description_hash()"""
+    JobDescriptionText = apps.get_model('recommender', 'JobDescriptionText')
+    RecommendationFeedback = apps.get_model('recommender', 'RecommendationFeedback')
+    texts = RecommendationFeedback.objects.values_list('job_description', flat=True).distinct()
+    for text in texts.iterator():
+        text = text or ''
+        digest = job_description_hash(text)
+        JobDescriptionText.objects.get_or_create(hash=digest, defaults={'text': text})
+        RecommendationFeedback.objects.filter(job_description=text).update(job_description_ref_id=digest)
+
+
+def restore_job_descriptions(apps, schema_editor):
+    JobDescriptionText = apps.get_model('recommender', 'JobDescriptionText')
+    RecommendationFeedback = apps.get_model('recommender', 'RecommendationFeedback')
+    for digest, text in JobDescriptionText.objects.values_list('hash', 'text').iterator():
+        RecommendationFeedback.objects.filter(job_description_ref_id=digest).update(job_description=text)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommender', '0002_recommendationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobDescriptionText',
+            fields=[
+                ('hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('text', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        # Nullable while rows are converted, so the conversion can also run backwards
+        migrations.AlterField(
+            model_name='recommendationfeedback',
+            name='job_description',
+            field=models.TextField(null=True),
+        ),
+        migrations.AddField(
+            model_name='recommendationfeedback',
+            name='job_description_ref',
+            field=models.ForeignKey(db_column='job_description_hash', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recommender.jobdescriptiontext'),
+        ),
+        migrations.RunPython(hash_job_descriptions, restore_job_descriptions),
+        migrations.RemoveField(
+            model_name='recommendationfeedback',
+            name='job_description',
+        ),
+        migrations.RenameField(
+            model_name='recommendationfeedback',
+            old_name='job_description_ref',
+            new_name='job_description',
+        ),
+        migrations.AlterField(
+            model_name='recommendationfeedback',
+            name='job_description',
+            field=models.ForeignKey(db_column='job_description_hash', on_delete=django.db.models.deletion.CASCADE, related_name='feedback', to='recommender.jobdescriptiontext'),
+        ),
+        migrations.AlterField(
+            model_name='recommendationfeedback',
+            name='score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='recommendationfeedback',
+            name='user_id',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        # Existing rows predate the column; they get the migration time
+        migrations.AddField(
+            model_name='recommendationfeedback',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='recommendationfeedback',
+            index=models.Index(fields=['job_description', 'resume_id'], name='recommender_job_des_73c845_idx'),
+        ),
+    ]
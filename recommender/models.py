@@ -1,14 +1,66 @@
+import uuid
 from django.db import models
 
+class JobDescriptionText(models.Model):
+    """Each distinct job description once, keyed by the SHA-256 of its normalized text"""
+    hash = models.CharField(max_length=64, primary_key=True)
+    text = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
 class RecommendationFeedback(models.Model):
     resume_id = models.CharField(max_length=36)
-    job_description = models.TextField()
-    score = models.FloatField()
+    job_description = models.ForeignKey(
+        JobDescriptionText,
+        on_delete=models.CASCADE,
+        db_column='job_description_hash',
+        related_name='feedback'
+    )
+    score = models.FloatField(null=True, blank=True)  # score shown to the recruiter, if sent
     feedback = models.IntegerField()  # 1 for positive, 0 for negative
+    user_id = models.CharField(max_length=255, null=True, blank=True)
+    created_at = models.DateTimeField()
 
     class Meta:
         indexes = [
             models.Index(fields=['resume_id']),
+            models.Index(fields=['job_description', 'resume_id']),
+        ]
+
+class RecommendationJob(models.Model):
+    """A queued LLM/hybrid recommendation run, polled by the client until it finishes"""
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_SUCCEEDED, "Succeeded"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    recommendation_type = models.CharField(max_length=20, default="hybrid")  # hybrid or llm_only
+    model_name = models.CharField(max_length=50, default="llama4")
+    job_description = models.TextField()
+    top_n = models.IntegerField(default=5)
+    fields = models.JSONField(null=True, blank=True)
+    user_id = models.CharField(max_length=255, null=True, blank=True)
+    progress = models.JSONField(default=dict)
+    partial_results = models.JSONField(null=True, blank=True)
+    results = models.JSONField(null=True, blank=True)
+    llm_usage = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
         ]
 
 class User(models.Model):
@@ -0,0 +1,144 @@
+"""
+Content-addressed on-disk cache of text extracted from PDF resumes.
+
+Candidates re-upload the same PDF while editing their profile. Extracted
+text is stored under the SHA-256 of the file bytes plus the extractor
+version, so a PyPDF2 upgrade or extraction change never serves stale
+text. The directory is bounded to PDF_CACHE_MAX_BYTES. File mtimes track
+recency (a hit touches the file), and the least recently used entries are
+evicted first. Writes go through a temp file and os.replace, so
+concurrent workers sharing the directory never see partial entries.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from django.conf import settings
+from .pdf_utils import EXTRACTOR_VERSION, extract_text_from_bytes, read_pdf_upload
+
+logger = logging.getLogger('recommender')
+
+PDF_CACHE_DIR = getattr(settings, "PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "resume-recommender-pdf-cache"))
+PDF_CACHE_MAX_BYTES = getattr(settings, "PDF_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+
+ENTRY_SUFFIX = ".txt"
+
+class DiskLRUCache:
+    """Size-bounded directory of text files, evicted least recently used first"""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(ENTRY_SUFFIX):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue  # evicted by another worker
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return text
+
+    def set(self, key, text):
+        os.makedirs(self.directory, exist_ok=True)
+        data = text.encode('utf-8')
+        if len(data) > self.max_bytes:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Rescan: other workers may have added or evicted entries since our last count
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                evicted += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+        if evicted:
+            logger.info(f"Evicted {evicted} cached PDF extractions ({total} bytes remain)")
+
+pdf_text_cache = DiskLRUCache(PDF_CACHE_DIR, PDF_CACHE_MAX_BYTES)
+
+def pdf_cache_key(data):
+    return f"{hashlib.sha256(data).hexdigest()}-{EXTRACTOR_VERSION}"
+
+def extract_text_from_bytes_cached(data):
+    """
+    Extract text from PDF bytes, reusing an earlier extraction of identical bytes.
+
+    Returns:
+        tuple: (text, cache_hit)
+    """
+    key = pdf_cache_key(data)
+    try:
+        text = pdf_text_cache.get(key)
+    except OSError as e:
+        logger.warning(f"PDF cache read failed: {str(e)}")
+        text = None
+    if text is not None:
+        return text, True
+
+    text = extract_text_from_bytes(data)
+    try:
+        pdf_text_cache.set(key, text)
+    except OSError as e:
+        logger.warning(f"PDF cache write failed: {str(e)}")
+    return text, False
+
+def extract_text_cached(pdf_file):
+    """
+    Extract text from an uploaded PDF, reusing earlier extractions of identical bytes.
+
+    Returns:
+        tuple: (text, cache_hit, extraction_ms)
+    """
+    start_time = time.perf_counter()
+    text, cache_hit = extract_text_from_bytes_cached(read_pdf_upload(pdf_file))
+    return text, cache_hit, (time.perf_counter() - start_time) * 1000
@@ -2,43 +2,170 @@
 Utilities for extracting text from PDF resumes
 """
 
-import os
-import tempfile
+import io
 import logging
+import multiprocessing
+import threading
+import time
+from django.conf import settings
+import PyPDF2
 from PyPDF2 import PdfReader
 
 logger = logging.getLogger('recommender')
 
+PDF_MAX_BYTES = getattr(settings, "PDF_MAX_BYTES", 10 * 1024 * 1024)
+PDF_MAX_PAGES = getattr(settings, "PDF_MAX_PAGES", 50)
+PDF_EXTRACTION_TIMEOUT = getattr(settings, "PDF_EXTRACTION_TIMEOUT", 20)
+
+# Worker processes for extraction. With workers, PDF_EXTRACTION_TIMEOUT is a hard limit: a
+# worker that runs past it is killed. 0 keeps extraction in the request thread, where the limit
+# is only checked between pages. Long PDFs are split across workers from PDF_PARALLEL_MIN_PAGES.
+PDF_PROCESS_WORKERS = getattr(settings, "PDF_PROCESS_WORKERS", 1)
+PDF_PARALLEL_MIN_PAGES = getattr(settings, "PDF_PARALLEL_MIN_PAGES", 16)
+
+# How often a request waiting on the pool checks whether another request's timeout replaced it
+POOL_POLL_INTERVAL = 0.25
+
+# Bump when extraction output changes so cached extractions (see pdf_cache) are not reused
+EXTRACTOR_VERSION = f"pypdf2-{PyPDF2.__version__}-1"
+
+class PDFTooLarge(Exception):
+    """The upload exceeds PDF_MAX_BYTES or PDF_MAX_PAGES"""
+
+class PDFExtractionTimeout(Exception):
+    """Extraction ran past PDF_EXTRACTION_TIMEOUT"""
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the web process is threaded and has torch loaded
+            _pool = multiprocessing.get_context('spawn').Pool(processes=PDF_PROCESS_WORKERS)
+        return _pool
+
+def _terminate_pool(pool):
+    """Kill a pool whose work ran past its deadline; the next extraction starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.terminate()
+
+def _timeout_error():
+    return PDFExtractionTimeout(f"PDF text extraction took longer than {PDF_EXTRACTION_TIMEOUT} seconds")
+
+def _run_in_pool(tasks, deadline):
+    """
+    Run [(func, args), ...] on the worker pool and return their results in order.
+
+    Raises:
+        PDFExtractionTimeout: the deadline passed; the pool (and whatever it was running) is killed
+    """
+    pool = _get_pool()
+    pending = [pool.apply_async(func, args) for func, args in tasks]
+    results = []
+    for result in pending:
+        while not result.ready():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                _terminate_pool(pool)
+                raise _timeout_error()
+            if _pool is not pool:
+                # Another request's timeout killed this pool; start over on a fresh one
+                return _run_in_pool(tasks, deadline)
+            result.wait(min(remaining, POOL_POLL_INTERVAL))
+        results.append(result.get())
+    return results
+
+def read_pdf_upload(pdf_file):
+    """Read the upload into memory, refusing anything over PDF_MAX_BYTES"""
+    size = getattr(pdf_file, 'size', None)
+    if size is not None and size > PDF_MAX_BYTES:
+        raise PDFTooLarge(f"PDF is larger than {PDF_MAX_BYTES / (1024 * 1024):g} MB")
+
+    pdf_file.seek(0)
+    data = pdf_file.read(PDF_MAX_BYTES + 1)
+    if len(data) > PDF_MAX_BYTES:
+        raise PDFTooLarge(f"PDF is larger than {PDF_MAX_BYTES / (1024 * 1024):g} MB")
+    return data
+
+def _open_pdf(data):
+    """Parse the PDF and enforce PDF_MAX_PAGES; returns (reader, page count)"""
+    pdf = PdfReader(io.BytesIO(data))
+    page_count = len(pdf.pages)
+    if page_count > PDF_MAX_PAGES:
+        raise PDFTooLarge(f"PDF has {page_count} pages; at most {PDF_MAX_PAGES} are allowed")
+    return pdf, page_count
+
+def _extract_pages(reader, start, stop, deadline=None):
+    parts = []
+    for page_num in range(start, stop):
+        if deadline is not None and time.monotonic() > deadline:
+            raise _timeout_error()
+        parts.append(reader.pages[page_num].extract_text() or "")
+    return parts
+
+def _extract_document(data):
+    """Pool entry point: (page count, page texts), or just the page count for long PDFs that get split"""
+    pdf, page_count = _open_pdf(data)
+    if PDF_PROCESS_WORKERS > 1 and page_count >= PDF_PARALLEL_MIN_PAGES:
+        return page_count, None
+    return page_count, _extract_pages(pdf, 0, page_count)
+
+def _extract_page_range(data, start, stop):
+    """Pool entry point: parse the PDF bytes and extract pages [start, stop)"""
+    return _extract_pages(PdfReader(io.BytesIO(data)), start, stop)
+
+def _extract_in_pool(data, deadline):
+    # Even parsing runs in the pool: a malformed PDF can stall before the first page
+    [(page_count, parts)] = _run_in_pool([(_extract_document, (data,))], deadline)
+    if parts is not None:
+        return parts
+
+    workers = min(PDF_PROCESS_WORKERS, page_count)
+    step = -(-page_count // workers)
+    chunks = _run_in_pool([
+        (_extract_page_range, (data, start, min(start + step, page_count)))
+        for start in range(0, page_count, step)
+    ], deadline)
+    return [part for chunk in chunks for part in chunk]
+
+def extract_text_from_bytes(data):
+    """
+    Extract text from PDF bytes already in memory
+
+    Raises:
+        PDFTooLarge: the PDF has more than PDF_MAX_PAGES pages
+        PDFExtractionTimeout: extraction ran past PDF_EXTRACTION_TIMEOUT
+    """
+    deadline = time.monotonic() + PDF_EXTRACTION_TIMEOUT
+    if PDF_PROCESS_WORKERS:
+        parts = _extract_in_pool(data, deadline)
+    else:
+        pdf, page_count = _open_pdf(data)
+        parts = _extract_pages(pdf, 0, page_count, deadline)
+
+    return "".join(parts)
+
 def extract_text_from_pdf(pdf_file):
     """
     Extract text from a PDF file
-    
+
     Args:
         pdf_file: Django file object (InMemoryUploadedFile)
-    
+
     Returns:
         str: Extracted text from PDF
+
+    Raises:
+        PDFTooLarge: the file has too many bytes or pages
+        PDFExtractionTimeout: extraction ran past PDF_EXTRACTION_TIMEOUT
     """
     try:
-        # Create a temporary file to handle the PDF
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            for chunk in pdf_file.chunks():
-                temp_file.write(chunk)
-            temp_filename = temp_file.name
-        
-        # Extract text from the PDF
-        extracted_text = ""
-        with open(temp_filename, 'rb') as f:
-            pdf = PdfReader(f)
-            for page_num in range(len(pdf.pages)):
-                page = pdf.pages[page_num]
-                extracted_text += page.extract_text()
-        
-        # Clean up temporary file
-        os.unlink(temp_filename)
-        
-        return extracted_text
-    
+        return extract_text_from_bytes(read_pdf_upload(pdf_file))
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {str(e)}")
         raise e
@@ -0,0 +1,91 @@
+"""
+Batched, cached profile + resume lookups for candidate cards.
+
+Cards are read through the Django cache (PROFILE_CACHE_ALIAS, locmem by
+default; point it at a shared backend such as Redis to share entries across
+workers). Cache misses are filled with one `in_()` query per table no matter
+how many user ids are requested. Writers call invalidate_profile() after
+changing a profile or resume.
+"""
+
+import logging
+import threading
+from collections import deque
+from django.conf import settings
+from django.core.cache import caches
+from .supabase_client import get_supabase_client
+from .utils import RESUME_DISPLAY_COLUMNS
+
+logger = logging.getLogger('recommender')
+
+PROFILE_CACHE_ALIAS = getattr(settings, "PROFILE_CACHE_ALIAS", "default")
+PROFILE_CACHE_TTL = getattr(settings, "PROFILE_CACHE_TTL", 300)
+PROFILE_BATCH_MAX_IDS = getattr(settings, "PROFILE_BATCH_MAX_IDS", 100)
+
+# Cards this worker cached, newest last, so the memory guard can drop them
+_written_keys = deque(maxlen=4096)
+_written_keys_lock = threading.Lock()
+
+def _cache_key(user_id):
+    return f"profile_card:{user_id}"
+
+def _fetch_profile_cards(user_ids):
+    """Load profiles and resumes for user_ids with one query per table"""
+    supabase = get_supabase_client()
+    profiles = supabase.table('profiles') \
+        .select('*') \
+        .in_('id', user_ids) \
+        .execute().data or []
+    resumes = supabase.table('resumes') \
+        .select(','.join(RESUME_DISPLAY_COLUMNS)) \
+        .in_('user_id', user_ids) \
+        .execute().data or []
+
+    cards = {user_id: {'profile': None, 'resume': None} for user_id in user_ids}
+    for profile in profiles:
+        card = cards.get(str(profile['id']))
+        if card is not None:
+            card['profile'] = profile
+    for resume in resumes:
+        card = cards.get(str(resume['user_id']))
+        if card is not None and card['resume'] is None:
+            card['resume'] = resume
+    return cards
+
+def get_profile_cards(user_ids):
+    """
+    Return {user_id: {'profile': ..., 'resume': ...}} for the given ids.
+
+    Unknown ids map to a card with both entries None. Those are cached too,
+    so repeated lookups of missing users don't hit Supabase.
+    """
+    user_ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+    if not user_ids:
+        return {}
+
+    cache = caches[PROFILE_CACHE_ALIAS]
+    cached = cache.get_many([_cache_key(user_id) for user_id in user_ids])
+    cards = {user_id: cached[_cache_key(user_id)] for user_id in user_ids if _cache_key(user_id) in cached}
+
+    missing = [user_id for user_id in user_ids if user_id not in cards]
+    if missing:
+        fetched = _fetch_profile_cards(missing)
+        cache.set_many({_cache_key(user_id): card for user_id, card in fetched.items()}, PROFILE_CACHE_TTL)
+        with _written_keys_lock:
+            _written_keys.extend(_cache_key(user_id) for user_id in fetched)
+        cards.update(fetched)
+    logger.debug(f"Profile cards: {len(user_ids) - len(missing)} cached, {len(missing)} fetched")
+
+    return {user_id: cards[user_id] for user_id in user_ids}
+
+def invalidate_profile(user_id):
+    caches[PROFILE_CACHE_ALIAS].delete(_cache_key(user_id))
+
+def drop_cached_cards():
+    """Delete the cards this worker cached; returns how many"""
+    with _written_keys_lock:
+        keys = list(dict.fromkeys(_written_keys))
+        _written_keys.clear()
+    if keys:
+        caches[PROFILE_CACHE_ALIAS].delete_many(keys)
+    return len(keys)
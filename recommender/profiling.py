@@ -0,0 +1,208 @@
+"""
+On-demand request profiling.
+
+A request is profiled when it carries a valid signed X-Profile-Request
+token (see the profiling_token command), when a staff user adds
+?profile=1, or when it is picked by PROFILING_SAMPLE_RATE. Two modes:
+
+- sample: a background thread snapshots the request thread's stack every
+  PROFILING_SAMPLE_INTERVAL seconds. Overhead is low enough for live traffic.
+- deterministic: cProfile traces every call (exact counts, slower), with
+  the sampler still running for the stack file.
+
+Each profile is saved as <id>.pstats (loadable with pstats/snakeviz), a
+<id>.collapsed stack file (flamegraph.pl / speedscope) and <id>.json
+metadata in PROFILING_DIR, which keeps only the newest
+PROFILING_MAX_PROFILES. Only the thread serving the request is profiled;
+work handed to executor pools shows up as time spent waiting.
+"""
+
+import cProfile
+import json
+import logging
+import marshal
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from django.conf import settings
+from django.core import signing
+
+logger = logging.getLogger('recommender')
+
+PROFILING_DIR = getattr(settings, "PROFILING_DIR", os.path.join(tempfile.gettempdir(), 'resume-recommender-profiles'))
+PROFILING_MAX_PROFILES = getattr(settings, "PROFILING_MAX_PROFILES", 50)
+# Fraction of PROFILING_PATHS requests profiled without being asked (0 disables)
+PROFILING_SAMPLE_RATE = getattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+PROFILING_PATHS = tuple(getattr(settings, "PROFILING_PATHS", ('/recommend/', '/api/recommend/')))
+PROFILING_DEFAULT_MODE = getattr(settings, "PROFILING_DEFAULT_MODE", 'sample')
+PROFILING_SAMPLE_INTERVAL = getattr(settings, "PROFILING_SAMPLE_INTERVAL", 0.005)
+PROFILING_TOKEN_MAX_AGE = getattr(settings, "PROFILING_TOKEN_MAX_AGE", 3600)
+
+PROFILING_MODES = ('sample', 'deterministic')
+PROFILE_TOKEN_SALT = 'recommender.profiling'
+
+_write_lock = threading.Lock()
+
+def make_profile_token(mode=PROFILING_DEFAULT_MODE):
+    """Signed X-Profile-Request value, valid for PROFILING_TOKEN_MAX_AGE seconds"""
+    return signing.dumps({'mode': mode}, salt=PROFILE_TOKEN_SALT)
+
+def requested_mode(request, session=True):
+    """
+    Profiling mode asked for (or sampled) for this request, or None.
+
+    With session=False only a Supabase user can use ?profile=1 (see request_user_id).
+    """
+    token = request.headers.get('X-Profile-Request')
+    if token:
+        try:
+            mode = signing.loads(token, salt=PROFILE_TOKEN_SALT, max_age=PROFILING_TOKEN_MAX_AGE).get('mode')
+        except signing.BadSignature:
+            logger.warning(f"Ignoring invalid profiling token on {request.path}")
+        else:
+            return mode if mode in PROFILING_MODES else PROFILING_DEFAULT_MODE
+
+    flag = request.GET.get('profile')
+    if flag:
+        user = getattr(request, 'supabase_user', None) or (getattr(request, 'user', None) if session else None)
+        if getattr(user, 'is_staff', False):
+            return flag if flag in PROFILING_MODES else PROFILING_DEFAULT_MODE
+
+    if PROFILING_SAMPLE_RATE and request.path.startswith(PROFILING_PATHS) and random.random() < PROFILING_SAMPLE_RATE:
+        return PROFILING_DEFAULT_MODE
+    return None
+
+def _code_key(code):
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+class StackSampler:
+    """Periodically captures one thread's Python stack"""
+
+    def __init__(self, thread_id, interval=PROFILING_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        # Outermost-first tuples of (filename, firstlineno, name) -> times seen
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_code_key(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        """Brendan Gregg's folded format: 'outer;inner;leaf count' per line"""
+        lines = []
+        for stack, count in self.stacks.most_common():
+            frames = ';'.join(f"{name} ({os.path.basename(filename)}:{line})" for filename, line, name in stack)
+            lines.append(f"{frames} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def pstats_dict(self):
+        """Samples as a pstats-loadable dict; call counts are sample counts, times are samples x interval"""
+        stats = {}
+        for stack, count in self.stacks.items():
+            seconds = count * self.interval
+            seen = set()
+            for depth, key in enumerate(stack):
+                cc, nc, tt, ct, callers = stats.setdefault(key, (0, 0, 0.0, 0.0, {}))
+                if key not in seen:
+                    # Recursive frames count once toward cumulative time
+                    ct += seconds
+                    seen.add(key)
+                if depth == len(stack) - 1:
+                    tt += seconds
+                if depth:
+                    caller = stack[depth - 1]
+                    c_cc, c_nc, c_tt, c_ct = callers.get(caller, (0, 0, 0.0, 0.0))
+                    callers[caller] = (c_cc + count, c_nc + count, c_tt + (seconds if depth == len(stack) - 1 else 0.0), c_ct + seconds)
+                stats[key] = (cc + count, nc + count, tt, ct, callers)
+        return stats
+
+class RequestProfiler:
+    """Profiles the calling thread between start() and stop(), then saves the result"""
+
+    def __init__(self, mode=PROFILING_DEFAULT_MODE):
+        self.mode = mode
+        self.profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.sampler = StackSampler(threading.get_ident())
+        self.profiler = cProfile.Profile() if mode == 'deterministic' else None
+        self.started = None
+        self.duration = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.sampler.start()
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.sampler.stop()
+        self.duration = time.perf_counter() - self.started
+
+    def save(self, **metadata):
+        """Write the profile files and prune old profiles; returns the profile id"""
+        os.makedirs(PROFILING_DIR, exist_ok=True)
+        base = os.path.join(PROFILING_DIR, self.profile_id)
+        if self.profiler is not None:
+            self.profiler.dump_stats(base + '.pstats')
+        else:
+            with open(base + '.pstats', 'wb') as f:
+                marshal.dump(self.sampler.pstats_dict(), f)
+        with open(base + '.collapsed', 'w') as f:
+            f.write(self.sampler.collapsed())
+        with open(base + '.json', 'w') as f:
+            json.dump({
+                'id': self.profile_id,
+                'mode': self.mode,
+                'duration_seconds': round(self.duration, 4),
+                'samples': sum(self.sampler.stacks.values()),
+                'sample_interval': self.sampler.interval,
+                'created_at': time.time(),
+                **metadata,
+            }, f)
+        prune_profiles()
+        return self.profile_id
+
+def prune_profiles(max_profiles=None):
+    """Delete all but the newest max_profiles profiles"""
+    max_profiles = PROFILING_MAX_PROFILES if max_profiles is None else max_profiles
+    with _write_lock:
+        try:
+            names = os.listdir(PROFILING_DIR)
+        except FileNotFoundError:
+            return
+        ids = sorted({name.rsplit('.', 1)[0] for name in names if name.endswith('.json')}, reverse=True)
+        for profile_id in ids[max_profiles:]:
+            for suffix in ('.json', '.pstats', '.collapsed'):
+                try:
+                    os.remove(os.path.join(PROFILING_DIR, profile_id + suffix))
+                except FileNotFoundError:
+                    pass
+
+def profile_path(profile_id, kind):
+    """Path of a saved profile file, or None (ids are validated so they can't escape PROFILING_DIR)"""
+    if kind not in ('pstats', 'collapsed', 'json') or not profile_id or os.path.basename(profile_id) != profile_id:
+        return None
+    path = os.path.join(PROFILING_DIR, f"{profile_id}.{kind}")
+    return path if os.path.exists(path) else None
@@ -0,0 +1,113 @@
+"""
+Cached full rankings and cursor pagination for /recommend/.
+
+The first request for a job scores every resume once and caches the whole
+ranking (ids and scores, no resume payloads) per (job text, method, corpus
+version) for RANKING_CACHE_TTL seconds. Each response carries an opaque
+cursor in the X-Next-Cursor header. Following pages are served by slicing
+the cached ranking and loading just the resumes on that page.
+"""
+
+import logging
+import threading
+from collections import deque
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from .coalescing import recommendation_flight, recommendation_key
+
+logger = logging.getLogger('recommender')
+
+RANKING_CACHE_ALIAS = getattr(settings, "RANKING_CACHE_ALIAS", "default")
+RANKING_CACHE_TTL = getattr(settings, "RANKING_CACHE_TTL", 900)
+RANKING_MAX_PAGE_SIZE = getattr(settings, "RANKING_MAX_PAGE_SIZE", 100)
+
+CURSOR_SALT = "recommender.ranking.cursor"
+
+# Rankings this worker wrote, newest last, so the memory guard can drop them
+_written_keys = deque(maxlen=1024)
+_written_keys_lock = threading.Lock()
+
+class InvalidCursor(Exception):
+    """The cursor was tampered with or is malformed"""
+
+class RankingExpired(Exception):
+    """The ranking a cursor points at is no longer cached"""
+
+def ranking_key(job_desc, method, corpus_version):
+    return recommendation_key(job_desc, None, method, corpus_version=corpus_version)
+
+def _cache_key(key):
+    return f"ranking:{key}"
+
+def get_ranking(key, compute):
+    """
+    Return the cached ranking for key, computing it at most once at a time.
+
+    compute() returns (ranking, cacheable); like coalesce(), a ranking that
+    isn't cacheable (e.g. the corpus failed to load) is only shared with the
+    requests already waiting on it.
+
+    Returns:
+        tuple: (ranking, computed, cacheable) - computed is True if this call did the scoring
+    """
+    cache = caches[RANKING_CACHE_ALIAS]
+    ranking = cache.get(_cache_key(key))
+    if ranking is not None:
+        return ranking, False, True
+
+    def run():
+        ranking, cacheable = compute()
+        if cacheable:
+            cache.set(_cache_key(key), ranking, RANKING_CACHE_TTL)
+            with _written_keys_lock:
+                _written_keys.append(_cache_key(key))
+            logger.info(f"Cached ranking {key[:12]} with {len(ranking)} entries")
+        return ranking, cacheable
+
+    (ranking, cacheable), shared = recommendation_flight.do(f"ranking:{key}", run)
+    return ranking, not shared, cacheable
+
+def get_cached_ranking(key):
+    ranking = caches[RANKING_CACHE_ALIAS].get(_cache_key(key))
+    if ranking is None:
+        raise RankingExpired("This result set has expired; submit the job description again")
+    return ranking
+
+def tracked_ranking_count():
+    with _written_keys_lock:
+        return len(_written_keys)
+
+def drop_tracked_rankings():
+    """Delete the rankings this worker cached (open cursors get 410 and start over); returns how many"""
+    with _written_keys_lock:
+        keys = list(dict.fromkeys(_written_keys))
+        _written_keys.clear()
+    if keys:
+        caches[RANKING_CACHE_ALIAS].delete_many(keys)
+    return len(keys)
+
+def encode_cursor(key, offset, page_size, fields=None):
+    return signing.dumps(
+        {'k': key, 'o': offset, 'n': page_size, 'f': sorted(fields) if fields else None},
+        salt=CURSOR_SALT,
+        compress=True
+    )
+
+def decode_cursor(cursor):
+    """
+    Returns:
+        tuple: (ranking key, offset, page size, fields)
+    """
+    try:
+        state = signing.loads(cursor, salt=CURSOR_SALT)
+        return state['k'], int(state['o']), int(state['n']), set(state['f']) if state['f'] else None
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise InvalidCursor("Invalid cursor")
+
+def next_cursor(key, ranking, offset, page_size, fields=None):
+    """Cursor for the page after [offset, offset + page_size), or None at the end"""
+    next_offset = offset + page_size
+    if next_offset >= len(ranking):
+        return None
+    return encode_cursor(key, next_offset, page_size, fields)
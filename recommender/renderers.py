@@ -0,0 +1,34 @@
+"""
+Fast JSON rendering for the recommendation endpoints.
+
+Uses orjson when it is installed (it serializes NumPy arrays and scalars
+natively), and falls back to DRF's JSONRenderer otherwise.
+"""
+
+from rest_framework.renderers import JSONRenderer
+from .timing import span
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+def _default(obj):
+    # Anything orjson doesn't know natively (Decimal, UUID subclasses, lazy strings...)
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    return str(obj)
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer drop-in that uses orjson for the common, non-indented case"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with span('serialize'):
+            if orjson is None:
+                return super().render(data, accepted_media_type, renderer_context)
+            if data is None:
+                return b''
+            # Honour indent requests from the browsable API / Accept header via the slow path
+            if self.get_indent(accepted_media_type, renderer_context or {}):
+                return super().render(data, accepted_media_type, renderer_context)
+            return orjson.dumps(data, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
@@ -16,3 +16,67 @@ class ResumeSerializer(serializers.Serializer):
     certifications = serializers.ListField(child=serializers.CharField())
     embedding = serializers.CharField(required=False)  # Optional field
     score = serializers.FloatField()  # Ensure this field is included
+
+# Candidate fields returned with each recommendation unless `fields` narrows them
+RESUME_FIELDS = (
+    'id', 'user_id', 'name', 'email', 'phone', 'address',
+    'education', 'experience', 'skills', 'languages', 'certifications',
+)
+
+# Scoring and explanation fields added by the NLP, LLM and hybrid recommenders
+RESULT_FIELDS = (
+    'score', 'match_reasons', 'score_components', 'reasoning', 'raw_score',
+    'nlp_score', 'llm_score', 'nlp_reasoning', 'llm_reasoning',
+    'skill_match', 'experience_match', 'education_match', 'strengths', 'weaknesses',
+)
+
+# Internal fields only returned when explicitly requested through `fields`
+INTERNAL_FIELDS = ('embedding', 'embedding_text')
+
+def parse_fields_param(value):
+    """Turn a `fields` request value (comma-separated string or list) into a set, or None"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    fields = {str(field).strip() for field in value if str(field).strip()}
+    return fields or None
+
+def parse_top_n(value, default=5):
+    """Turn a `top_n` request value (int or numeric string) into a positive int; ValueError otherwise"""
+    if value is None or value == '':
+        return default
+    try:
+        if isinstance(value, bool):
+            raise TypeError(value)
+        top_n = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("top_n must be a positive integer")
+    if top_n < 1:
+        raise ValueError("top_n must be a positive integer")
+    return top_n
+
+def project_recommendation(item, fields=None):
+    """
+    Reduce one recommendation dict to the lean response schema.
+    
+    Without `fields`, RESUME_FIELDS and RESULT_FIELDS are kept and internal
+    fields are dropped. With `fields`, only those keys are kept. A nested
+    hybrid `resume` is projected the same way, minus the scoring fields the
+    outer result already carries.
+    """
+    allowed = fields if fields is not None else set(RESUME_FIELDS) | set(RESULT_FIELDS)
+    projected = {key: value for key, value in item.items() if key in allowed}
+    
+    nested = item.get('resume')
+    if isinstance(nested, dict):
+        nested_allowed = (fields & (set(RESUME_FIELDS) | set(INTERNAL_FIELDS))) if fields is not None else set(RESUME_FIELDS)
+        if nested_allowed or (fields is not None and 'resume' in fields):
+            projected['resume'] = {
+                key: value for key, value in nested.items()
+                if key in (nested_allowed or set(RESUME_FIELDS))
+            }
+    return projected
+
+def project_recommendations(items, fields=None):
+    return [project_recommendation(item, fields) for item in items]
@@ -1,4 +1,157 @@
-from supabase import create_client, Client
+"""
+Shared Supabase clients.
+
+Every part of the app gets its Supabase client from get_supabase_client(),
+which hands out one long-lived client per credential set. All clients for
+the same project share a keep-alive httpx connection pool, so requests reuse
+TCP/TLS connections instead of opening new ones per call. The pool's
+transport records per-table PostgREST latency in supabase_metrics.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+import httpx
 from django.conf import settings
+from supabase import create_client, Client
+from supabase.lib.client_options import SyncClientOptions
+
+logger = logging.getLogger('recommender')
+
+SUPABASE_POOL_MAX_CONNECTIONS = getattr(settings, "SUPABASE_POOL_MAX_CONNECTIONS", 20)
+SUPABASE_POOL_MAX_KEEPALIVE = getattr(settings, "SUPABASE_POOL_MAX_KEEPALIVE", 10)
+SUPABASE_POOL_KEEPALIVE_EXPIRY = getattr(settings, "SUPABASE_POOL_KEEPALIVE_EXPIRY", 30.0)
+SUPABASE_CONNECT_TIMEOUT = getattr(settings, "SUPABASE_CONNECT_TIMEOUT", 5.0)
+SUPABASE_READ_TIMEOUT = getattr(settings, "SUPABASE_READ_TIMEOUT", 30.0)
+SUPABASE_METRICS_WINDOW_SECONDS = getattr(settings, "SUPABASE_METRICS_WINDOW_SECONDS", 3600)
+SUPABASE_METRICS_MAX_RECORDS = getattr(settings, "SUPABASE_METRICS_MAX_RECORDS", 10000)
+
+REST_PATH_PREFIX = "/rest/v1/"
+
+def _table_from_path(path):
+    """'/rest/v1/resumes' -> 'resumes'; auth/storage calls are grouped by service"""
+    if path.startswith(REST_PATH_PREFIX):
+        return path[len(REST_PATH_PREFIX):].split("/", 1)[0] or "rest"
+    return path.strip("/").split("/", 1)[0] or "root"
+
+class TableLatencyStore:
+    """Time-windowed latency samples per table"""
+
+    def __init__(self, window_seconds=SUPABASE_METRICS_WINDOW_SECONDS, max_records=SUPABASE_METRICS_MAX_RECORDS):
+        self.window_seconds = window_seconds
+        self.max_records = max_records
+        self._samples = defaultdict(lambda: deque(maxlen=self.max_records))
+        self._lock = threading.Lock()
+
+    def add(self, table, method, latency, error=False):
+        with self._lock:
+            self._samples[table].append((time.time(), method, latency, error))
+
+    def snapshot(self):
+        """Query count, error count and latency percentiles per table within the window"""
+        cutoff = time.time() - self.window_seconds
+        with self._lock:
+            for samples in self._samples.values():
+                while samples and samples[0][0] < cutoff:
+                    samples.popleft()
+            tables = {table: list(samples) for table, samples in self._samples.items() if samples}
+
+        snapshot = {}
+        for table, samples in tables.items():
+            latencies = sorted(sample[2] for sample in samples)
+            stats = {
+                'queries': len(samples),
+                'errors': sum(1 for sample in samples if sample[3]),
+                'methods': sorted({sample[1] for sample in samples}),
+                'latency_mean': round(sum(latencies) / len(latencies), 4),
+            }
+            for label, fraction in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99)):
+                stats[f'latency_{label}'] = round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))], 4)
+            snapshot[table] = stats
+        return {'tables': snapshot, 'window_seconds': self.window_seconds}
+
+supabase_metrics = TableLatencyStore()
+
+class InstrumentedTransport(httpx.BaseTransport):
+    """httpx transport that times each round trip (including the body) per table"""
+
+    def __init__(self, transport, store):
+        self._transport = transport
+        self._store = store
+
+    def handle_request(self, request):
+        table = _table_from_path(request.url.path)
+        started = time.perf_counter()
+        try:
+            response = self._transport.handle_request(request)
+            # Read inside the timer so latency covers the whole payload
+            response.read()
+        except Exception:
+            self._store.add(table, request.method, time.perf_counter() - started, error=True)
+            raise
+        latency = time.perf_counter() - started
+        self._store.add(table, request.method, latency, error=response.status_code >= 400)
+        logger.debug(f"Supabase {request.method} {table}: {response.status_code} in {latency:.3f}s")
+        return response
+
+    def close(self):
+        self._transport.close()
+
+_lock = threading.Lock()
+_http_clients = {}
+_clients = {}
+
+def _get_http_client(url):
+    """One pooled, keep-alive httpx client per Supabase project"""
+    http_client = _http_clients.get(url)
+    if http_client is None:
+        transport = httpx.HTTPTransport(
+            limits=httpx.Limits(
+                max_connections=SUPABASE_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=SUPABASE_POOL_MAX_KEEPALIVE,
+                keepalive_expiry=SUPABASE_POOL_KEEPALIVE_EXPIRY,
+            ),
+            retries=1,
+        )
+        http_client = httpx.Client(
+            transport=InstrumentedTransport(transport, supabase_metrics),
+            timeout=httpx.Timeout(SUPABASE_READ_TIMEOUT, connect=SUPABASE_CONNECT_TIMEOUT),
+            follow_redirects=True,
+        )
+        _http_clients[url] = http_client
+    return http_client
+
+def get_supabase_client(url=None, key=None, scope="data") -> Client:
+    """
+    Return the shared client for a credential set (defaults to SUPABASE_URL / SUPABASE_KEY).
+
+    Clients are created once per process and reused for every request.
+    Signing a user in switches a client's Authorization header to that
+    user's token, so auth flows use scope="auth" and never share a client
+    with plain data access.
+    """
+    url = url or settings.SUPABASE_URL
+    key = key or settings.SUPABASE_KEY
+    cache_key = (url, key, scope)
+    client = _clients.get(cache_key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(cache_key)
+        if client is None:
+            options = SyncClientOptions(
+                # Server-side clients must not pick up a signed-in user's session
+                auto_refresh_token=False,
+                persist_session=False,
+                httpx_client=_get_http_client(url),
+            )
+            client = create_client(url, key, options=options)
+            _clients[cache_key] = client
+            logger.info(f"Created shared {scope} Supabase client for {url}")
+    return client
 
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY) 
\ No newline at end of file
+def get_auth_client() -> Client:
+    """Client for sign-up / sign-in / token checks"""
+    return get_supabase_client(scope="auth")
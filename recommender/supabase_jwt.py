@@ -0,0 +1,180 @@
+"""
+Local verification of Supabase access tokens.
+
+Tokens are checked against a cached signing key: the project's JWT secret
+(HS256) when SUPABASE_JWT_SECRET is set, otherwise the public keys from the
+project's JWKS endpoint. The JWKS is refetched for an unknown key id at
+most once per SUPABASE_JWKS_REFRESH_INTERVAL, and unknown ids are
+remembered as misses, so forged tokens can't make every request wait on an
+outbound fetch; such tokens fall through to the Supabase check. Verified identities are kept in a bounded TTL cache
+keyed by a hash of the token, so repeat requests skip both the crypto and
+the Supabase round trip.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+import jwt
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SUPABASE_JWT_SECRET = getattr(settings, "SUPABASE_JWT_SECRET", None)
+SUPABASE_JWKS_URL = getattr(settings, "SUPABASE_JWKS_URL", None)
+SUPABASE_JWT_AUDIENCE = getattr(settings, "SUPABASE_JWT_AUDIENCE", "authenticated")
+SUPABASE_JWKS_REFRESH_INTERVAL = getattr(settings, "SUPABASE_JWKS_REFRESH_INTERVAL", 60)
+AUTH_TOKEN_CACHE_TTL = getattr(settings, "AUTH_TOKEN_CACHE_TTL", 300)
+AUTH_TOKEN_CACHE_SIZE = getattr(settings, "AUTH_TOKEN_CACHE_SIZE", 10000)
+AUTH_USER_CACHE_SIZE = getattr(settings, "AUTH_USER_CACHE_SIZE", 10000)
+
+# Unknown key ids remembered between refreshes
+UNKNOWN_KID_CACHE_SIZE = 1024
+
+# Algorithms Supabase uses for asymmetric JWT signing keys
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256", "EdDSA"]
+
+class SigningKeyUnavailable(Exception):
+    """No local key can verify this token (nothing configured, or the JWKS fetch failed)"""
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache whose entries expire individually"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class SigningKeyCache:
+    """Holds the signing keys used to verify tokens, refetching the JWKS (rate-limited) on an unknown kid"""
+
+    def __init__(self, secret=None, jwks_url=None, refresh_interval=SUPABASE_JWKS_REFRESH_INTERVAL):
+        self.secret = secret
+        self.jwks_url = jwks_url
+        self.refresh_interval = refresh_interval
+        self._keys = {}
+        self._unknown_kids = TTLCache(UNKNOWN_KID_CACHE_SIZE)
+        self._last_refresh = None
+        self._lock = threading.Lock()
+        self._jwk_client = jwt.PyJWKClient(jwks_url, cache_keys=False) if jwks_url and not secret else None
+
+    def _refresh(self):
+        signing_keys = self._jwk_client.get_signing_keys(refresh=True)
+        self._keys = {key.key_id: key for key in signing_keys}
+        self._unknown_kids.clear()
+        logger.info(f"Fetched {len(self._keys)} Supabase signing keys")
+
+    def _refresh_due(self):
+        return self._last_refresh is None or time.monotonic() - self._last_refresh >= self.refresh_interval
+
+    def get(self, header):
+        """
+        Return (key, algorithms, rotated) for a token header.
+
+        rotated is True when the key had to be (re)fetched, which callers
+        treat as a reason to confirm the token with Supabase.
+        """
+        algorithm = header.get("alg")
+        if algorithm == "HS256":
+            # The JWKS only publishes asymmetric keys
+            if self.secret:
+                return self.secret, ["HS256"], False
+            raise SigningKeyUnavailable("SUPABASE_JWT_SECRET is not set")
+        if self._jwk_client is None:
+            raise SigningKeyUnavailable(f"No local key configured for {algorithm} tokens")
+
+        kid = header.get("kid")
+        if not kid:
+            raise SigningKeyUnavailable("Token has no signing key id")
+        key = self._keys.get(kid)
+        rotated = False
+        if key is None:
+            if self._unknown_kids.get(kid) or not self._refresh_due():
+                raise SigningKeyUnavailable(f"Unknown signing key id {kid}")
+            with self._lock:
+                key = self._keys.get(kid)
+                if key is None and self._refresh_due():
+                    # Count failed fetches too, so an unreachable JWKS isn't retried per request
+                    self._last_refresh = time.monotonic()
+                    try:
+                        self._refresh()
+                    except jwt.PyJWKClientError as e:
+                        raise SigningKeyUnavailable(str(e))
+                    key = self._keys.get(kid)
+                    rotated = True
+            if key is None:
+                self._unknown_kids.set(kid, True, self.refresh_interval)
+                raise SigningKeyUnavailable(f"Unknown signing key id {kid}")
+        return key.key, [key.algorithm_name or algorithm], rotated
+
+signing_keys = SigningKeyCache(SUPABASE_JWT_SECRET, SUPABASE_JWKS_URL)
+
+# token hash -> {'supabase_id', 'email', 'role'}
+token_cache = TTLCache(AUTH_TOKEN_CACHE_SIZE)
+
+# supabase id -> local User row
+user_cache = TTLCache(AUTH_USER_CACHE_SIZE)
+
+def token_digest(token):
+    # Never keep raw bearer tokens in memory longer than the request
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def verify_token_locally(token):
+    """
+    Verify signature, expiry and audience of a Supabase access token.
+
+    Returns:
+        tuple: (claims, rotated) - rotated is True if the signing key was just refetched
+
+    Raises:
+        SigningKeyUnavailable: the token can't be checked locally
+        jwt.InvalidTokenError: the token is invalid or expired
+    """
+    header = jwt.get_unverified_header(token)
+    if header.get("alg") not in ["HS256"] + ASYMMETRIC_ALGORITHMS:
+        raise jwt.InvalidAlgorithmError(f"Unsupported token algorithm {header.get('alg')}")
+    key, algorithms, rotated = signing_keys.get(header)
+    claims = jwt.decode(
+        token,
+        key,
+        algorithms=algorithms,
+        audience=SUPABASE_JWT_AUDIENCE,
+        options={"require": ["exp", "sub"]},
+    )
+    return claims, rotated
+
+def identity_ttl(claims):
+    """Cache verified identities no longer than the token itself is valid"""
+    if claims and claims.get("exp"):
+        return min(AUTH_TOKEN_CACHE_TTL, claims["exp"] - time.time())
+    return AUTH_TOKEN_CACHE_TTL
@@ -0,0 +1,162 @@
+"""
+Reproducible synthetic resumes and profiles for benchmarks.
+
+synthetic_corpus() returns raw `resumes` and `profiles` rows shaped like the
+Supabase tables (base64 float32 embeddings, ISO dates). Served through
+FakePostgrestServer, they go through the real load_resumes() join and
+normalization, so benchmarks see the same resume dicts production does.
+HashingEncoder is a deterministic stand-in for the SentenceTransformer, so
+timings don't depend on model downloads and runs are repeatable.
+"""
+
+import base64
+import random
+import re
+import zlib
+import numpy as np
+
+EMBEDDING_DIM = 384
+
+SKILLS = [
+    'Python', 'Django', 'Flask', 'FastAPI', 'JavaScript', 'TypeScript', 'React', 'Angular', 'Vue.js',
+    'Node.js', 'Java', 'Spring Boot', 'Kotlin', 'Go', 'Rust', 'C++', 'C#', '.NET', 'PHP', 'Laravel',
+    'SQL', 'PostgreSQL', 'MySQL', 'MongoDB', 'Redis', 'Elasticsearch', 'Kafka', 'RabbitMQ', 'Docker',
+    'Kubernetes', 'Terraform', 'AWS', 'Azure', 'GCP', 'Linux', 'Git', 'CI/CD', 'REST APIs', 'GraphQL',
+    'Machine Learning', 'Deep Learning', 'PyTorch', 'TensorFlow', 'scikit-learn', 'Pandas', 'NumPy',
+    'NLP', 'Computer Vision', 'Data Analysis', 'Power BI', 'Tableau', 'Excel', 'Figma', 'UI/UX Design',
+    'Agile', 'Scrum', 'Project Management', 'Communication', 'Leadership', 'Technical Writing',
+]
+
+POSITIONS = [
+    'Software Engineer', 'Backend Developer', 'Frontend Developer', 'Full Stack Developer',
+    'Data Scientist', 'Data Engineer', 'DevOps Engineer', 'Machine Learning Engineer',
+    'Mobile Developer', 'QA Engineer', 'Product Designer', 'Project Manager', 'Intern',
+]
+
+COMPANIES = [
+    'Vermeg', 'Sofrecom', 'Telnet', 'Focus Corporation', 'InstaDeep', 'Expensya', 'Talan',
+    'Capgemini', 'Sopra Steria', 'Orange', 'Ooredoo', 'Deloitte', 'Acme Corp', 'Globex',
+]
+
+DEGREES = [
+    "Bachelor's Degree in Computer Science", "Master's Degree in Software Engineering",
+    "Engineering Degree in Computer Science", "Master's Degree in Data Science",
+    "Bachelor's Degree in Information Systems", "PhD in Artificial Intelligence", "Diploma in Networking",
+]
+
+INSTITUTIONS = ['ESPRIT', 'INSAT', 'ENIT', 'ISIMM', 'FST', 'ENSI', 'University of Monastir', 'SUP\'COM']
+
+LANGUAGES = ['English', 'French', 'Arabic', 'German', 'Spanish', 'Italian']
+
+CERTIFICATIONS = [
+    'AWS Certified Developer', 'AWS Certified Solutions Architect', 'Azure Fundamentals',
+    'Google Cloud Associate Engineer', 'Certified Kubernetes Administrator', 'Oracle Java SE',
+    'PMP', 'Scrum Master (PSM I)', 'CCNA', 'TOEIC', 'DELF B2',
+]
+
+FIRST_NAMES = ['Amine', 'Sarra', 'Youssef', 'Mariem', 'Omar', 'Ines', 'Hamza', 'Nour', 'Karim', 'Salma', 'Ali', 'Rania']
+LAST_NAMES = ['Ben Salah', 'Trabelsi', 'Gharbi', 'Jaziri', 'Mansour', 'Haddad', 'Bouzid', 'Chaabane', 'Mejri', 'Khelifi']
+CITIES = ['Monastir', 'Sousse', 'Tunis', 'Sfax', 'Nabeul', 'Bizerte']
+
+JOB_DESCRIPTION = (
+    "We are hiring a Senior Backend Engineer with 5+ years of experience in Python and Django. "
+    "Experience in PostgreSQL, Redis, Docker and Kubernetes on AWS is required, and knowledge of "
+    "REST APIs, CI/CD and Kafka is a plus. A Bachelor's degree in Computer Science is required. "
+    "AWS Certified Developer certification preferred. Fluent English and French."
+)
+
+class HashingEncoder:
+    """Deterministic SentenceTransformer stand-in: hashed bag of words, L2-normalized"""
+
+    def __init__(self, dim=EMBEDDING_DIM):
+        self.dim = dim
+
+    def _encode_one(self, text):
+        vector = np.zeros(self.dim, dtype='float32')
+        for token in re.findall(r'\w+', (text or '').lower()):
+            bucket = zlib.crc32(token.encode('utf-8'))
+            vector[bucket % self.dim] += 1.0 if bucket & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, texts, batch_size=None, **kwargs):
+        if isinstance(texts, str):
+            return self._encode_one(texts)
+        return np.stack([self._encode_one(text) for text in texts]) if texts else np.zeros((0, self.dim), dtype='float32')
+
+def _uuid(rng):
+    return '%08x-%04x-%04x-%04x-%012x' % (
+        rng.getrandbits(32), rng.getrandbits(16), rng.getrandbits(16), rng.getrandbits(16), rng.getrandbits(48)
+    )
+
+def _date(rng, start_year, end_year):
+    return f"{rng.randint(start_year, end_year)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+def synthetic_profile(user_id, rng):
+    first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {
+        'id': user_id,
+        'first_name': first_name,
+        'last_name': last_name,
+        'email': f"{first_name}.{last_name}.{user_id[:6]}@example.com".lower().replace(' ', ''),
+        'phone': f"+216 {rng.randint(20, 99)} {rng.randint(100, 999)} {rng.randint(100, 999)}",
+        'address': f"{rng.choice(CITIES)}, Tunisia",
+    }
+
+def synthetic_resume(user_id, rng, embedding):
+    experience = []
+    year = rng.randint(2008, 2022)
+    for _ in range(rng.randint(0, 4)):
+        end_year = min(year + rng.randint(1, 4), 2025)
+        current = end_year >= 2025
+        skills = rng.sample(SKILLS, 3)
+        experience.append({
+            'position': rng.choice(POSITIONS),
+            'company': rng.choice(COMPANIES),
+            'description': f"Built and maintained services using {', '.join(skills)}. "
+                           f"Worked with the team on design reviews, testing and production support.",
+            'start_date': _date(rng, year, year),
+            'end_date': None if current else _date(rng, end_year, end_year),
+        })
+        year = end_year
+
+    education = [{
+        'degree': rng.choice(DEGREES),
+        'institution': rng.choice(INSTITUTIONS),
+        'start_date': _date(rng, 2005, 2018),
+        'end_date': _date(rng, 2009, 2022),
+    } for _ in range(rng.randint(0, 2))]
+
+    created_at = f"{_date(rng, 2023, 2024)}T{rng.randint(0, 23):02d}:00:00+00:00"
+    return {
+        'id': _uuid(rng),
+        'user_id': user_id,
+        'skills': rng.sample(SKILLS, rng.randint(3, 15)),
+        'experience': experience,
+        'education': education,
+        'languages': rng.sample(LANGUAGES, rng.randint(1, 3)),
+        'certifications': rng.sample(CERTIFICATIONS, rng.randint(0, 3)),
+        'embedding': base64.b64encode(embedding.tobytes()).decode('utf-8'),
+        'created_at': created_at,
+        'updated_at': created_at,
+    }
+
+def synthetic_corpus(count, seed=42, dim=EMBEDDING_DIM):
+    """
+    Generate count resume rows and their owners' profile rows.
+
+    Returns:
+        tuple: (resume_rows, profile_rows) - identical for the same (count, seed, dim)
+    """
+    rng = random.Random(seed)
+    embeddings = np.random.default_rng(seed).standard_normal((count, dim), dtype='float32')
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    resumes, profiles = [], []
+    for i in range(count):
+        user_id = _uuid(rng)
+        # A few candidates never completed their profile
+        if rng.random() > 0.05:
+            profiles.append(synthetic_profile(user_id, rng))
+        resumes.append(synthetic_resume(user_id, rng, embeddings[i]))
+    return resumes, profiles
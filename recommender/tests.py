@@ -1,3 +1,1502 @@
-from django.test import TestCase
+import base64
+import http.client
+import io
+import json
+import logging
+import multiprocessing
+import os
+import pstats
+import tempfile
+import threading
+import time
+import uuid
+from datetime import timedelta
+from unittest import mock
+import numpy as np
+from django.contrib.auth.models import AnonymousUser
+from django.core import signing
+from django.core.cache import cache
+from django.core.handlers.base import BaseHandler
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+import spacy
+from PyPDF2 import PdfWriter
+import httpx
+from django.http import HttpResponse
+from . import async_views, auth_views, ingestion, jobs, llm_metrics, llm_recommender, logging_handlers, memory, pdf_utils, profiles, profiling, ranking, supabase_client, supabase_jwt, utils, views
+from .coalescing import SingleFlight, coalesce
+from .conditional import etag_matches, make_etag, not_modified
+from .fake_openrouter import FakeOpenRouterConfig, FakeOpenRouterServer
+from .fake_postgrest import FakePostgrestConfig, FakePostgrestServer, _apply_order, _matches, _parse_filters, _parse_list
+from .feedback import InvalidFeedback, job_description_hash, parse_feedback_events
+from .llm_metrics import LLMBudgetExceeded, check_token_budget, tokens_used_today, track_llm_usage
+from .logging_handlers import AsyncFileHandler, SamplingFilter, TruncatingFormatter
+from .middleware import CompressionMiddleware, SupabaseAuthentication, request_user_id
+from .models import RecommendationJob, User
+from .pdf_cache import DiskLRUCache
+from .ranking import CURSOR_SALT, InvalidCursor, decode_cursor, encode_cursor, next_cursor
+from .renderers import ORJSONRenderer
+from .serializers import parse_fields_param, project_recommendation
+from .supabase_client import InstrumentedTransport, TableLatencyStore, _table_from_path, get_supabase_client
+from .supabase_jwt import SigningKeyCache, SigningKeyUnavailable, TTLCache
+from .synthetic import EMBEDDING_DIM, HashingEncoder, synthetic_corpus
+from .timing import Histogram, record_span, span, stage_histograms, track_timings
 
-# Create your tests here.
+def _resumes(count, dim=EMBEDDING_DIM):
+    """Decoded resumes as load_resumes() returns them"""
+    embeddings = np.random.default_rng(0).standard_normal((count, dim)).astype('float32')
+    return [{
+        'id': f'00000000-0000-0000-0000-{i:012d}',
+        'user_id': f'10000000-0000-0000-0000-{i:012d}',
+        'name': f'Candidate {i}',
+        'skills': ['Python', 'Django'] if i % 2 else ['Go', 'Kubernetes'],
+        'experience': [{'title': 'Engineer', 'company': 'Acme', 'years': 2 + i}],
+        'education': [{'degree': "Bachelor's Degree", 'institution': 'State University'}],
+        'languages': ['English'],
+        'certifications': [],
+        'embedding': embeddings[i],
+    } for i in range(count)]
+
+def _requirements(text):
+    """extract_keywords_and_requirements() without a spaCy model"""
+    return {'skills': ['python'], 'years_experience': 2, 'education_level': 'none', 'education_mentioned': False,
+            'education_terms': [], 'languages': [], 'certifications': [], 'full_text': text}
+
+def _usage(total_tokens):
+    return {'prompt_tokens': total_tokens - 100, 'completion_tokens': 100, 'latency': 0.01, 'retries': 0, 'error': False}
+
+def _evaluation(job_desc, resume_text, model_name):
+    return {'score': 80, 'reasoning': 'ok', 'strengths': [], 'weaknesses': []}, _usage(12879)
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class LLMTokenBudgetTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        llm_recommender._evaluation_cache.clear()
+        patcher = mock.patch.object(llm_metrics, 'LLM_DAILY_TOKEN_BUDGET', 1000)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_request_user_id_prefers_supabase_user(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        self.assertIsNone(request_user_id(request))
+        request.supabase_user = User(id=7)
+        self.assertEqual(request_user_id(request), 7)
+        self.assertEqual(request_user_id(request, session=False), 7)
+
+    def test_reservation_blocks_concurrent_overshoot(self):
+        with track_llm_usage(7) as tracker:
+            self.assertEqual(check_token_budget(600), 600)
+            # The first reservation is visible before its call has finished
+            with self.assertRaises(LLMBudgetExceeded):
+                check_token_budget(600)
+        self.assertTrue(tracker.budget_exceeded)
+        self.assertEqual(tokens_used_today(7), 600)
+
+    def test_budget_blocks_supabase_authenticated_user(self):
+        encoder = HashingEncoder()
+        user = User(id=42)
+        with mock.patch.object(SupabaseAuthentication, 'authenticate', return_value=(user, None)), \
+                mock.patch.object(views, 'load_resumes', lambda: _resumes(1)), \
+                mock.patch.object(utils, 'get_sentence_transformer', lambda: encoder), \
+                mock.patch.object(utils, 'get_job_embedding', encoder.encode), \
+                mock.patch.object(views, 'get_corpus_version', lambda: 'test'), \
+                mock.patch.object(llm_recommender, 'ROUTER_API_KEY', 'test'), \
+                mock.patch.object(llm_recommender, 'evaluate_with_llm', side_effect=_evaluation) as evaluate:
+            def recommend(job_description):
+                response = self.client.post('/recommend/llm/', {
+                    'job_description': job_description, 'recommendation_type': 'llm_only', 'top_n': 1,
+                }, content_type='application/json', HTTP_AUTHORIZATION='Bearer token')
+                self.assertEqual(response.status_code, 200)
+                return json.loads(response['X-LLM-Usage'])
+
+            first = recommend("Python developer")
+            self.assertFalse(first['budget_exceeded'])
+            self.assertEqual(tokens_used_today(42), 12879)
+
+            calls = evaluate.call_count
+            second = recommend("Go developer")
+            self.assertTrue(second['budget_exceeded'])
+            self.assertEqual(evaluate.call_count, calls)
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class RankingCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        encoder = HashingEncoder()
+        for patcher in (
+            mock.patch.object(utils, 'get_sentence_transformer', lambda: encoder),
+            mock.patch.object(utils, 'get_job_embedding', encoder.encode),
+            mock.patch.object(utils, 'extract_keywords_and_requirements', _requirements),
+            mock.patch.object(views, 'get_corpus_version', lambda: 'test'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def recommend(self, **headers):
+        return self.client.post('/recommend/', {'job_description': "Python developer", 'top_n': 2},
+                                content_type='application/json', **headers)
+
+    def test_failed_load_is_not_cached(self):
+        with mock.patch.object(views, 'load_resumes', lambda: []):
+            failed = self.recommend()
+        self.assertEqual(failed.status_code, 200)
+        self.assertEqual(failed.json(), [])
+        self.assertFalse(failed.has_header('ETag'))
+
+        with mock.patch.object(views, 'load_resumes', lambda: _resumes(3)):
+            recovered = self.recommend()
+        self.assertEqual(len(recovered.json()), 2)
+        self.assertTrue(recovered.has_header('ETag'))
+        self.assertTrue(recovered.has_header('X-Next-Cursor'))
+        self.assertEqual(self.recommend(HTTP_IF_NONE_MATCH=recovered['ETag']).status_code, 304)
+
+    def test_next_page_validates_top_n(self):
+        with mock.patch.object(views, 'load_resumes', lambda: _resumes(3)):
+            cursor = self.recommend()['X-Next-Cursor']
+        for top_n in ('abc', 0, -1, [2]):
+            with self.subTest(top_n=top_n):
+                response = self.client.post('/recommend/', {'cursor': cursor, 'top_n': top_n},
+                                            content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+
+        with mock.patch.object(views, 'load_resumes_by_ids', lambda ids: {resume['id']: resume for resume in _resumes(3)}):
+            response = self.client.post('/recommend/', {'cursor': cursor, 'top_n': '1'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class LLMRecommendCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        llm_recommender._evaluation_cache.clear()
+        encoder = HashingEncoder()
+        for patcher in (
+            mock.patch.object(utils, 'get_sentence_transformer', lambda: encoder),
+            mock.patch.object(utils, 'get_job_embedding', encoder.encode),
+            mock.patch.object(views, 'get_corpus_version', lambda: 'test'),
+            mock.patch.object(llm_recommender, 'ROUTER_API_KEY', 'test'),
+            mock.patch.object(llm_recommender, 'evaluate_with_llm', side_effect=_evaluation),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def recommend(self):
+        response = self.client.post('/recommend/llm/', {
+            'job_description': "Python developer", 'recommendation_type': 'llm_only', 'top_n': 2,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_failed_load_is_not_coalesced_into_later_requests(self):
+        with mock.patch.object(views, 'load_resumes', lambda: []):
+            self.assertEqual(self.recommend(), [])
+        with mock.patch.object(views, 'load_resumes', lambda: _resumes(2)):
+            self.assertEqual(len(self.recommend()), 2)
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class AsyncRecommendTests(SimpleTestCase):
+    def setUp(self):
+        encoder = HashingEncoder()
+        for patcher in (
+            mock.patch.object(utils, 'get_sentence_transformer', lambda: encoder),
+            mock.patch.object(utils, 'get_job_embedding', encoder.encode),
+            mock.patch.object(async_views, 'get_job_embedding', encoder.encode),
+            mock.patch.object(utils, 'extract_keywords_and_requirements', _requirements),
+            mock.patch.object(async_views, 'load_resumes', lambda: _resumes(5)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def recommend(self, top_n):
+        return self.client.post('/recommend/async/', {'job_description': "Python developer", 'top_n': top_n},
+                                content_type='application/json')
+
+    def test_top_n_is_parsed_like_the_sync_view(self):
+        response = self.recommend("3")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 3)
+        for top_n in ("three", 0, [3], True):
+            with self.subTest(top_n=top_n):
+                self.assertEqual(self.recommend(top_n).status_code, 400)
+
+    @override_settings(DEBUG=True)
+    def test_middleware_runs_natively_under_asgi(self):
+        # With DEBUG on, Django logs each sync/async adaptation it has to insert into the chain
+        with self.assertNoLogs('django.request', logging.DEBUG):
+            BaseHandler().load_middleware(is_async=True)
+
+    async def test_async_request_through_async_middleware(self):
+        response = await self.async_client.post('/recommend/async/', {'job_description': "Python developer", 'top_n': 2},
+                                                content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+class _RecordingExecutor:
+    """Stands in for the job pool; records what would have run"""
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append(args[0])
+
+class RecommendationJobTests(TestCase):
+    def setUp(self):
+        jobs._scheduled.clear()
+        self.executor = _RecordingExecutor()
+
+    def _job(self, **fields):
+        return RecommendationJob.objects.create(job_description="Python developer", **fields)
+
+    def _stale(self):
+        return timezone.now() - timedelta(seconds=jobs.RECOMMENDATION_JOB_STALE_SECONDS + 1)
+
+    def test_claim_is_exclusive(self):
+        job = self._job()
+        self.assertTrue(jobs._claim(job.id))
+        self.assertFalse(jobs._claim(job.id))
+        job.refresh_from_db()
+        self.assertEqual(job.status, RecommendationJob.STATUS_RUNNING)
+        self.assertIsNotNone(job.heartbeat_at)
+
+    def test_recovery_requeues_stale_jobs_only(self):
+        stale = self._job(status=RecommendationJob.STATUS_RUNNING, heartbeat_at=self._stale(), attempts=1)
+        alive = self._job(status=RecommendationJob.STATUS_RUNNING, heartbeat_at=timezone.now(), attempts=1)
+        exhausted = self._job(status=RecommendationJob.STATUS_RUNNING, heartbeat_at=self._stale(),
+                              attempts=jobs.RECOMMENDATION_JOB_MAX_ATTEMPTS)
+        waiting = self._job()
+
+        jobs.recover_jobs(self.executor)
+        statuses = dict(RecommendationJob.objects.values_list('id', 'status'))
+        self.assertEqual(statuses[stale.id], RecommendationJob.STATUS_QUEUED)
+        self.assertEqual(statuses[alive.id], RecommendationJob.STATUS_RUNNING)
+        self.assertEqual(statuses[exhausted.id], RecommendationJob.STATUS_FAILED)
+        self.assertCountEqual(self.executor.submitted, [stale.id, waiting.id])
+
+        # Jobs already waiting in this process aren't submitted twice
+        jobs.recover_jobs(self.executor)
+        self.assertEqual(len(self.executor.submitted), 2)
+
+    def test_recovery_is_rate_limited(self):
+        with mock.patch.object(jobs, 'recover_jobs') as recover, mock.patch.object(jobs, '_last_recovery', None):
+            jobs._maybe_recover(self.executor)
+            jobs._maybe_recover(self.executor)
+        self.assertEqual(recover.call_count, 1)
+
+    def test_corpus_load_failure_is_retried(self):
+        job = self._job()
+        with mock.patch.object(utils, 'load_resumes', side_effect=ConnectionError("Supabase unreachable")):
+            self.assertTrue(jobs.run_job(job.id))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (RecommendationJob.STATUS_QUEUED, 1))
+            self.assertIn("Supabase unreachable", job.error)
+
+            self.assertFalse(jobs.run_job(job.id))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (RecommendationJob.STATUS_FAILED, 2))
+
+    def test_llm_failure_degrades_to_placeholders(self):
+        job = self._job(recommendation_type="llm_only", top_n=2)
+        with mock.patch.object(utils, 'load_resumes', lambda **kwargs: _resumes(3)), \
+                mock.patch.object(llm_recommender, 'recommend_resumes_llm', side_effect=RuntimeError("LLM down")):
+            self.assertFalse(jobs.run_job(job.id))
+        job.refresh_from_db()
+        self.assertEqual(job.status, RecommendationJob.STATUS_SUCCEEDED)
+        self.assertEqual(len(job.results), 2)
+
+    @override_settings(ALLOWED_HOSTS=['*'])
+    def test_submission_validates_top_n(self):
+        with mock.patch.object(views, 'submit_job') as submit:
+            for top_n in ('abc', 0, -3):
+                with self.subTest(top_n=top_n):
+                    response = self.client.post('/recommend/jobs/', {'job_description': "Python developer", 'top_n': top_n},
+                                                content_type='application/json')
+                    self.assertEqual(response.status_code, 400)
+        submit.assert_not_called()
+
+class SigningKeyCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.keys = SigningKeyCache(jwks_url='https://example.supabase.co/auth/v1/.well-known/jwks.json')
+        self.fetch = mock.Mock(return_value=[mock.Mock(key_id='kid-1', key='public-key', algorithm_name='ES256')])
+        self.keys._jwk_client = mock.Mock(get_signing_keys=self.fetch)
+
+    def test_known_kid_is_fetched_once(self):
+        self.assertEqual(self.keys.get({'alg': 'ES256', 'kid': 'kid-1'}), ('public-key', ['ES256'], True))
+        self.assertEqual(self.keys.get({'alg': 'ES256', 'kid': 'kid-1'}), ('public-key', ['ES256'], False))
+        self.assertEqual(self.fetch.call_count, 1)
+
+    def test_unknown_kids_are_rate_limited(self):
+        for index in range(20):
+            with self.assertRaises(SigningKeyUnavailable):
+                self.keys.get({'alg': 'ES256', 'kid': f'forged-{index}'})
+        with self.assertRaises(SigningKeyUnavailable):
+            self.keys.get({'alg': 'ES256'})
+        self.assertEqual(self.fetch.call_count, 1)
+
+        self.keys._last_refresh -= self.keys.refresh_interval
+        with self.assertRaises(SigningKeyUnavailable):
+            self.keys.get({'alg': 'ES256', 'kid': 'forged-0'})
+        self.assertEqual(self.fetch.call_count, 1)
+        with self.assertRaises(SigningKeyUnavailable):
+            self.keys.get({'alg': 'ES256', 'kid': 'forged-20'})
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_hs256_without_secret_skips_jwks(self):
+        with self.assertRaises(SigningKeyUnavailable):
+            self.keys.get({'alg': 'HS256', 'kid': 'kid-1'})
+        self.fetch.assert_not_called()
+
+class TTLCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(supabase_jwt, 'time', mock.Mock(time=lambda: self.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_entries_expire_individually(self):
+        keys = TTLCache(max_size=10)
+        keys.set('short', 1, ttl=5)
+        keys.set('long', 2, ttl=60)
+        keys.set('never', 3, ttl=0)
+        self.now += 10
+        self.assertIsNone(keys.get('short'))
+        self.assertEqual(keys.get('long'), 2)
+        self.assertIsNone(keys.get('never'))
+
+    def test_least_recently_used_is_evicted(self):
+        keys = TTLCache(max_size=2)
+        keys.set('a', 1, ttl=60)
+        keys.set('b', 2, ttl=60)
+        keys.get('a')
+        keys.set('c', 3, ttl=60)
+        self.assertEqual((keys.get('a'), keys.get('b'), keys.get('c')), (1, None, 3))
+        keys.pop('a')
+        self.assertIsNone(keys.get('a'))
+        keys.clear()
+        self.assertIsNone(keys.get('c'))
+
+class ParseFeedbackEventsTests(SimpleTestCase):
+    def test_shared_job_description_and_values(self):
+        events = parse_feedback_events({
+            'job_description': "Python developer",
+            'events': [
+                {'resume_id': 'a', 'feedback': 'Up', 'score': '0.75'},
+                {'resume_id': 'b', 'feedback': False, 'job_description': "Go developer"},
+                {'resume_id': 'c', 'feedback': -1},
+            ],
+        }, user_id=42)
+        self.assertEqual([event['feedback'] for event in events], [1, 0, 0])
+        self.assertEqual([event['job_description'] for event in events],
+                         ["Python developer", "Go developer", "Python developer"])
+        self.assertEqual(events[0]['score'], 0.75)
+        self.assertIsNone(events[1]['score'])
+        self.assertEqual({event['user_id'] for event in events}, {'42'})
+
+    def test_single_event_and_list(self):
+        event = {'resume_id': 'a', 'job_description': "Python developer", 'feedback': 1}
+        self.assertEqual(len(parse_feedback_events(event)), 1)
+        self.assertEqual(len(parse_feedback_events([event, event])), 2)
+
+    def test_invalid_payloads(self):
+        base = {'resume_id': 'a', 'job_description': "Python developer", 'feedback': 1}
+        for payload in (
+            [], 'up', [1],
+            {**base, 'feedback': [1]},
+            {**base, 'feedback': {'value': 1}},
+            {**base, 'feedback': 1.5},
+            {**base, 'feedback': 'maybe'},
+            {**base, 'score': 'nan'},
+            {**base, 'score': 'inf'},
+            {**base, 'score': [0.5]},
+            {**base, 'resume_id': ''},
+            {**base, 'job_description': ''},
+        ):
+            with self.subTest(payload=payload), self.assertRaises(InvalidFeedback):
+                parse_feedback_events(payload)
+
+    @override_settings(ALLOWED_HOSTS=['*'])
+    def test_feedback_api_records_supabase_user(self):
+        with mock.patch.object(SupabaseAuthentication, 'authenticate', return_value=(User(id=42), None)), \
+                mock.patch.object(views, 'record_feedback', return_value=(1, 0)) as record:
+            response = self.client.post('/recommend/feedback/', {
+                'resume_id': 'a', 'job_description': "Python developer", 'feedback': 'up',
+            }, content_type='application/json', HTTP_AUTHORIZATION='Bearer token')
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(record.call_args.args[0][0]['user_id'], '42')
+
+            response = self.client.post('/recommend/feedback/', {
+                'resume_id': 'a', 'job_description': "Python developer", 'feedback': [1],
+            }, content_type='application/json', HTTP_AUTHORIZATION='Bearer token')
+            self.assertEqual(response.status_code, 400)
+
+    def test_job_description_hash_ignores_formatting(self):
+        self.assertEqual(job_description_hash("Python  developer\n"), job_description_hash("python developer"))
+
+def _blank_pdf(pages):
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=612, height=792)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+class PDFExtractionTests(SimpleTestCase):
+    def tearDown(self):
+        if pdf_utils._pool is not None:
+            pdf_utils._terminate_pool(pdf_utils._pool)
+
+    def test_extracts_in_worker_process(self):
+        self.assertEqual(pdf_utils.extract_text_from_bytes(_blank_pdf(2)), "")
+        with self.assertRaises(pdf_utils.PDFTooLarge):
+            pdf_utils.extract_text_from_bytes(_blank_pdf(pdf_utils.PDF_MAX_PAGES + 1))
+
+    def test_timeout_kills_the_worker(self):
+        pool = pdf_utils._get_pool()
+        started = time.monotonic()
+        with self.assertRaises(pdf_utils.PDFExtractionTimeout):
+            pdf_utils._run_in_pool([(time.sleep, (30,))], time.monotonic() + 0.5)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(multiprocessing.active_children(), [])
+        self.assertIsNot(pdf_utils._get_pool(), pool)
+
+class CoalescingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_duplicates_share_one_call(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return 'ranking'
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do('job', compute)))
+        leader.start()
+        while 'job' not in flight._calls:
+            time.sleep(0.001)
+        followers = [threading.Thread(target=lambda: results.append(flight.do('job', compute))) for _ in range(4)]
+        for thread in followers:
+            thread.start()
+        # Followers only find the call while it's in flight, so give them time to start waiting
+        time.sleep(0.2)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [('ranking', False)] + [('ranking', True)] * 4)
+        self.assertEqual(flight._calls, {})
+
+    def test_errors_reach_waiters_and_are_not_remembered(self):
+        flight = SingleFlight()
+        with self.assertRaises(ValueError):
+            flight.do('job', mock.Mock(side_effect=ValueError("corpus unavailable")))
+        self.assertEqual(flight.do('job', lambda: 'retried'), ('retried', False))
+
+    def test_waiter_gives_up_and_computes_independently(self):
+        flight = SingleFlight()
+        flight._calls['job'] = stuck = mock.Mock()
+        stuck.done.wait.return_value = False
+        self.assertEqual(flight.do('job', lambda: 'own', timeout=0.01), ('own', False))
+
+    def test_only_cacheable_results_outlive_the_call(self):
+        compute = mock.Mock(return_value=([], False))
+        self.assertEqual(coalesce('degraded', compute), ([], False))
+        self.assertEqual(coalesce('degraded', compute), ([], False))
+        self.assertEqual(compute.call_count, 2)
+
+        compute = mock.Mock(return_value=(['a', 'b'], True))
+        self.assertEqual(coalesce('complete', compute), (['a', 'b'], False))
+        self.assertEqual(coalesce('complete', compute), (['a', 'b'], True))
+        self.assertEqual(compute.call_count, 1)
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        cursor = encode_cursor('ranking-key', 20, 10, ['score', 'name'])
+        self.assertEqual(decode_cursor(cursor), ('ranking-key', 20, 10, {'name', 'score'}))
+        self.assertEqual(decode_cursor(encode_cursor('ranking-key', 0, 5)), ('ranking-key', 0, 5, None))
+
+    def test_rejects_tampered_and_foreign_cursors(self):
+        cursor = encode_cursor('ranking-key', 20, 10)
+        tampered = cursor[:-1] + ('A' if cursor[-1] != 'A' else 'B')
+        for bad in (tampered, 'not-a-cursor', '',
+                    signing.dumps({'k': 'ranking-key', 'o': 20, 'n': 10, 'f': None}),
+                    signing.dumps({'k': 'ranking-key'}, salt=CURSOR_SALT),
+                    signing.dumps({'k': 'ranking-key', 'o': 'ten', 'n': 10, 'f': None}, salt=CURSOR_SALT)):
+            with self.subTest(cursor=bad), self.assertRaises(InvalidCursor):
+                decode_cursor(bad)
+
+    def test_next_cursor_stops_at_the_end(self):
+        ranking = [('id', 0.5)] * 25
+        self.assertEqual(decode_cursor(next_cursor('k', ranking, 10, 10))[:3], ('k', 20, 10))
+        self.assertIsNone(next_cursor('k', ranking, 20, 10))
+
+class FuseHybridScoresTests(SimpleTestCase):
+    def test_weights_llm_scores_and_scales_unevaluated_ones(self):
+        nlp_scores = {'a': {'score': 0.9}, 'b': {'score': 0.5}, 'c': {'score': 0.2}}
+        fused = dict(llm_recommender.fuse_hybrid_scores(nlp_scores, {'b': {'score': 1.0}}, top_n=3))
+        self.assertAlmostEqual(fused['a'], 0.9)
+        self.assertAlmostEqual(fused['b'], 0.4 * 0.5 + 0.6 * 1.0)
+        self.assertAlmostEqual(fused['c'], 0.2)
+
+    def test_keeps_best_top_n_in_order(self):
+        nlp_scores = {key: {'score': score} for key, score in zip('abcde', (0.1, 0.9, 0.3, 0.7, 0.5))}
+        fused = llm_recommender.fuse_hybrid_scores(nlp_scores, {'a': {'score': 1.0}}, top_n=3,
+                                                   nlp_weight=0.5, llm_weight=0.5)
+        self.assertEqual([key for key, _ in fused], ['b', 'd', 'a'])
+        self.assertEqual(len(llm_recommender.fuse_hybrid_scores(nlp_scores, {}, top_n=10)), 5)
+
+class DiskLRUCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = DiskLRUCache(directory.name, max_bytes=10)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.set('a', 'aaaa')
+        self.cache.set('b', 'bbbb')
+        os.utime(self.cache._path('a'), (1, 1))
+        os.utime(self.cache._path('b'), (2, 2))
+        # A hit makes 'a' the most recently used entry
+        self.assertEqual(self.cache.get('a'), 'aaaa')
+        self.cache.set('c', 'cccc')
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual((self.cache.get('a'), self.cache.get('c')), ('aaaa', 'cccc'))
+        self.assertEqual(self.cache._size, 8)
+
+    def test_skips_entries_larger_than_the_cache(self):
+        self.cache.set('big', 'x' * 11)
+        self.assertIsNone(self.cache.get('big'))
+
+class FakePostgrestTests(SimpleTestCase):
+    def setUp(self):
+        resumes, profiles = synthetic_corpus(5, seed=1, dim=8)
+        self.server = FakePostgrestServer(('127.0.0.1', 0), FakePostgrestConfig(latency_mean=0),
+                                          {'resumes': resumes, 'profiles': profiles})
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.client = get_supabase_client(self.server.url, 'test', scope='test')
+        for name, value in (('get_supabase_client', lambda: self.client), ('get_nlp', lambda: spacy.blank('en'))):
+            patcher = mock.patch.object(utils, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_load_resumes_pages_through_the_server(self):
+        resumes = utils.load_resumes(page_size=2, raise_errors=True)
+        self.assertEqual([resume['id'] for resume in resumes],
+                         sorted(row['id'] for row in self.server.tables['resumes'].rows))
+        self.assertEqual(resumes[0]['embedding'].shape, (8,))
+
+    def test_writes_invalidate_the_cached_order(self):
+        first = utils.load_resumes(page_size=2, raise_errors=True)[0]['id']
+        self.client.table('resumes').delete().eq('id', first).execute()
+        self.assertNotIn(first, [resume['id'] for resume in utils.load_resumes(page_size=2, raise_errors=True)])
+        self.assertEqual(self.server.counters['resumes']['errors'], 0)
+
+def _long_resume(**fields):
+    return {
+        'id': 'resume-1',
+        'updated_at': '2026-01-01T00:00:00Z',
+        'name': 'Ada Lovelace',
+        'experience': [{'position': f'Engineer {i}', 'company': f'Company {i}',
+                        'description': f'Built system number {i}. ' * 4} for i in range(6)],
+        'skills': [f'skill-{i}' for i in range(12)],
+        **fields,
+    }
+
+def _keyword_encoder(keyword):
+    """SentenceTransformer stand-in: texts containing keyword point one way, everything else the other"""
+    def encode(texts, **kwargs):
+        return np.array([[1.0, 0.0] if keyword in text else [0.0, 1.0] for text in texts], dtype='float32')
+    return mock.Mock(encode=mock.Mock(side_effect=encode))
+
+class PromptBudgetTests(SimpleTestCase):
+    def setUp(self):
+        llm_recommender._format_cache.clear()
+        llm_recommender._section_embedding_cache.clear()
+
+    def test_truncation_prefers_a_sentence_boundary(self):
+        text = "First sentence here. " * 50
+        self.assertEqual(llm_recommender.truncate_to_token_budget(text, 1000), text)
+        truncated = llm_recommender.truncate_to_token_budget(text, 20)
+        self.assertTrue(truncated.endswith("here. [...]"))
+        self.assertLessEqual(llm_recommender.estimate_tokens(truncated), 20)
+
+    def test_later_entries_are_dropped_first_without_a_job_embedding(self):
+        text = llm_recommender.format_resume_for_llm(_long_resume(), token_budget=60)
+        self.assertLessEqual(llm_recommender.estimate_tokens(text), 60)
+        self.assertIn("Engineer 0 at Company 0", text)
+        self.assertNotIn("Engineer 5", text)
+        self.assertIn("skill-0", text)
+        self.assertNotIn("skill-11", text)
+
+    def test_entries_relevant_to_the_job_are_kept(self):
+        with mock.patch.object(utils, 'get_sentence_transformer', lambda: _keyword_encoder('Engineer 3')):
+            text = llm_recommender.format_resume_for_llm(_long_resume(), np.array([1.0, 0.0]), token_budget=60)
+        self.assertIn("Engineer 3 at Company 3", text)
+        self.assertNotIn("Engineer 0 at", text)
+
+    def test_formatted_text_is_cached_per_resume_version(self):
+        encoder = _keyword_encoder('Engineer 3')
+        job_embedding = np.array([1.0, 0.0])
+        with mock.patch.object(utils, 'get_sentence_transformer', lambda: encoder):
+            first = llm_recommender.format_resume_for_llm(_long_resume(), job_embedding, token_budget=60)
+            self.assertEqual(llm_recommender.format_resume_for_llm(_long_resume(), job_embedding, token_budget=60), first)
+            self.assertEqual(encoder.encode.call_count, 1)
+            llm_recommender.format_resume_for_llm(_long_resume(updated_at='2026-02-01T00:00:00Z'), job_embedding,
+                                                  token_budget=60)
+        # The new version is formatted again, but its sections were already embedded
+        self.assertEqual(encoder.encode.call_count, 1)
+
+    def test_sections_are_encoded_once_in_one_batch(self):
+        encoder = _keyword_encoder('Engineer 3')
+        with mock.patch.object(utils, 'get_sentence_transformer', lambda: encoder):
+            llm_recommender.format_resume_for_llm(_long_resume(), np.array([1.0, 0.0]), token_budget=60)
+            self.assertEqual(len(encoder.encode.call_args.args[0]), 6 + 12)
+            self.assertEqual(encoder.encode.call_args.kwargs['batch_size'], 6 + 12)
+
+            # Another job reuses every section embedding; an edited resume encodes only what changed
+            llm_recommender.format_resume_for_llm(_long_resume(), np.array([0.0, 1.0]), token_budget=60)
+            self.assertEqual(encoder.encode.call_count, 1)
+            edited = _long_resume(updated_at='2026-02-01T00:00:00Z', skills=[f'skill-{i}' for i in range(11)] + ['rust'])
+            llm_recommender.format_resume_for_llm(edited, np.array([0.0, 1.0]), token_budget=60)
+        self.assertEqual(encoder.encode.call_args.args[0], ['rust'])
+
+    def test_cached_job_embedding_is_read_only(self):
+        utils.get_job_embedding.cache_clear()
+        self.addCleanup(utils.get_job_embedding.cache_clear)
+        with mock.patch.object(utils, 'get_sentence_transformer', lambda: mock.Mock(encode=lambda text: np.ones(3))):
+            embedding = utils.get_job_embedding("Python developer")
+        self.assertIs(utils.get_job_embedding("Python developer"), embedding)
+        with self.assertRaises(ValueError):
+            embedding[0] = 0.0
+
+def _nlp_scores(**scores):
+    return {key: {'score': score, 'match_reasons': [f"reason {key}"], 'score_components': {}}
+            for key, score in scores.items()}
+
+class HybridRecommendTests(SimpleTestCase):
+    def test_llm_results_are_matched_back_by_resume(self):
+        resumes = [{'id': key, 'name': f"Candidate {key}"} for key in 'abcd']
+        nlp_scores = _nlp_scores(a=0.9, b=0.6, c=0.5, d=0.1)
+
+        def evaluate(job_desc, candidates, top_n=5, model_name=None, **kwargs):
+            # Only c and d get an LLM verdict; the rest behave like failed evaluations
+            return [{'resume': resume, 'score': 1.0, 'reasoning': f"LLM on {resume['id']}"}
+                    for resume in candidates if resume['id'] in 'cd']
+
+        with mock.patch.object(llm_recommender, 'recommend_resumes_llm', side_effect=evaluate):
+            results = llm_recommender.hybrid_recommend_resumes("Python developer", resumes, top_n=3,
+                                                               nlp_scores=nlp_scores)
+
+        self.assertEqual([result['resume']['id'] for result in results], ['a', 'c', 'd'])
+        self.assertAlmostEqual(results[1]['score'], 0.4 * 0.5 + 0.6)
+        self.assertEqual(results[1]['llm_reasoning'], "LLM on c")
+        self.assertEqual(results[0]['llm_reasoning'], "Not evaluated by LLM")
+        self.assertEqual(results[0]['resume']['match_reasons'], ["reason a"])
+        self.assertNotIn('score', resumes[0])
+
+    def test_materialize_copies_only_the_top_n(self):
+        resumes = [{'id': key} for key in 'abc']
+        results = utils.materialize_recommendations(_nlp_scores(a=0.2, b=0.8, c=0.5), resumes, top_n=2)
+        self.assertEqual([(result['id'], result['score']) for result in results], [('b', 0.8), ('c', 0.5)])
+        self.assertEqual(resumes[1], {'id': 'b'})
+
+class FakeOpenRouterTests(SimpleTestCase):
+    def serve(self, **options):
+        server = FakeOpenRouterServer(('127.0.0.1', 0), FakeOpenRouterConfig(latency_dist='fixed', latency_mean=0, seed=0, **options))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def complete(self, server):
+        connection = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+        self.addCleanup(connection.close)
+        body = json.dumps({'model': 'test-model', 'messages': [{'role': 'user', 'content': 'x' * 400}]})
+        connection.request('POST', '/api/v1/chat/completions', body, {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        return response, json.loads(response.read())
+
+    def test_completion_carries_an_evaluation_and_usage(self):
+        server = self.serve()
+        response, payload = self.complete(server)
+        self.assertEqual(response.status, 200)
+        evaluation = json.loads(payload['choices'][0]['message']['content'])
+        self.assertTrue(0 <= evaluation['score'] <= 100)
+        self.assertEqual(payload['model'], 'test-model')
+        self.assertEqual(payload['usage']['prompt_tokens'], 100)
+        self.assertEqual(server.counters['requests'], 1)
+
+    def test_injected_failures(self):
+        response, _ = self.complete(self.serve(rate_limit_rate=1.0, retry_after=7))
+        self.assertEqual((response.status, response.getheader('Retry-After')), (429, '7'))
+
+        response, _ = self.complete(self.serve(error_rate=1.0))
+        self.assertEqual(response.status, 500)
+
+        server = self.serve(malformed_rate=1.0)
+        response, payload = self.complete(server)
+        self.assertEqual(response.status, 200)
+        with self.assertRaises(ValueError):
+            json.loads(payload['choices'][0]['message']['content'])
+        self.assertEqual(server.counters['malformed'], 1)
+
+    def test_latency_distributions(self):
+        with self.assertRaises(ValueError):
+            FakeOpenRouterConfig(latency_dist='pareto')
+        config = FakeOpenRouterConfig(latency_dist='lognormal', latency_mean=1.0, latency_stddev=0.5, seed=0)
+        samples = [config.sample_latency() for _ in range(2000)]
+        self.assertTrue(all(sample >= 0 for sample in samples))
+        self.assertAlmostEqual(sum(samples) / len(samples), 1.0, delta=0.1)
+
+class PayloadProjectionTests(SimpleTestCase):
+    def test_parse_fields_param(self):
+        self.assertEqual(parse_fields_param("id, score,,name"), {'id', 'score', 'name'})
+        self.assertEqual(parse_fields_param(['id', ' embedding ']), {'id', 'embedding'})
+        for empty in (None, '', ' , ', []):
+            with self.subTest(value=empty):
+                self.assertIsNone(parse_fields_param(empty))
+
+    def test_default_projection_drops_internal_fields(self):
+        item = {'id': 'a', 'name': 'Ada', 'score': 0.9, 'embedding': np.zeros(3), 'embedding_text': 'ada python',
+                'created_at': '2026-01-01'}
+        self.assertEqual(project_recommendation(item), {'id': 'a', 'name': 'Ada', 'score': 0.9})
+        self.assertEqual(set(project_recommendation(item, {'id', 'embedding'})), {'id', 'embedding'})
+
+    def test_nested_hybrid_resume_is_projected(self):
+        item = {'score': 0.8, 'llm_score': 90, 'resume': {'id': 'a', 'name': 'Ada', 'score': 0.7, 'embedding': [0.1]}}
+        self.assertEqual(project_recommendation(item),
+                         {'score': 0.8, 'llm_score': 90, 'resume': {'id': 'a', 'name': 'Ada'}})
+        self.assertEqual(project_recommendation(item, {'score', 'id'}), {'score': 0.8, 'resume': {'id': 'a'}})
+
+    def test_orjson_renderer_serializes_numpy_values(self):
+        job_id = uuid.UUID(int=1)
+        rendered = ORJSONRenderer().render({
+            'id': job_id, 'score': np.float32(0.5), 'count': np.int64(3), 'embedding': np.arange(3, dtype='float32'),
+        })
+        self.assertEqual(json.loads(rendered), {'id': str(job_id), 'score': 0.5, 'count': 3, 'embedding': [0.0, 1.0, 2.0]})
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+class SupabaseClientTests(SimpleTestCase):
+    def test_clients_are_shared_per_credentials_and_scope(self):
+        client = get_supabase_client('https://pool.supabase.co', 'key', scope='test')
+        self.assertIs(get_supabase_client('https://pool.supabase.co', 'key', scope='test'), client)
+        self.assertIsNot(get_supabase_client('https://pool.supabase.co', 'key', scope='auth-test'), client)
+        self.assertIsNot(get_supabase_client('https://pool.supabase.co', 'other-key', scope='test'), client)
+
+    def test_clients_are_created_on_first_use(self):
+        # No module builds a client at import time; callers go through the factories
+        self.assertFalse(hasattr(supabase_client, 'supabase'))
+        self.assertFalse(hasattr(utils, 'supabase'))
+        with mock.patch.object(supabase_client, 'create_client') as create, \
+                mock.patch.dict(supabase_client._clients, clear=True):
+            create.assert_not_called()
+            client = supabase_client.get_auth_client()
+            self.assertIs(supabase_client.get_auth_client(), client)
+        create.assert_called_once()
+
+    def test_table_from_path(self):
+        self.assertEqual(_table_from_path('/rest/v1/resumes'), 'resumes')
+        self.assertEqual(_table_from_path('/rest/v1/profiles/extra'), 'profiles')
+        self.assertEqual(_table_from_path('/auth/v1/user'), 'auth')
+        self.assertEqual(_table_from_path('/'), 'root')
+
+    def test_transport_records_latency_and_errors_per_table(self):
+        store = TableLatencyStore()
+
+        def handler(request):
+            if request.url.path.endswith('/boom'):
+                raise httpx.ConnectError("refused", request=request)
+            return httpx.Response(500 if 'profiles' in request.url.path else 200, json=[])
+
+        client = httpx.Client(transport=InstrumentedTransport(httpx.MockTransport(handler), store))
+        self.addCleanup(client.close)
+        client.get('https://example.supabase.co/rest/v1/resumes')
+        client.get('https://example.supabase.co/rest/v1/resumes')
+        client.post('https://example.supabase.co/rest/v1/profiles')
+        with self.assertRaises(httpx.ConnectError):
+            client.get('https://example.supabase.co/rest/v1/boom')
+
+        tables = store.snapshot()['tables']
+        self.assertEqual((tables['resumes']['queries'], tables['resumes']['errors']), (2, 0))
+        self.assertEqual((tables['profiles']['errors'], tables['profiles']['methods']), (1, ['POST']))
+        self.assertEqual(tables['boom']['errors'], 1)
+
+    def test_snapshot_window_and_percentiles(self):
+        store = TableLatencyStore(window_seconds=60)
+        with mock.patch.object(supabase_client, 'time', mock.Mock(time=lambda: 1000.0)):
+            store.add('resumes', 'GET', 5.0)
+        with mock.patch.object(supabase_client, 'time', mock.Mock(time=lambda: 1100.0)):
+            for latency in range(1, 101):
+                store.add('resumes', 'GET', latency / 100)
+            stats = store.snapshot()['tables']['resumes']
+        self.assertEqual(stats['queries'], 100)
+        self.assertEqual((stats['latency_p50'], stats['latency_p99']), (0.51, 1.0))
+        self.assertAlmostEqual(stats['latency_mean'], 0.505)
+
+class _FakeSupabase:
+    """Just enough of the Supabase query builder for the reads under test; records each query"""
+    def __init__(self, tables):
+        self.tables = tables
+        self.queries = []
+
+    def table(self, name):
+        return _FakeQuery(self, name)
+
+class _FakeQuery:
+    def __init__(self, client, table):
+        self.client, self.table, self.columns, self.filters, self.order_by, self.bounds = client, table, '*', [], None, None
+
+    def select(self, columns):
+        self.columns = columns
+        return self
+
+    def in_(self, column, values):
+        self.filters.append((column, set(map(str, values))))
+        return self
+
+    def order(self, column):
+        self.order_by = column
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def execute(self):
+        self.client.queries.append(self)
+        rows = [row for row in self.client.tables[self.table]
+                if all(str(row.get(column)) in values for column, values in self.filters)]
+        if self.order_by:
+            rows.sort(key=lambda row: row[self.order_by])
+        if self.bounds:
+            rows = rows[self.bounds[0]:self.bounds[1] + 1]
+        if self.columns != '*':
+            rows = [{key: row.get(key) for key in self.columns.split(',')} for row in rows]
+        return mock.Mock(data=[dict(row) for row in rows])
+
+class ProfileCardTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.supabase = _FakeSupabase({
+            'profiles': [{'id': 'u1', 'name': 'Ada'}, {'id': 'u2', 'name': 'Grace'}],
+            'resumes': [{'id': 'r1', 'user_id': 'u1', 'skills': ['Python'], 'embedding': 'AAAA'}],
+        })
+        patcher = mock.patch.object(profiles, 'get_supabase_client', lambda: self.supabase)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_misses_are_fetched_with_one_query_per_table(self):
+        cards = profiles.get_profile_cards(['u1', 'u2', 'u3', 'u1'])
+        self.assertEqual(list(cards), ['u1', 'u2', 'u3'])
+        self.assertEqual([query.table for query in self.supabase.queries], ['profiles', 'resumes'])
+        self.assertEqual(cards['u1']['profile']['name'], 'Ada')
+        self.assertEqual(cards['u1']['resume']['skills'], ['Python'])
+        self.assertNotIn('embedding', cards['u1']['resume'])
+        self.assertIsNone(cards['u2']['resume'])
+        self.assertEqual(cards['u3'], {'profile': None, 'resume': None})
+
+    def test_cards_and_misses_are_cached_until_invalidated(self):
+        profiles.get_profile_cards(['u1', 'u3'])
+        self.assertEqual(profiles.get_profile_cards(['u3', 'u1'])['u1']['profile']['name'], 'Ada')
+        self.assertEqual(len(self.supabase.queries), 2)
+
+        self.supabase.tables['profiles'][0]['name'] = 'Ada Lovelace'
+        profiles.invalidate_profile('u1')
+        self.assertEqual(profiles.get_profile_cards(['u1', 'u3'])['u1']['profile']['name'], 'Ada Lovelace')
+        self.assertEqual([query.filters for query in self.supabase.queries[2:]], [[('id', {'u1'})], [('user_id', {'u1'})]])
+
+    @override_settings(ALLOWED_HOSTS=['*'])
+    def test_sign_up_drops_the_cached_empty_card(self):
+        self.assertIsNone(profiles.get_profile_cards(['u9'])['u9']['profile'])
+
+        auth = mock.Mock()
+        auth.auth.sign_up.return_value = mock.Mock(user=mock.Mock(id='u9'))
+        auth.table.return_value.upsert.return_value.execute.return_value = mock.Mock(error=None)
+        self.supabase.tables['profiles'].append({'id': 'u9', 'name': 'Katherine'})
+        with mock.patch.object(auth_views, 'get_auth_client', lambda: auth):
+            response = self.client.post('/auth/signup/', {'email': 'k@example.com', 'password': 'secret'},
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(profiles.get_profile_cards(['u9'])['u9']['profile']['name'], 'Katherine')
+
+class PagedResumeLoadTests(SimpleTestCase):
+    def setUp(self):
+        embedding = base64.b64encode(np.arange(4, dtype='float32').tobytes()).decode()
+        self.supabase = _FakeSupabase({
+            'resumes': [{'id': f'r{i}', 'user_id': f'u{i}', 'skills': ['Python'], 'embedding': embedding,
+                         'created_at': '2026-01-01'} for i in range(5)],
+            'profiles': [{'id': f'u{i}', 'first_name': 'Ada', 'last_name': str(i), 'email': f'{i}@example.com'}
+                         for i in range(4)],
+        })
+        for name, value in (('get_supabase_client', lambda: self.supabase), ('get_nlp', lambda: spacy.blank('en'))):
+            patcher = mock.patch.object(utils, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def queries(self, table):
+        return [query for query in self.supabase.queries if query.table == table]
+
+    def test_resumes_are_loaded_page_by_page(self):
+        resumes = utils.load_resumes(page_size=2)
+        self.assertEqual([resume['id'] for resume in resumes], [f'r{i}' for i in range(5)])
+        self.assertEqual([query.bounds for query in self.queries('resumes')], [(0, 1), (2, 3), (4, 5)])
+        self.assertEqual({query.order_by for query in self.queries('resumes')}, {'id'})
+        # One profile lookup per page, for that page's owners only
+        self.assertEqual([query.filters for query in self.queries('profiles')],
+                         [[('id', {'u0', 'u1'})], [('id', {'u2', 'u3'})], [('id', {'u4'})]])
+
+        self.assertEqual(resumes[1]['name'], 'Ada 1')
+        self.assertEqual(resumes[4]['name'], 'Candidate u4')
+        np.testing.assert_array_equal(resumes[0]['embedding'], np.arange(4, dtype='float32'))
+        self.assertIn('Technical Skills: Python', resumes[0]['embedding_text'])
+
+    def test_only_the_requested_columns_are_selected(self):
+        resumes = utils.load_resumes(columns=utils.RESUME_DISPLAY_COLUMNS)
+        self.assertEqual(self.queries('resumes')[0].columns, ','.join(utils.RESUME_DISPLAY_COLUMNS))
+        self.assertEqual(self.queries('profiles')[0].columns, ','.join(utils.PROFILE_JOIN_COLUMNS))
+        self.assertNotIn('embedding', resumes[0])
+        self.assertEqual(resumes[0]['created_at'], '2026-01-01')
+
+    def test_profile_lookups_are_chunked(self):
+        with mock.patch.object(utils, 'PROFILE_LOOKUP_CHUNK_SIZE', 2):
+            utils.load_resumes(page_size=10)
+        self.assertEqual([len(query.filters[0][1]) for query in self.queries('profiles')], [2, 2, 1])
+
+def _ones(texts, **kwargs):
+    """SentenceTransformer.encode stand-in"""
+    return np.ones(384, dtype='float32') if isinstance(texts, str) else np.ones((len(texts), 384), dtype='float32')
+
+class ConditionalRequestTests(SimpleTestCase):
+    def request(self, if_none_match):
+        return RequestFactory().get('/', HTTP_IF_NONE_MATCH=if_none_match)
+
+    def test_make_etag_depends_on_every_part(self):
+        self.assertEqual(make_etag('key', 0, 5, None), make_etag('key', 0, 5, None))
+        self.assertNotEqual(make_etag('key', 0, 5, None), make_etag('key', 5, 5, None))
+        self.assertNotEqual(make_etag('key', 0, 5, None), make_etag('key', 0, 5, ['score']))
+
+    def test_weak_and_wildcard_matches(self):
+        etag = make_etag('key')
+        self.assertTrue(etag_matches(self.request(etag), etag))
+        # GZipMiddleware weakens the ETag it sends out
+        self.assertTrue(etag_matches(self.request(f'W/{etag}'), etag))
+        self.assertTrue(etag_matches(self.request(f'"other", {etag}'), etag))
+        self.assertTrue(etag_matches(self.request('*'), etag))
+        self.assertFalse(etag_matches(self.request('"other"'), etag))
+        self.assertFalse(etag_matches(RequestFactory().get('/'), etag))
+
+        response = not_modified(etag)
+        self.assertEqual((response.status_code, response['ETag'], response['Cache-Control']),
+                         (304, etag, 'private, no-cache'))
+
+    def test_compression_threshold(self):
+        middleware = CompressionMiddleware(lambda request: None)
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        small = middleware.process_response(request, HttpResponse('x' * 100))
+        self.assertFalse(small.has_header('Content-Encoding'))
+        large = middleware.process_response(request, HttpResponse('x' * 5000))
+        self.assertEqual(large['Content-Encoding'], 'gzip')
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class RecommendETagTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.corpus_version = 'v1'
+        self.load_resumes = mock.Mock(return_value=_resumes(4))
+        for patcher in (
+            mock.patch.object(utils, 'get_sentence_transformer', lambda: mock.Mock(encode=_ones)),
+            mock.patch.object(utils, 'get_job_embedding', _ones),
+            mock.patch.object(utils, 'extract_keywords_and_requirements', _requirements),
+            mock.patch.object(views, 'get_corpus_version', lambda: self.corpus_version),
+            mock.patch.object(views, 'load_resumes', self.load_resumes),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def recommend(self, **headers):
+        return self.client.post('/recommend/', {'job_description': "Python developer", 'top_n': 2},
+                                content_type='application/json', **headers)
+
+    def test_unchanged_corpus_is_not_modified(self):
+        first = self.recommend()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['Cache-Control'], 'private, no-cache')
+
+        repeat = self.recommend(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat.content, b'')
+        self.assertEqual(self.load_resumes.call_count, 1)
+
+        self.corpus_version = 'v2'
+        changed = self.recommend(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+
+    def test_profile_etag_covers_the_card(self):
+        card = {'profile': {'id': 'u1', 'first_name': 'Ada'}, 'resume': None}
+        with mock.patch.object(views, 'get_profile_cards', lambda user_ids: {'u1': card}):
+            first = self.client.get('/profile/u1/')
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(self.client.get('/profile/u1/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+            card['profile']['first_name'] = 'Grace'
+            self.assertEqual(self.client.get('/profile/u1/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+    def test_no_etag_without_a_corpus_version(self):
+        self.corpus_version = None
+        response = self.recommend(HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+        with mock.patch.object(views, 'load_resumes_by_ids', lambda ids: {resume['id']: resume for resume in _resumes(4)}):
+            self.assertEqual(self.recommend(HTTP_IF_NONE_MATCH='*').status_code, 200)
+
+        card = {'profile': {'id': 'u1', 'first_name': 'Ada'}, 'resume': None}
+        with mock.patch.object(views, 'get_profile_cards', lambda user_ids: {'u1': card}):
+            response = self.client.get('/profile/u1/', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+RESUME_TEXT = "Senior  Python developer\x00 with Django and PostgreSQL experience.\n\n" * 3
+
+class IngestionPipelineTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.client = mock.Mock()
+        texts = {b'resume-a': RESUME_TEXT, b'resume-b': RESUME_TEXT.upper(), b'short': "Too short"}
+
+        def extract(data):
+            if data not in texts:
+                raise ValueError("not a PDF")
+            return texts[data], False
+
+        self.encoder = mock.Mock(encode=mock.Mock(side_effect=_ones))
+        for name, value in (
+            ('extract_text_from_bytes_cached', extract),
+            ('extract_keywords_and_requirements', _requirements),
+            ('enhance_resume_embedding', lambda resume: "Technical Skills: " + ", ".join(resume['skills'])),
+            ('get_sentence_transformer', lambda: self.encoder),
+        ):
+            patcher = mock.patch.object(ingestion, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write(self, name, data):
+        path = os.path.join(self.directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def upserted(self):
+        return [row for call in self.client.table.return_value.upsert.call_args_list for row in call.args[0]]
+
+    def test_failures_and_duplicates_are_reported_per_file(self):
+        self.write('a.pdf', b'resume-a')
+        self.write('nested/a-copy.PDF', b'resume-a')
+        self.write('b.pdf', b'resume-b')
+        self.write('broken.pdf', b'garbage')
+        self.write('short.pdf', b'short')
+        self.write('notes.txt', b'resume-a')
+
+        report = ingestion.ingest_pdfs(self.directory, user_id='u1', client=self.client, encode_batch_size=1)
+        self.assertEqual((report['files'], report['ingested'], report['duplicates'], report['failed']), (5, 2, 1, 2))
+        self.assertEqual({(failure['file'], failure['stage']) for failure in report['failures']},
+                         {('broken.pdf', 'extract'), ('short.pdf', 'normalize')})
+        self.assertEqual([stage['stage'] for stage in report['stages']], ['read', 'extract', 'normalize', 'encode', 'upsert'])
+        self.assertEqual(report['stages'][3]['processed'], 2)
+
+        rows = self.upserted()
+        self.assertEqual({row['user_id'] for row in rows}, {'u1'})
+        self.assertEqual(rows[0]['skills'], ['python'])
+        self.assertTrue(all(row['embedding'] for row in rows))
+
+    def test_ids_are_stable_across_runs(self):
+        self.write('a.pdf', b'resume-a')
+        ingestion.ingest_pdfs(self.directory, client=self.client)
+        ingestion.ingest_pdfs(self.directory, client=self.client)
+        first, second = self.upserted()
+        self.assertEqual(first['id'], second['id'])
+
+    def test_encode_failure_fails_the_batch(self):
+        self.write('a.pdf', b'resume-a')
+        self.write('b.pdf', b'resume-b')
+        self.encoder.encode.side_effect = RuntimeError("model unavailable")
+        report = ingestion.ingest_pdfs(self.directory, client=self.client)
+        self.assertEqual((report['ingested'], report['failed']), (0, 2))
+        self.assertEqual({failure['stage'] for failure in report['failures']}, {'encode'})
+        self.client.table.assert_not_called()
+
+    def test_dry_run_does_not_write(self):
+        self.write('a.pdf', b'resume-a')
+        report = ingestion.ingest_pdfs(self.directory, client=self.client, dry_run=True)
+        self.assertEqual(report['ingested'], 1)
+        self.client.table.assert_not_called()
+
+    def test_upsert_invalidates_the_owners_card(self):
+        self.write('a.pdf', b'resume-a')
+        with mock.patch.object(ingestion, 'invalidate_profile') as invalidate:
+            ingestion.ingest_pdfs(self.directory, user_id='u1', client=self.client, dry_run=True)
+            invalidate.assert_not_called()
+            ingestion.ingest_pdfs(self.directory, user_id='u1', client=self.client)
+        invalidate.assert_called_once_with('u1')
+
+    def test_normalize_resume_text(self):
+        self.assertEqual(ingestion.normalize_resume_text("  Ｐython\x07  dev \n\n\t\n Django  "), "Python dev\nDjango")
+
+class PostgrestFilterTests(SimpleTestCase):
+    def test_parse_filters(self):
+        params = [('select', 'id,name'), ('id', 'eq.1'), ('name', 'not.is.null'), ('skills', 'in.(a,"b,c")'),
+                  ('order', 'id'), ('limit', '5')]
+        self.assertEqual(_parse_filters(params), [
+            ('id', 'eq', '1', False), ('name', 'is', 'null', True), ('skills', 'in', '(a,"b,c")', False),
+        ])
+        self.assertEqual(list(_parse_list('(a,"b,c",d)')), ['a', 'b,c', 'd'])
+        self.assertEqual(list(_parse_list('()')), [])
+
+    def test_matches(self):
+        row = {'years': 5, 'active': True, 'name': None, 'id': 'r1'}
+        self.assertTrue(_matches(row, 'years', 'gt', '3'))
+        self.assertFalse(_matches(row, 'years', 'lte', '4'))
+        self.assertTrue(_matches(row, 'years', 'eq', '5'))
+        self.assertTrue(_matches(row, 'active', 'eq', 'true'))
+        self.assertTrue(_matches(row, 'name', 'is', 'null'))
+        self.assertFalse(_matches(row, 'name', 'eq', 'null'))
+        self.assertTrue(_matches(row, 'id', 'in', '(r1,r2)'))
+        self.assertFalse(_matches(row, 'id', 'neq', 'r1'))
+
+    def test_apply_order(self):
+        rows = [{'id': 1, 'score': 0.5}, {'id': 2, 'score': None}, {'id': 3, 'score': 0.9}, {'id': 4, 'score': 0.5}]
+        self.assertEqual([row['id'] for row in _apply_order(rows, 'score.desc,id.desc')], [2, 3, 4, 1])
+        self.assertEqual([row['id'] for row in _apply_order(rows, 'score.asc.nullsfirst,id')], [2, 1, 4, 3])
+        self.assertEqual([row['id'] for row in _apply_order(rows, 'score,id')], [1, 4, 3, 2])
+
+class FakePostgrestServerTests(SimpleTestCase):
+    def setUp(self):
+        rows = [{'id': f'r{i}', 'user_id': f'u{i % 2}', 'years': i} for i in range(6)]
+        self.server = FakePostgrestServer(('127.0.0.1', 0), FakePostgrestConfig(latency_mean=0), {'resumes': rows})
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.client = get_supabase_client(self.server.url, 'test', scope='fake-postgrest')
+
+    def test_select_filter_order_and_count(self):
+        response = self.client.table('resumes').select('id,years', count='exact') \
+            .eq('user_id', 'u1').gte('years', 2).order('years', desc=True).range(0, 0).execute()
+        self.assertEqual(response.data, [{'id': 'r5', 'years': 5}])
+        self.assertEqual(response.count, 2)
+
+        single = self.client.table('resumes').select('id').eq('id', 'r3').single().execute()
+        self.assertEqual(single.data, {'id': 'r3'})
+
+    def test_writes(self):
+        table = self.client.table('resumes')
+        table.insert({'id': 'r9', 'user_id': 'u9', 'years': 1}).execute()
+        table.upsert({'id': 'r9', 'years': 7}).execute()
+        table.update({'user_id': 'u8'}).eq('id', 'r9').execute()
+        self.assertEqual(table.select('*').eq('id', 'r9').execute().data, [{'id': 'r9', 'user_id': 'u8', 'years': 7}])
+        self.assertEqual(self.server.counters['resumes']['errors'], 0)
+
+class TimingTests(SimpleTestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+        for seconds in (0.005, 0.05, 0.1, 5.0):
+            histogram.observe(('rank',), seconds)
+        series = histogram.snapshot()[('rank',)]
+        self.assertEqual(series['buckets'], [(0.01, 1), (0.1, 3), (1.0, 3), (float('inf'), 4)])
+        self.assertEqual(series['count'], 4)
+        self.assertAlmostEqual(series['sum'], 5.155)
+
+    def test_spans_are_summed_per_request(self):
+        with track_timings() as timings:
+            with span('rank'):
+                pass
+            record_span('score_skill_match', 0.002)
+            record_span('score_skill_match', 0.003, count=2)
+        header = timings.server_timing()
+        self.assertRegex(header, r'^rank;dur=\d+\.\d, score_skill_match;dur=5\.0;desc="3 calls"$')
+
+        # Outside a request only the process-wide histogram sees the span
+        before = stage_histograms.snapshot().get(('materialize',), {'count': 0})['count']
+        record_span('materialize', 0.001)
+        self.assertEqual(stage_histograms.snapshot()[('materialize',)]['count'], before + 1)
+        self.assertEqual(timings.server_timing(), header)
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class MetricsViewTests(SimpleTestCase):
+    def test_prometheus_exposition(self):
+        record_span('rank', 0.02)
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE recommender_stage_duration_seconds histogram', body)
+        self.assertIn('recommender_stage_duration_seconds_bucket{stage="rank",le="+Inf"}', body)
+        self.assertIn('recommender_llm_api_calls ', body)
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+        # The scrape itself was recorded once the response had been sent
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('recommender_request_duration_seconds_count{view="metrics",method="GET",status="200"}', body)
+
+    def test_token_is_required_when_configured(self):
+        with mock.patch.object(views, 'METRICS_AUTH_TOKEN', 'secret'):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            self.assertEqual(self.client.get('/metrics', HTTP_X_METRICS_TOKEN='wrong').status_code, 401)
+            self.assertEqual(self.client.get('/metrics', HTTP_X_METRICS_TOKEN='secret').status_code, 200)
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class RequestProfilingTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        patcher = mock.patch.object(profiling, 'PROFILING_DIR', self.directory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_requested_mode(self):
+        factory = RequestFactory()
+        token = profiling.make_profile_token('deterministic')
+        self.assertEqual(profiling.requested_mode(factory.get('/', HTTP_X_PROFILE_REQUEST=token)), 'deterministic')
+        self.assertIsNone(profiling.requested_mode(factory.get('/', HTTP_X_PROFILE_REQUEST=token + 'x')))
+
+        request = factory.get('/recommend/', {'profile': '1'})
+        request.user = mock.Mock(is_staff=False)
+        self.assertIsNone(profiling.requested_mode(request))
+        request.supabase_user = mock.Mock(is_staff=True)
+        self.assertEqual(profiling.requested_mode(request), 'sample')
+
+        with mock.patch.object(profiling, 'PROFILING_SAMPLE_RATE', 1.0):
+            self.assertEqual(profiling.requested_mode(factory.post('/recommend/')), 'sample')
+            self.assertIsNone(profiling.requested_mode(factory.get('/metrics')))
+
+    def test_saved_profile_is_loadable(self):
+        profiler = profiling.RequestProfiler('sample')
+        profiler.sampler.interval = 0.001
+        profiler.start()
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            sum(range(1000))
+        profiler.stop()
+        profile_id = profiler.save(path='/recommend/')
+
+        stats = pstats.Stats(profiling.profile_path(profile_id, 'pstats'))
+        self.assertTrue(any(name == 'test_saved_profile_is_loadable' for _, _, name in stats.stats))
+        with open(profiling.profile_path(profile_id, 'collapsed')) as f:
+            line = f.readline()
+        self.assertRegex(line, r'test_saved_profile_is_loadable \(tests\.py:\d+\).* \d+$')
+
+    def test_profile_path_and_pruning(self):
+        for profile_id in ('a', 'b', 'c'):
+            for suffix in ('.json', '.pstats', '.collapsed'):
+                open(os.path.join(self.directory, profile_id + suffix), 'w').close()
+        profiling.prune_profiles(max_profiles=2)
+        self.assertEqual(sorted(os.listdir(self.directory))[:3], ['b.collapsed', 'b.json', 'b.pstats'])
+        self.assertIsNone(profiling.profile_path('a', 'json'))
+        self.assertIsNotNone(profiling.profile_path('c', 'json'))
+        self.assertIsNone(profiling.profile_path('../c', 'json'))
+        self.assertIsNone(profiling.profile_path('c', 'py'))
+
+    def test_middleware_returns_the_profile_id(self):
+        response = self.client.get('/metrics', HTTP_X_PROFILE_REQUEST=profiling.make_profile_token())
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(profiling.profile_path(response['X-Profile-Id'], 'json'))
+        self.assertFalse(self.client.get('/metrics').has_header('X-Profile-Id'))
+
+class MemoryGuardTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        llm_recommender._evaluation_cache.clear()
+        self.rss = 0
+        for patcher in (
+            mock.patch.object(memory, 'MEMORY_BUDGET_MB', 100),
+            mock.patch.object(memory, 'rss_bytes', lambda: self.rss),
+            mock.patch.dict(memory._state, {'pressure': 'ok', 'degraded': False, 'last_check': 0.0, 'last_action': None}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def check(self, fraction):
+        self.rss = int(fraction * 100 * 1024 * 1024)
+        return memory.check_memory_budget(force=True)
+
+    def test_thresholds_degrade_shed_and_recover(self):
+        for index in range(4):
+            llm_recommender._evaluation_cache[('job', f'resume {index}', 'model')] = {'score': 50}
+        ranking.get_ranking('ranking-key', lambda: ([{'id': 'a', 'score': 0.5}], True))
+        coalesce('result-key', lambda: ([{'id': 'a'}], True))
+        with mock.patch.object(profiles, 'get_supabase_client', lambda: _FakeSupabase({'profiles': [{'id': 'u1'}], 'resumes': []})):
+            profiles.get_profile_cards(['u1'])
+
+        self.assertEqual(self.check(0.5), 'ok')
+        self.assertEqual(memory.corpus_embedding_dtype(), 'float32')
+
+        self.assertEqual(self.check(0.85), 'soft')
+        self.assertEqual(memory.corpus_embedding_dtype(), 'float16')
+        self.assertEqual(len(llm_recommender._evaluation_cache), 2)
+        self.assertIsNotNone(ranking.get_cached_ranking('ranking-key'))
+        self.assertIsNotNone(cache.get('coalesced:result-key'))
+        self.assertIsNotNone(cache.get('profile_card:u1'))
+
+        self.assertEqual(self.check(0.95), 'hard')
+        self.assertEqual(len(llm_recommender._evaluation_cache), 0)
+        with self.assertRaises(ranking.RankingExpired):
+            ranking.get_cached_ranking('ranking-key')
+        self.assertIsNone(cache.get('coalesced:result-key'))
+        self.assertIsNone(cache.get('profile_card:u1'))
+
+        # Full precision only comes back well below the soft limit
+        self.assertEqual(self.check(0.7), 'ok')
+        self.assertEqual(memory.corpus_embedding_dtype(), 'float16')
+        self.check(0.6)
+        self.assertEqual(memory.corpus_embedding_dtype(), 'float32')
+        self.assertEqual(memory._state['last_action']['actions'], ["restored float32 corpus embeddings"])
+
+    def test_checks_are_rate_limited(self):
+        self.assertEqual(self.check(0.85), 'soft')
+        self.rss = 0
+        self.assertEqual(memory.check_memory_budget(), 'soft')
+        with mock.patch.object(memory, 'MEMORY_BUDGET_MB', 0):
+            self.assertEqual(memory.check_memory_budget(force=True), 'ok')
+
+    def test_degraded_corpus_is_decoded_as_float16(self):
+        memory._state['degraded'] = True
+        resume = {'id': 'r1', 'embedding': base64.b64encode(np.arange(4, dtype='float32').tobytes()).decode()}
+        utils._normalize_resume(resume)
+        self.assertEqual(resume['embedding'].dtype, np.float16)
+
+    def test_report_attributes_the_corpus(self):
+        memory.record_corpus([{'id': str(index), 'embedding': np.zeros(384, dtype='float32')} for index in range(10)])
+        report = memory.memory_report()
+        self.assertEqual(report['budget_bytes'], 100 * 1024 * 1024)
+        corpus = report['components']['corpus']
+        self.assertEqual(corpus['resumes'], 10)
+        self.assertGreaterEqual(corpus['bytes'], 10 * 384 * 4)
+        for component in ('sentence_transformer', 'spacy', 'llm_evaluation_cache', 'job_embedding_cache', 'rankings'):
+            self.assertIn(component, report['components'])
+
+def _record(msg, level=logging.INFO, args=None, **extra):
+    record = logging.LogRecord('recommender', level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+class LoggingHandlerTests(SimpleTestCase):
+    def test_sampling_by_event(self):
+        sampling = SamplingFilter(rates={'llm_call': 0.0, 'extracted_requirements': 0.25})
+        self.assertFalse(sampling.filter(_record({'event': 'llm_call', 'latency': 1.2})))
+        self.assertFalse(sampling.filter(_record("LLM call", event='llm_call')))
+        self.assertTrue(sampling.filter(_record({'event': 'llm_call'}, level=logging.WARNING)))
+        self.assertTrue(sampling.filter(_record("Loaded 10 resumes")))
+
+        with mock.patch.object(logging_handlers.random, 'random', side_effect=[0.1, 0.9]):
+            self.assertTrue(sampling.filter(_record({'event': 'extracted_requirements'})))
+            self.assertFalse(sampling.filter(_record({'event': 'extracted_requirements'})))
+
+    def test_long_messages_are_truncated(self):
+        formatter = TruncatingFormatter('{levelname} {message}', style='{', max_length=10)
+        record = _record("%s", args=("x" * 25,))
+        self.assertEqual(formatter.format(record), "INFO xxxxxxxxxx... [15 more chars]")
+        # The record itself is left alone for other handlers
+        self.assertEqual(record.getMessage(), "x" * 25)
+        self.assertEqual(formatter.format(_record("short")), "INFO short")
+
+    def test_async_handler_writes_in_the_background_and_drops_when_full(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'recommender.log')
+        handler = AsyncFileHandler(path, queue_size=1)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+
+        release = threading.Event()
+        write = handler.file_handler.handle
+        def slow_write(record):
+            release.wait(5)
+            return write(record)
+        handler.file_handler.handle = slow_write
+
+        for index in range(5):
+            handler.handle(_record({'event': 'llm_call', 'index': index}))
+        release.set()
+        handler.queue.join()
+        handler.close()
+
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertGreaterEqual(handler.dropped, 1)
+        self.assertEqual(len(lines) + handler.dropped, 5)
+        self.assertEqual(lines[0], "{'event': 'llm_call', 'index': 0}")
+
+class _FlatParse:
+    """Blank English pipeline with sentence boundaries and a flat parse, standing in for en_core_web_sm"""
+    def __init__(self):
+        self.nlp = spacy.blank('en')
+        self.nlp.add_pipe('sentencizer')
+
+    def _parse(self, doc):
+        for token in doc:
+            token.dep_ = 'dep'
+            token.lemma_ = token.lower_
+        return doc
+
+    def __call__(self, text):
+        return self._parse(self.nlp(text))
+
+    def pipe(self, texts, **kwargs):
+        return (self._parse(doc) for doc in self.nlp.pipe(texts, **kwargs))
+
+JOB_DESCRIPTIONS = [
+    "Backend engineer. Experience with Python, Django and PostgreSQL. 3+ years of experience. Bachelor degree required.",
+    "Platform engineer skilled in Go and Kubernetes. 5 years experience. AWS certification required.",
+]
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class BatchRecommendTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        encoder = HashingEncoder()
+        nlp = _FlatParse()
+        for patcher in (
+            mock.patch.object(utils, 'get_sentence_transformer', lambda: encoder),
+            mock.patch.object(utils, 'get_job_embedding', encoder.encode),
+            mock.patch.object(utils, 'get_nlp', lambda: nlp),
+            mock.patch.object(views, 'load_resumes', lambda: _resumes(6)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_batch_scores_match_single_job_scoring(self):
+        resumes = _resumes(6)
+        requirements = utils.extract_requirements_batch(JOB_DESCRIPTIONS)
+        self.assertEqual(requirements, [utils.extract_keywords_and_requirements(job_desc) for job_desc in JOB_DESCRIPTIONS])
+        self.assertIn('django', requirements[0]['skills'])
+
+        for job_desc, batch in zip(JOB_DESCRIPTIONS, utils.score_resumes_batch(JOB_DESCRIPTIONS, resumes)):
+            single = utils.score_resumes(job_desc, resumes)
+            self.assertEqual(batch.keys(), single.keys())
+            for key, entry in single.items():
+                self.assertAlmostEqual(batch[key]['score'], entry['score'], places=6)
+                self.assertEqual(batch[key]['match_reasons'], entry['match_reasons'])
+
+    def test_batch_endpoint(self):
+        response = self.client.post('/recommend/batch/', {
+            'jobs': [JOB_DESCRIPTIONS[0], {'id': 'platform', 'job_description': JOB_DESCRIPTIONS[1]}], 'top_n': 2,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(job['id'], len(job['results'])) for job in response.json()], [(0, 2), ('platform', 2)])
+        self.assertNotIn('embedding', response.json()[0]['results'][0])
+
+        for payload in ({'jobs': []}, {'jobs': "Python developer"}, {'jobs': [{'id': 'x'}]},
+                        {'jobs': ["Python developer"] * (views.BATCH_RECOMMEND_MAX_JOBS + 1)},
+                        {'jobs': ["Python developer"], 'top_n': 'abc'}, {'jobs': ["Python developer"], 'top_n': 0}):
+            with self.subTest(payload=str(payload)[:40]):
+                response = self.client.post('/recommend/batch/', payload, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,110 @@
+"""
+Lightweight per-stage timing for recommendation requests.
+
+Code wraps its stages in span("name") (or reports a pre-summed duration
+with record_span). Each duration is added to the process-wide
+stage_histograms, which /metrics serves in Prometheus format, and to the
+RequestTimings of the request currently being served, which
+ServerTimingMiddleware turns into a Server-Timing response header.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+
+# Upper bounds in seconds, Prometheus-style (an implicit +Inf bucket follows)
+TIMING_HISTOGRAM_BUCKETS = tuple(getattr(settings, "TIMING_HISTOGRAM_BUCKETS", (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)))
+
+class Histogram:
+    """Cumulative-bucket latency histogram, per label set"""
+
+    def __init__(self, buckets=TIMING_HISTOGRAM_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, seconds):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            series['counts'][bisect.bisect_left(self.buckets, seconds)] += 1
+            series['sum'] += seconds
+            series['count'] += 1
+
+    def snapshot(self):
+        """labels -> {'buckets': [(le, cumulative count)...], 'sum', 'count'}"""
+        with self._lock:
+            series = {labels: (list(s['counts']), s['sum'], s['count']) for labels, s in self._series.items()}
+        snapshot = {}
+        for labels, (counts, total, count) in series.items():
+            cumulative, running = [], 0
+            for le, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                running += bucket_count
+                cumulative.append((le, running))
+            snapshot[labels] = {'buckets': cumulative, 'sum': total, 'count': count}
+        return snapshot
+
+# Keyed by (stage,) and (view, method, status) respectively
+stage_histograms = Histogram()
+request_histograms = Histogram()
+
+class RequestTimings:
+    """Stage durations collected while serving one request; repeated stages are summed"""
+
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds, count=1):
+        with self._lock:
+            total, calls = self.stages.get(name, (0.0, 0))
+            self.stages[name] = (total + seconds, calls + count)
+
+    def server_timing(self):
+        """Server-Timing header value, durations in milliseconds"""
+        with self._lock:
+            stages = list(self.stages.items())
+        entries = []
+        for name, (seconds, calls) in stages:
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if calls > 1:
+                entry += f';desc="{calls} calls"'
+            entries.append(entry)
+        return ', '.join(entries)
+
+_current_timings = ContextVar('request_timings', default=None)
+
+@contextmanager
+def track_timings():
+    """Collect every span recorded inside the block into a fresh RequestTimings"""
+    timings = RequestTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+def current_timings():
+    return _current_timings.get()
+
+def record_span(name, seconds, count=1):
+    """Record a stage duration measured elsewhere (e.g. summed over a loop)"""
+    stage_histograms.observe((name,), seconds)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(name, seconds, count)
+
+@contextmanager
+def span(name):
+    """Time the block as stage `name`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - start)
@@ -1,15 +1,27 @@
 from django.urls import path
-from .views import RecommendAPI, ProfileAPI, GenerateEmbeddingAPI, LLMRecommendAPI, PDFResumeParseAPI, LandingPageView, TestRecommenderView
+from .views import RecommendAPI, RecommendBatchAPI, ProfileAPI, ProfileBatchAPI, GenerateEmbeddingAPI, LLMRecommendAPI, RecommendationJobsAPI, RecommendationJobAPI, FeedbackAPI, PDFResumeParseAPI, ResumeIngestAPI, MetricsView, RequestProfileAPI, MemoryReportAPI, LandingPageView, TestRecommenderView
+from .async_views import AsyncRecommendView, AsyncLLMRecommendView
 from .auth_views import SignUpView, LoginView
 
 urlpatterns = [
     path('', LandingPageView.as_view(), name='landing'),
     path('test/', TestRecommenderView.as_view(), name='test-recommender'),
     path('recommend/', RecommendAPI.as_view(), name='recommend-api'),
+    path('recommend/batch/', RecommendBatchAPI.as_view(), name='recommend-batch-api'),
     path('recommend/llm/', LLMRecommendAPI.as_view(), name='llm-recommend-api'),
+    path('recommend/jobs/', RecommendationJobsAPI.as_view(), name='recommendation-jobs'),
+    path('recommend/jobs/<uuid:job_id>/', RecommendationJobAPI.as_view(), name='recommendation-job'),
+    path('recommend/feedback/', FeedbackAPI.as_view(), name='recommendation-feedback'),
+    path('recommend/async/', AsyncRecommendView.as_view(), name='recommend-async'),
+    path('recommend/llm/async/', AsyncLLMRecommendView.as_view(), name='llm-recommend-async'),
     path('auth/signup/', SignUpView.as_view(), name='signup'),
     path('auth/login/', LoginView.as_view(), name='login'),
+    path('profiles/batch/', ProfileBatchAPI.as_view(), name='profile-batch-api'),
     path('profile/<str:user_id>/', ProfileAPI.as_view(), name='profile-api'),
     path('generate-embedding/', GenerateEmbeddingAPI.as_view(), name='generate-embedding'),
     path('parse-resume/', PDFResumeParseAPI.as_view(), name='parse-resume'),
+    path('ingest-resumes/', ResumeIngestAPI.as_view(), name='ingest-resumes'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    path('request-profiles/<str:profile_id>/', RequestProfileAPI.as_view(), name='request-profile'),
+    path('memory/', MemoryReportAPI.as_view(), name='memory-report'),
 ]
\ No newline at end of file
@@ -5,13 +5,16 @@ from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.feature_extraction.text import TfidfVectorizer
 from collections import defaultdict
+import heapq
 from functools import lru_cache
 import time
 import logging
 from django.core.cache import cache
 from multiprocessing import Pool
 from datetime import datetime
-from supabase import create_client
+from .supabase_client import get_supabase_client
+from .timing import record_span, span
+from .memory import corpus_embedding_dtype, measure_load, record_corpus
 from django.conf import settings
 import base64
 import re
@@ -28,17 +31,26 @@ def get_nlp():
     global _nlp
     if _nlp is None:
         import spacy
-        _nlp = spacy.load("en_core_web_sm")
+        with measure_load('spacy'):
+            _nlp = spacy.load("en_core_web_sm")
     return _nlp
 
 @lru_cache(maxsize=1)
 def get_sentence_transformer():
     """Instantiate SentenceTransformer once per process."""
-    model = SentenceTransformer("all-MiniLM-L6-v2", device="cpu")
+    with measure_load('sentence_transformer'):
+        model = SentenceTransformer("all-MiniLM-L6-v2", device="cpu")
     # Reduce memory usage
     model.max_seq_length = 128
     return model
 
+@lru_cache(maxsize=32)
+def get_job_embedding(job_desc):
+    """Encode a job description once so the NLP and LLM stages share the vector (read-only, as callers share it)."""
+    embedding = get_sentence_transformer().encode(job_desc)
+    embedding.setflags(write=False)
+    return embedding
+
 # Configuration - Adjust these weights based on importance
 WEIGHTS = {
     'similarity': 0.40,  # Increased weight for semantic similarity
@@ -51,10 +63,23 @@ WEIGHTS = {
 
 logger = logging.getLogger(__name__)
 
-# Initialize Supabase client
-supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+# Columns the NLP/LLM recommenders need; the top results are returned as-is
+RESUME_SCORING_COLUMNS = ('id', 'user_id', 'embedding', 'education', 'experience', 'skills', 'languages', 'certifications')
+
+# Columns shown on profile pages and candidate cards (no embedding)
+RESUME_DISPLAY_COLUMNS = ('id', 'user_id', 'education', 'experience', 'skills', 'languages', 'certifications', 'created_at', 'updated_at')
+
+PROFILE_JOIN_COLUMNS = ('id', 'first_name', 'last_name', 'email', 'phone', 'address')
+
+RESUME_PAGE_SIZE = getattr(settings, "RESUME_PAGE_SIZE", 500)
+
+# Ids per in_() filter; keeps profile lookup URLs well under proxy limits
+PROFILE_LOOKUP_CHUNK_SIZE = 200
 
-__all__ = ['load_resumes', 'enhance_resume_embedding', 'recommend_resumes']
+# How long a corpus version is trusted before Supabase is asked again
+CORPUS_VERSION_TTL = getattr(settings, "CORPUS_VERSION_TTL", 30)
+
+__all__ = ['load_resumes', 'load_resumes_by_ids', 'get_corpus_version', 'rank_scores', 'materialize_ranked', 'enhance_resume_embedding', 'recommend_resumes', 'recommend_resumes_batch', 'score_resumes', 'score_resumes_batch', 'materialize_recommendations']
 
 def enhance_resume_embedding(resume):
     """Generate embedding text with contextual emphasis"""
@@ -104,115 +129,207 @@ def enhance_resume_embedding(resume):
     # Final embedding text
     embedding_text = " ".join(sections)
     
-    logger.debug(f"Enhanced embedding text: {embedding_text[:500]}...")
+    logger.debug("Enhanced embedding text: %.500s...", embedding_text)
     return embedding_text
 
-def load_resumes():
-    """Load resumes from Supabase with enhanced embedding text"""
+def _apply_profile(resume, profile):
+    """Copy display fields from the owner's profile onto the resume"""
+    if profile:
+        first_name = (profile.get('first_name') or '').strip()
+        last_name = (profile.get('last_name') or '').strip()
+        if first_name or last_name:
+            resume['name'] = f"{first_name} {last_name}".strip()
+        else:
+            resume['name'] = f"Candidate {(resume.get('user_id') or 'Unknown')[:8]}"
+        resume['email'] = profile.get('email', '')
+        resume['phone'] = profile.get('phone', '')
+        resume['address'] = profile.get('address', '')
+    else:
+        resume['name'] = f"Candidate {(resume.get('user_id') or 'Unknown')[:8]}"
+
+def _normalize_resume(resume):
+    """Fill placeholder content, decode the embedding and build embedding text"""
+    # Ensure there's always some content in the key fields
+    if not resume.get('experience') or not isinstance(resume.get('experience'), list) or len(resume.get('experience', [])) == 0:
+        resume['experience'] = [{
+            'position': 'Unspecified Position',
+            'company': 'No company information available',
+            'description': ''
+        }]
+
+    if not resume.get('education') or not isinstance(resume.get('education'), list) or len(resume.get('education', [])) == 0:
+        resume['education'] = [{
+            'degree': 'Unspecified Degree',
+            'institution': 'No institution information available'
+        }]
+
+    # Ensure skills and other arrays exist
+    if not resume.get('skills') or not isinstance(resume.get('skills'), list):
+        resume['skills'] = []
+
+    if not resume.get('certifications') or not isinstance(resume.get('certifications'), list):
+        resume['certifications'] = []
+
+    if not resume.get('languages') or not isinstance(resume.get('languages'), list):
+        resume['languages'] = []
+
+    # Decode Base64 embeddings
+    if resume.get('embedding'):
+        embedding_bytes = base64.b64decode(resume['embedding'])
+        embedding = np.frombuffer(embedding_bytes, dtype='float32')
+        # Under memory pressure keep half-size copies instead of views on the decoded bytes
+        resume['embedding'] = embedding if corpus_embedding_dtype() == 'float32' else embedding.astype('float16')
+
+    resume['embedding_text'] = enhance_resume_embedding(resume)
+
+def _fetch_profiles(user_ids):
+    """Index the profiles owning user_ids by id, querying in URL-safe chunks"""
+    supabase = get_supabase_client()
+    profiles = {}
+    user_ids = [user_id for user_id in dict.fromkeys(user_ids) if user_id]
+    for start in range(0, len(user_ids), PROFILE_LOOKUP_CHUNK_SIZE):
+        chunk = user_ids[start:start + PROFILE_LOOKUP_CHUNK_SIZE]
+        response = supabase.table('profiles') \
+            .select(','.join(PROFILE_JOIN_COLUMNS)) \
+            .in_('id', chunk) \
+            .execute()
+        for profile in response.data or []:
+            profiles[profile['id']] = profile
+    return profiles
+
+def load_resumes(columns=RESUME_SCORING_COLUMNS, page_size=None, raise_errors=False):
+    """
+    Load resumes from Supabase with enhanced embedding text.
+
+    Resumes are fetched page by page with .range() and each page is joined
+    to its owners' profiles and normalized before the next one is fetched,
+    so the raw response for the whole table is never held at once.
+
+    Args:
+        columns: resume columns to select (RESUME_SCORING_COLUMNS or RESUME_DISPLAY_COLUMNS)
+        page_size: rows per request, defaults to RESUME_PAGE_SIZE
+        raise_errors: re-raise Supabase errors instead of returning [] (background jobs retry them)
+    """
+    page_size = page_size or RESUME_PAGE_SIZE
     try:
-        # Fetch resumes
-        resumes_response = supabase.table('resumes').select('*').execute()
-        resumes = resumes_response.data
-
-        # Fetch profiles
-        profiles_response = supabase.table('profiles').select('*').execute()
-        profiles = profiles_response.data
-
-        # Join resumes with profiles and ensure all resumes have basic info
-        for resume in resumes:
-            # Find matching profile
-            profile = next((p for p in profiles if p['id'] == resume.get('user_id')), None)
-            
-            # Add profile data
-            if profile:
-                first_name = profile.get('first_name', '').strip()
-                last_name = profile.get('last_name', '').strip() 
-                if first_name or last_name:
-                    resume['name'] = f"{first_name} {last_name}".strip()
-                else:
-                    resume['name'] = f"Candidate {resume.get('user_id', 'Unknown')[:8]}"
-                resume['email'] = profile.get('email', '')
-                resume['phone'] = profile.get('phone', '')
-                resume['address'] = profile.get('address', '')
-            else:
-                resume['name'] = f"Candidate {resume.get('user_id', 'Unknown')[:8]}"
-                
-            # Ensure there's always some content in the key fields
-            if not resume.get('experience') or not isinstance(resume.get('experience'), list) or len(resume.get('experience', [])) == 0:
-                resume['experience'] = [{
-                    'position': 'Unspecified Position',
-                    'company': 'No company information available',
-                    'description': ''
-                }]
-                
-            if not resume.get('education') or not isinstance(resume.get('education'), list) or len(resume.get('education', [])) == 0:
-                resume['education'] = [{
-                    'degree': 'Unspecified Degree',
-                    'institution': 'No institution information available'
-                }]
-            
-            # Ensure skills and other arrays exist
-            if not resume.get('skills') or not isinstance(resume.get('skills'), list):
-                resume['skills'] = []
-                
-            if not resume.get('certifications') or not isinstance(resume.get('certifications'), list):
-                resume['certifications'] = []
-                
-            if not resume.get('languages') or not isinstance(resume.get('languages'), list):
-                resume['languages'] = []
-                
+        supabase = get_supabase_client()
+        resumes = []
+        offset = 0
+        with span('corpus_load'):
+            while True:
+                page = supabase.table('resumes') \
+                    .select(','.join(columns)) \
+                    .order('id') \
+                    .range(offset, offset + page_size - 1) \
+                    .execute().data or []
 
-        # Decode Base64 embeddings
-        for resume in resumes:
-            if resume.get('embedding'):
-                embedding_bytes = base64.b64decode(resume['embedding'])
-                resume['embedding'] = np.frombuffer(embedding_bytes, dtype='float32')
-
-        # Ensure education is properly formatted
-        for resume in resumes:
-            # Convert education to list if it's a single object
-            if 'education' in resume and isinstance(resume['education'], dict):
-                resume['education'] = [resume['education']]
-            # Add empty array if education is missing
-            if 'education' not in resume:
-                resume['education'] = []
-
-        # Add embedding text to resumes
-        for resume in resumes:
-            resume['embedding_text'] = enhance_resume_embedding(resume)
-            
-        logger.debug(f"Loaded Resumes: {resumes[:1]}")  # Log first resume
+                profiles = _fetch_profiles(resume.get('user_id') for resume in page)
+                for resume in page:
+                    _apply_profile(resume, profiles.get(resume.get('user_id')))
+                    _normalize_resume(resume)
+                resumes.extend(page)
+
+                if len(page) < page_size:
+                    break
+                offset += page_size
+
+        record_corpus(resumes)
+        logger.debug(f"Loaded {len(resumes)} resumes in pages of {page_size}")
         return resumes
     except Exception as e:
         logger.error(f"Error loading resumes: {str(e)}")
+        if raise_errors:
+            raise
         return []
 
+def load_resumes_by_ids(resume_ids, columns=RESUME_SCORING_COLUMNS):
+    """Load and normalize just the given resumes, e.g. one page of a cached ranking"""
+    resume_ids = [resume_id for resume_id in resume_ids if isinstance(resume_id, str)]
+    supabase = get_supabase_client()
+    resumes = []
+    for start in range(0, len(resume_ids), PROFILE_LOOKUP_CHUNK_SIZE):
+        response = supabase.table('resumes') \
+            .select(','.join(columns)) \
+            .in_('id', resume_ids[start:start + PROFILE_LOOKUP_CHUNK_SIZE]) \
+            .execute()
+        resumes.extend(response.data or [])
+
+    profiles = _fetch_profiles(resume.get('user_id') for resume in resumes)
+    for resume in resumes:
+        _apply_profile(resume, profiles.get(resume.get('user_id')))
+        _normalize_resume(resume)
+    return {resume['id']: resume for resume in resumes}
+
+def get_corpus_version():
+    """
+    Cheap fingerprint of the resumes table (row count + latest update).
+
+    Used to key cached rankings and coalesced results, so they stop being
+    reused once resumes are added or edited. Every writer must move
+    updated_at (ingestion and generate_embeddings set it; content.md has a
+    trigger for the rest). Cached for CORPUS_VERSION_TTL seconds; returns
+    None if Supabase can't be reached.
+    """
+    version = cache.get('corpus_version')
+    if version is not None:
+        return version
+    try:
+        response = get_supabase_client().table('resumes') \
+            .select('updated_at', count='exact') \
+            .order('updated_at', desc=True) \
+            .limit(1) \
+            .execute()
+        latest = response.data[0]['updated_at'] if response.data else None
+        version = f"{response.count}:{latest}"
+        cache.set('corpus_version', version, CORPUS_VERSION_TTL)
+        return version
+    except Exception as e:
+        logger.warning(f"Could not determine corpus version: {str(e)}")
+        return None
+
+# Phrases whose following noun chunks are taken as required skills
+SKILL_INDICATORS = ['experience in', 'knowledge of', 'skilled in', 'proficient with', 
+                    'familiar with', 'expertise in', 'background in', 'ability to',
+                    'competent in', 'trained in', 'qualified in', 'specializing in']
+
+def _skill_fragments(text):
+    """The text following each skill indicator found in the job description"""
+    lowered = text.lower()
+    fragments = []
+    for indicator in SKILL_INDICATORS:
+        idx = lowered.find(indicator)
+        if idx >= 0:
+            # Extract a meaningful chunk following the indicator
+            end_idx = min(idx + len(indicator) + 100, len(text))
+            fragments.append(text[idx + len(indicator):end_idx])
+    return fragments
+
 def extract_keywords_and_requirements(text):
     """Extract job requirements using advanced NLP techniques without domain-specific hardcoding"""
+    nlp = get_nlp()
+    return _requirements_from_docs(text, nlp(text.lower()), [nlp(fragment) for fragment in _skill_fragments(text)])
+
+def extract_requirements_batch(texts, batch_size=32):
+    """extract_keywords_and_requirements() for many job descriptions, parsed in batches with nlp.pipe"""
+    nlp = get_nlp()
+    docs = list(nlp.pipe([text.lower() for text in texts], batch_size=batch_size))
+    fragments = [_skill_fragments(text) for text in texts]
+    fragment_docs = iter(nlp.pipe([fragment for job_fragments in fragments for fragment in job_fragments], batch_size=batch_size))
+    return [
+        _requirements_from_docs(text, doc, [next(fragment_docs) for _ in job_fragments])
+        for text, doc, job_fragments in zip(texts, docs, fragments)
+    ]
+
+def _requirements_from_docs(text, doc, fragment_docs):
+    """Requirements from the parsed (lower-cased) job description and its parsed skill fragments"""
     
-    # 1. Use NLP to find requirements based on linguistic patterns
-    doc = get_nlp()(text.lower())
-    
-    # Collect noun phrases that follow skill indicators
-    skill_indicators = ['experience in', 'knowledge of', 'skilled in', 'proficient with', 
-                       'familiar with', 'expertise in', 'background in', 'ability to',
-                       'competent in', 'trained in', 'qualified in', 'specializing in']
-    
+    # 1. Use NLP to find requirements based on linguistic patterns:
+    # noun phrases (more meaningful than single nouns) that follow skill indicators
     skills = []
-    
-    # Extract based on skill indicators
-    for indicator in skill_indicators:
-        idx = text.lower().find(indicator)
-        if idx >= 0:
-            # Extract a meaningful chunk following the indicator
-            end_idx = min(idx + len(indicator) + 100, len(text))
-            fragment = text[idx + len(indicator):end_idx]
-            fragment_doc = get_nlp(fragment)
-            
-            # Get noun phrases (more meaningful than single nouns)
-            for chunk in fragment_doc.noun_chunks:
-                if len(chunk.text) > 2:
-                    skills.append(chunk.text.strip())
+    for fragment_doc in fragment_docs:
+        for chunk in fragment_doc.noun_chunks:
+            if len(chunk.text) > 2:
+                skills.append(chunk.text.strip())
     
     # 2. Extract years of experience using regex
     experience_pattern = r'(\d+)[\+]?\s+years?(?:\s+of)?(?:\s+experience)?'
@@ -316,7 +433,15 @@ def extract_keywords_and_requirements(text):
     
     return requirements
 
-def get_skill_similarity(resume_skills, job_skills):
+def _unit_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+def _cosine_matrix(a, b):
+    """cosine_similarity() without sklearn's input validation, which dominates on the small per-resume matrices"""
+    return _unit_rows(np.asarray(a, dtype='float32')) @ _unit_rows(np.asarray(b, dtype='float32')).T
+
+def get_skill_similarity(resume_skills, job_skills, encode=None):
     """Calculate skill similarity using semantic embeddings and direct matching"""
     if not resume_skills or not job_skills:
         return 0.0
@@ -324,25 +449,30 @@ def get_skill_similarity(resume_skills, job_skills):
     # Direct matches (case-insensitive)
     direct_matches = 0
     matched_resume_skills = []
+    # Lower-cased once here rather than for every (job skill, resume skill) comparison
+    resume_skills_lower = [(rs, rs.lower()) for rs in resume_skills]
     
     for js in job_skills:
         best_match = None
         best_score = 0
+        js_lower = js.lower()
+        js_words = None
         
-        for rs in resume_skills:
+        for rs, rs_lower in resume_skills_lower:
             # Skip if this resume skill already matched with a job skill
             if rs in matched_resume_skills:
                 continue
                 
             # Exact match or substring match
-            if js.lower() == rs.lower():
+            if js_lower == rs_lower:
                 score = 1.0
-            elif js.lower() in rs.lower() or rs.lower() in js.lower():
+            elif js_lower in rs_lower or rs_lower in js_lower:
                 score = 0.8
             else:
                 # Check for word-level overlap
-                js_words = set(js.lower().split())
-                rs_words = set(rs.lower().split())
+                if js_words is None:
+                    js_words = set(js_lower.split())
+                rs_words = set(rs_lower.split())
                 if js_words & rs_words:  # If there's an intersection
                     score = len(js_words & rs_words) / len(js_words)
                 else:
@@ -359,18 +489,19 @@ def get_skill_similarity(resume_skills, job_skills):
     # Semantic similarity for unmatched skills
     semantic_score = 0
     remaining_resume_skills = [rs for rs in resume_skills if rs not in matched_resume_skills]
-    remaining_job_skills = [js for js in job_skills if not any(js.lower() in rs.lower() or rs.lower() in js.lower() for rs in matched_resume_skills)]
+    matched_lower = [rs.lower() for rs in matched_resume_skills]
+    remaining_job_skills = [js for js in job_skills if not any(js.lower() in rs or rs in js.lower() for rs in matched_lower)]
     
     # Only calculate semantic score if there are remaining skills and direct matches are not satisfactory
     if remaining_resume_skills and remaining_job_skills and direct_matches < len(job_skills) * 0.7:
         try:
             # Use sentence transformer for semantic matching
-            model = get_sentence_transformer()
-            resume_embeddings = model.encode(remaining_resume_skills)
-            job_embeddings = model.encode(remaining_job_skills)
+            encode = encode or get_sentence_transformer().encode
+            resume_embeddings = encode(remaining_resume_skills)
+            job_embeddings = encode(remaining_job_skills)
             
             # Calculate similarity matrix
-            sim_matrix = cosine_similarity(resume_embeddings, job_embeddings)
+            sim_matrix = _cosine_matrix(resume_embeddings, job_embeddings)
             
             # For each job skill, find best matching resume skill
             best_matches = np.max(sim_matrix, axis=0)
@@ -386,7 +517,7 @@ def get_skill_similarity(resume_skills, job_skills):
     
     return min(1.0, combined_score)
 
-def get_certification_score(resume_certs, job_description, job_certs=None):
+def get_certification_score(resume_certs, job_description, job_certs=None, encode=None):
     """Calculate certification relevance score without relying on domain detection"""
     if not resume_certs:
         return 0.0, []
@@ -412,12 +543,12 @@ def get_certification_score(resume_certs, job_description, job_certs=None):
     
     # If no direct matches or no job certs specified, evaluate relevance using semantic similarity
     try:
-        model = get_sentence_transformer()
-        cert_embeddings = model.encode(resume_certs)
-        job_embedding = model.encode([job_description])
+        encode = encode or get_sentence_transformer().encode
+        cert_embeddings = encode(resume_certs)
+        job_embedding = encode([job_description])
         
         # Calculate similarity between each cert and the job
-        similarities = cosine_similarity(cert_embeddings, job_embedding)
+        similarities = _cosine_matrix(cert_embeddings, job_embedding)
         
         # Get best matching certs (above threshold)
         relevant_certs = []
@@ -435,133 +566,313 @@ def get_certification_score(resume_certs, job_description, job_certs=None):
     # Give minimal credit just for having certifications
     return min(0.3, 0.1 * len(resume_certs)), []
 
-def recommend_resumes(job_desc, resumes, top_n=5):
-    """Match resumes to job description using NLP and provide match reasons"""
-    try:
-        start_time = time.time()
-        
-        # Extract requirements from job description
+def resume_key(resume, index):
+    """Key used to index scored resumes (row id, or position when a row has none)"""
+    resume_id = resume.get('id')
+    return resume_id if resume_id is not None else index
+
+def _charge(component_seconds, component, started, clock):
+    """Add the time since started to a component's total; returns the new start"""
+    now = clock()
+    component_seconds[component] += now - started
+    return now
+
+def _score_resume(resume, job_desc, job_requirements, semantic_score, component_seconds, clock, encode=None):
+    """Weighted score, match reasons and components for one resume; similarity is computed by the caller"""
+    match_reasons = []
+    score_components = {'similarity': semantic_score}
+    started = clock()
+    
+    # 2. Calculate skill match score
+    resume_skills = resume.get('skills', [])
+    skill_match_score = get_skill_similarity(resume_skills, job_requirements['skills'], encode)
+    score_components['skill_match'] = skill_match_score
+
+    # Only include specific skill matches in reasons, not the raw score
+    job_skills_lower = [js.lower() for js in job_requirements['skills']]
+    for rs in resume_skills:
+        rs_lower = rs.lower()
+        for js_lower in job_skills_lower:
+            if js_lower in rs_lower or rs_lower in js_lower:
+                match_reasons.append(f"Has required skill: {rs}")
+                break
+    started = _charge(component_seconds, 'skill_match', started, clock)
+
+    # 3. Calculate experience score
+    req_years = job_requirements['years_experience']
+    candidate_years = calculate_total_experience(resume.get('experience', []))
+
+    if req_years > 0 and candidate_years >= req_years:
+        match_reasons.append(f"Has {int(candidate_years)} years of experience (required: {req_years})")
+        experience_score = min(candidate_years / req_years, 1.5)  # Cap at 1.5x
+    else:
+        experience_score = min(candidate_years / max(1, req_years), 1.0)
+
+    score_components['experience'] = experience_score
+    started = _charge(component_seconds, 'experience', started, clock)
+
+    # 4. Calculate education score
+    candidate_education = get_highest_education(resume.get('education', []))
+    edu_score = calculate_education_score(candidate_education, job_requirements['education_level'])
+    score_components['education'] = edu_score
+
+    # Only add education as a match reason if education was explicitly mentioned
+    if job_requirements.get('education_mentioned', False) and edu_score > 0.7:
+        for edu in resume.get('education', []):
+            degree = edu.get('degree', 'degree')
+            institution = edu.get('institution', 'institution')
+            match_reasons.append(f"Has {degree} from {institution}")
+            break
+    started = _charge(component_seconds, 'education', started, clock)
+
+    # 5. Calculate certification score
+    resume_certs = resume.get('certifications', [])
+    job_certs = job_requirements.get('certifications', [])
+    cert_score_tuple = get_certification_score(resume_certs, job_desc, job_certs, encode)
+
+    # Handle the tuple return value correctly
+    if isinstance(cert_score_tuple, tuple):
+        cert_score, cert_reasons = cert_score_tuple
+        match_reasons.extend(cert_reasons)
+    else:
+        # Handle the case where a float was returned (backward compatibility)
+        cert_score = cert_score_tuple
+
+    score_components['certifications'] = cert_score
+    started = _charge(component_seconds, 'certifications', started, clock)
+
+    # 6. Calculate language score (handles objects with name/fluency)
+    language_score = 0.0
+    raw_langs = resume.get('languages', [])
+    resume_langs = []
+    for item in raw_langs:
+        if isinstance(item, str):
+            resume_langs.append(item)
+        elif isinstance(item, dict):
+            name = item.get('name') or ''
+            if name:
+                resume_langs.append(name)
+    job_langs = job_requirements.get('languages', []) or []
+    if resume_langs and job_langs:
+        matches = []
+        for r in resume_langs:
+            for j in job_langs:
+                if r.strip().lower() == j.strip().lower():
+                    matches.append(r)
+                    match_reasons.append(f"Speaks required language: {r}")
+                    break
+        language_score = len(matches) / len(job_langs)
+    score_components['languages'] = language_score
+    _charge(component_seconds, 'languages', started, clock)
+
+    # Calculate final score with weights
+    final_score = sum(WEIGHTS[component] * score for component, score in score_components.items())
+
+    return {
+        'score': float(final_score),
+        'match_reasons': match_reasons,
+        'score_components': score_components  # Add component scores for transparency
+    }
+
+def score_resumes(job_desc, resumes):
+    """
+    Score every resume against the job description without copying resume dicts.
+    
+    Returns:
+        dict: resume_key -> {'score', 'match_reasons', 'score_components'}
+    """
+    start_time = time.time()
+    
+    # Extract requirements from job description
+    with span('extract_requirements'):
         job_requirements = extract_keywords_and_requirements(job_desc)
-        logger.info(f"Extracted requirements: {job_requirements}")
-        
-        # Generate job description embedding for semantic matching
-        job_embedding = get_sentence_transformer().encode(job_desc)
-        
-        # Process resumes in parallel
-        resumes_to_process = [r for r in resumes if r.get('embedding') is not None and np.size(r['embedding']) > 0]
-        scores = []
-        
-        # Process each resume using optimized scoring
-        for resume in resumes_to_process:
+    # Formatted on the log writer thread, and only if this event is sampled
+    logger.info({'event': 'extracted_requirements', 'requirements': job_requirements})
+    
+    # Generate job description embedding for semantic matching
+    with span('job_encode'):
+        job_embedding = get_job_embedding(job_desc)
+    
+    scores = {}
+    # Per-component time, summed over the loop and reported once (a span per resume would cost more than it measures)
+    component_seconds = dict.fromkeys(WEIGHTS, 0.0)
+    clock = time.perf_counter
+    
+    # Process each resume using optimized scoring
+    for index, resume in enumerate(resumes):
+        if resume.get('embedding') is None or np.size(resume['embedding']) == 0:
+            continue
+        try:
+            # 1. Calculate semantic similarity score
+            started = clock()
+            resume_embedding = np.array(resume['embedding'])
+            semantic_score = cosine_similarity([job_embedding], [resume_embedding])[0][0]
+            _charge(component_seconds, 'similarity', started, clock)
+            
+            # Keep only the scoring outcome; payloads are materialized for the final top N
+            scores[resume_key(resume, index)] = _score_resume(
+                resume, job_desc, job_requirements, semantic_score, component_seconds, clock
+            )
+            
+        except Exception as e:
+            logger.error(f"Error scoring resume {resume.get('id')}: {str(e)}")
+    
+    for component, seconds in component_seconds.items():
+        record_span(f'score_{component}', seconds)
+    
+    end_time = time.time()
+    logger.info(f"Scoring {len(scores)} resumes took {end_time - start_time:.2f} seconds")
+    
+    return scores
+
+class _EncodeCache:
+    """Encodes each distinct text once for the whole batch instead of once per (job, resume) pair"""
+
+    def __init__(self, model):
+        self.model = model
+        self.vectors = {}
+
+    def add(self, texts, vectors):
+        self.vectors.update(zip(texts, vectors))
+
+    def __call__(self, texts):
+        missing = [text for text in dict.fromkeys(texts) if text not in self.vectors]
+        if missing:
+            self.add(missing, self.model.encode(missing))
+        return np.stack([self.vectors[text] for text in texts])
+
+def score_resumes_batch(job_descs, resumes):
+    """
+    score_resumes() for many job descriptions in one pass over the corpus.
+    
+    Requirements come from one nlp.pipe run, the job descriptions (and their
+    skills) are encoded in one batch, and the semantic similarity of every
+    (job, resume) pair is one jobs x resumes matrix product. Skill and
+    certification texts are encoded once per batch rather than per pair.
+    
+    Returns:
+        list: a score_resumes()-style mapping per job description, in order
+    """
+    start_time = time.time()
+    job_descs = list(job_descs)
+    
+    with span('extract_requirements'):
+        requirements = extract_requirements_batch(job_descs)
+    for job_requirements in requirements:
+        logger.info({'event': 'extracted_requirements', 'requirements': job_requirements})
+    
+    model = get_sentence_transformer()
+    encode = _EncodeCache(model)
+    with span('job_encode'):
+        job_skills = list(dict.fromkeys(skill for job in requirements for skill in job['skills']))
+        texts = job_descs + job_skills
+        vectors = np.asarray(model.encode(texts, batch_size=64), dtype='float32')
+        encode.add(texts, vectors)
+    
+    clock = time.perf_counter
+    component_seconds = dict.fromkeys(WEIGHTS, 0.0)
+    
+    started = clock()
+    keyed = [(resume_key(resume, index), resume) for index, resume in enumerate(resumes)
+             if resume.get('embedding') is not None and np.size(resume['embedding']) > 0]
+    if keyed:
+        resume_matrix = np.vstack([np.asarray(resume['embedding'], dtype='float32') for _, resume in keyed])
+        similarities = _unit_rows(vectors[:len(job_descs)]) @ _unit_rows(resume_matrix).T
+    else:
+        similarities = np.zeros((len(job_descs), 0), dtype='float32')
+    _charge(component_seconds, 'similarity', started, clock)
+    
+    batch_scores = []
+    for job_desc, job_requirements, job_similarities in zip(job_descs, requirements, similarities):
+        scores = {}
+        for (key, resume), semantic_score in zip(keyed, job_similarities.tolist()):
             try:
-                match_reasons = []
-                score_components = {}
-                
-                # 1. Calculate semantic similarity score
-                resume_embedding = np.array(resume['embedding'])
-                semantic_score = cosine_similarity([job_embedding], [resume_embedding])[0][0]
-                score_components['similarity'] = semantic_score
-                
-                # 2. Calculate skill match score
-                resume_skills = resume.get('skills', [])
-                skill_match_score = get_skill_similarity(resume_skills, job_requirements['skills'])
-                score_components['skill_match'] = skill_match_score
-                
-                # Only include specific skill matches in reasons, not the raw score
-                for rs in resume_skills:
-                    for js in job_requirements['skills']:
-                        if js.lower() in rs.lower() or rs.lower() in js.lower():
-                            match_reasons.append(f"Has required skill: {rs}")
-                            break
-                
-                # 3. Calculate experience score
-                req_years = job_requirements['years_experience']
-                candidate_years = calculate_total_experience(resume.get('experience', []))
-                
-                if req_years > 0 and candidate_years >= req_years:
-                    match_reasons.append(f"Has {int(candidate_years)} years of experience (required: {req_years})")
-                    experience_score = min(candidate_years / req_years, 1.5)  # Cap at 1.5x
-                else:
-                    experience_score = min(candidate_years / max(1, req_years), 1.0)
-                
-                score_components['experience'] = experience_score
-                
-                # 4. Calculate education score
-                candidate_education = get_highest_education(resume.get('education', []))
-                edu_score = calculate_education_score(candidate_education, job_requirements['education_level'])
-                score_components['education'] = edu_score
-                
-                # Only add education as a match reason if education was explicitly mentioned
-                if job_requirements.get('education_mentioned', False) and edu_score > 0.7:
-                    for edu in resume.get('education', []):
-                        degree = edu.get('degree', 'degree')
-                        institution = edu.get('institution', 'institution')
-                        match_reasons.append(f"Has {degree} from {institution}")
-                        break
-                
-                # 5. Calculate certification score
-                resume_certs = resume.get('certifications', [])
-                job_certs = job_requirements.get('certifications', [])
-                cert_score_tuple = get_certification_score(resume_certs, job_desc, job_certs)
-                
-                # Handle the tuple return value correctly
-                if isinstance(cert_score_tuple, tuple):
-                    cert_score, cert_reasons = cert_score_tuple
-                    match_reasons.extend(cert_reasons)
-                else:
-                    # Handle the case where a float was returned (backward compatibility)
-                    cert_score = cert_score_tuple
-                    
-                score_components['certifications'] = cert_score
-                
-                # 6. Calculate language score (handles objects with name/fluency)
-                language_score = 0.0
-                raw_langs = resume.get('languages', [])
-                resume_langs = []
-                for item in raw_langs:
-                    if isinstance(item, str):
-                        resume_langs.append(item)
-                    elif isinstance(item, dict):
-                        name = item.get('name') or ''
-                        if name:
-                            resume_langs.append(name)
-                job_langs = job_requirements.get('languages', []) or []
-                if resume_langs and job_langs:
-                    matches = []
-                    for r in resume_langs:
-                        for j in job_langs:
-                            if r.strip().lower() == j.strip().lower():
-                                matches.append(r)
-                                match_reasons.append(f"Speaks required language: {r}")
-                                break
-                    language_score = len(matches) / len(job_langs)
-                score_components['languages'] = language_score
-                
-                # Calculate final score with weights
-                final_score = sum(WEIGHTS[component] * score for component, score in score_components.items())
-                
-                # Add match reasons and score to resume
-                resume_with_reasons = resume.copy()
-                resume_with_reasons['match_reasons'] = match_reasons
-                resume_with_reasons['score'] = float(final_score)
-                resume_with_reasons['score_components'] = score_components  # Add component scores for transparency
-                
-                scores.append((resume_with_reasons, final_score))
-                
+                scores[key] = _score_resume(
+                    resume, job_desc, job_requirements, semantic_score, component_seconds, clock, encode
+                )
             except Exception as e:
                 logger.error(f"Error scoring resume {resume.get('id')}: {str(e)}")
+        batch_scores.append(scores)
+    
+    for component, seconds in component_seconds.items():
+        record_span(f'score_{component}', seconds)
+    
+    logger.info(f"Scoring {len(keyed)} resumes against {len(job_descs)} jobs took {time.time() - start_time:.2f} seconds")
+    return batch_scores
+
+def top_scored_keys(scores, top_n):
+    """Return the keys of the top_n entries of a score_resumes() mapping, best first"""
+    return heapq.nlargest(top_n, scores, key=lambda key: scores[key]['score'])
+
+def materialize_recommendations(scores, resumes, top_n=5):
+    """Build recommend_resumes()-style result dicts for only the top_n scored resumes"""
+    with span('materialize'):
+        resumes_by_key = {resume_key(resume, index): resume for index, resume in enumerate(resumes)}
+        results = []
+        for key in top_scored_keys(scores, top_n):
+            resume_with_reasons = resumes_by_key[key].copy()
+            resume_with_reasons.update(scores[key])
+            results.append(resume_with_reasons)
+    return results
+
+def rank_scores(scores):
+    """
+    Full ranking of a score_resumes() mapping as compact entries, best first.
+
+    Entries hold the resume key and its scores but no resume payload, so the
+    whole ranking is cheap to cache and page through.
+    """
+    with span('rank'):
+        return [
+            {'id': key, **scores[key]}
+            for key in sorted(scores, key=lambda key: scores[key]['score'], reverse=True)
+        ]
+
+def materialize_ranked(entries, resumes_by_id):
+    """Build recommend_resumes()-style result dicts for a slice of rank_scores() entries"""
+    results = []
+    for entry in entries:
+        resume = resumes_by_id.get(entry['id'])
+        if resume is None:
+            # Deleted since the ranking was computed
+            continue
+        resume_with_reasons = resume.copy()
+        resume_with_reasons.update(
+            score=entry['score'],
+            match_reasons=entry['match_reasons'],
+            score_components=entry['score_components']
+        )
+        results.append(resume_with_reasons)
+    return results
+
+def recommend_resumes(job_desc, resumes, top_n=5):
+    """Match resumes to job description using NLP and provide match reasons"""
+    try:
+        start_time = time.time()
         
-        # Sort by score and return top N
-        scores.sort(key=lambda x: x[1], reverse=True)
+        scores = score_resumes(job_desc, resumes)
+        recommended = materialize_recommendations(scores, resumes, top_n)
         
-        end_time = time.time()
-        logger.info(f"Recommendation took {end_time - start_time:.2f} seconds")
+        log_recommendation_metrics(job_desc, len(resumes), round(time.time() - start_time, 3))
         
-        return [resume for resume, _ in scores[:top_n]]
+        return recommended
     except Exception as e:
         logger.error(f"Error in recommendation: {str(e)}")
         return []
 
+def recommend_resumes_batch(job_descs, resumes, top_n=5):
+    """recommend_resumes() for many job descriptions; one result list per job, in order"""
+    start_time = time.time()
+    batch_scores = score_resumes_batch(job_descs, resumes)
+    recommended = [materialize_recommendations(scores, resumes, top_n) for scores in batch_scores]
+    logger.info({
+        'event': 'recommendation_batch',
+        'jobs': len(batch_scores),
+        'candidates': len(resumes),
+        'duration': round(time.time() - start_time, 3),
+    })
+    return recommended
+
 def calculate_total_experience(experiences):
     """Calculate total years of experience from experience entries"""
     total_years = 0
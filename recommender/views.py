@@ -1,128 +1,387 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
-from .utils import load_resumes, recommend_resumes, enhance_resume_embedding, extract_keywords_and_requirements
-from .serializers import ResumeSerializer
+from rest_framework.renderers import BrowsableAPIRenderer
+from .utils import load_resumes, load_resumes_by_ids, get_corpus_version, rank_scores, materialize_ranked, resume_key, recommend_resumes, recommend_resumes_batch, score_resumes, materialize_recommendations, enhance_resume_embedding, extract_keywords_and_requirements
+from .serializers import ResumeSerializer, parse_fields_param, parse_top_n, project_recommendations
+from .renderers import ORJSONRenderer
 import logging
 from .models import User
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from datetime import datetime
-from supabase import create_client
+from .supabase_client import get_supabase_client
+from .profiles import PROFILE_BATCH_MAX_IDS, get_profile_cards, invalidate_profile
+from .jobs import JobQueueFull, get_job, serialize_job, submit_job
 import os
+import json
 # from sentence_transformers import SentenceTransformer  # now loaded lazily from utils
 import numpy as np
 import base64
+import zipfile
 from .llm_recommender import recommend_resumes_llm, hybrid_recommend_resumes
-from django.views.generic import TemplateView
-from .pdf_utils import extract_text_from_pdf
+from .llm_metrics import track_llm_usage
+from .coalescing import coalesce, recommendation_key
+from .conditional import etag_matches, make_etag, not_modified, with_etag
+from .ranking import (
+    RANKING_MAX_PAGE_SIZE,
+    InvalidCursor,
+    RankingExpired,
+    decode_cursor,
+    get_cached_ranking,
+    get_ranking,
+    next_cursor,
+    ranking_key,
+)
+from django.views.generic import TemplateView, View
+import hmac
+from .pdf_utils import PDFExtractionTimeout, PDFTooLarge
+from .pdf_cache import extract_text_cached
+from .ingestion import ingest_pdfs
+from .metrics import PROMETHEUS_CONTENT_TYPE, render_prometheus
+from .profiling import profile_path
+from .memory import check_memory_budget, memory_report
+from .feedback import InvalidFeedback, parse_feedback_events, record_feedback
+from .middleware import request_user_id
 
 logger = logging.getLogger('recommender')
 
+# Synchronous API ingestion is capped; larger dumps go through the ingest_resumes command
+INGEST_API_MAX_FILES = getattr(settings, "INGEST_API_MAX_FILES", 200)
+
+# Job descriptions accepted per POST /recommend/batch/
+BATCH_RECOMMEND_MAX_JOBS = getattr(settings, "BATCH_RECOMMEND_MAX_JOBS", 100)
+
+# Token Prometheus must send in X-Metrics-Token to scrape /metrics; empty leaves the endpoint open
+METRICS_AUTH_TOKEN = getattr(settings, "METRICS_AUTH_TOKEN", "")
+
+def nlp_fallback_recommendations(job_desc, valid_resumes, top_n, nlp_scores=None):
+    """Traditional NLP results dressed up for the LLM endpoints when the LLM returned nothing"""
+    logger.warning("LLM recommender returned no results - falling back to traditional NLP")
+    # Use traditional NLP-based recommendation as fallback
+    if nlp_scores is not None:
+        fallback_recommendations = materialize_recommendations(nlp_scores, valid_resumes, top_n)
+    else:
+        fallback_recommendations = recommend_resumes(job_desc, valid_resumes, top_n=top_n)
+
+    # Add LLM-specific fields to maintain compatibility
+    for rec in fallback_recommendations:
+        rec['reasoning'] = "Generated using traditional NLP matching (LLM unavailable)"
+        rec['match_reasons'] = [
+            "Fallback mode: LLM evaluation unavailable",
+            "✓ Strength: Resume contains relevant skills and experience",
+            "△ Note: This is a basic match without semantic analysis"
+        ]
+    return fallback_recommendations
+
+def service_error_recommendations(valid_resumes, top_n):
+    """Last-resort fallback - return top N resumes with default scores"""
+    recommended = []
+    for i, resume in enumerate(valid_resumes[:top_n]):
+        recommended.append({
+            'resume': resume,
+            'score': 0.5,  # Default middle score
+            'reasoning': "Using basic matching due to service error.",
+            'match_reasons': [
+                "System notice: Recommendation service encountered an error.",
+                "✓ Basic match based on resume content"
+            ]
+        })
+    return recommended
+
 class RecommendAPI(APIView):
+    renderer_classes = (ORJSONRenderer, BrowsableAPIRenderer)
+
     def post(self, request):
         try:
-            logger.info(f"Received request data: {request.data}")
+            logger.debug("Received request data: %s", request.data)
+            cursor = request.query_params.get("cursor") or request.data.get("cursor")
+            if cursor:
+                return self._next_page(request, cursor)
+            
             job_desc = request.data.get("job_description", "")
-            top_n = request.data.get("top_n", 5)
+            try:
+                top_n = parse_top_n(request.data.get("top_n"))
+            except ValueError as e:
+                return Response({"error": str(e)}, status=400)
+            fields = parse_fields_param(request.query_params.get("fields") or request.data.get("fields"))
             
-            resumes = load_resumes()
+            loaded = {}
+            def compute():
+                resumes = load_resumes()
+                
+                # Filter only resumes with valid embeddings
+                valid_resumes = [r for r in resumes if r.get('embedding') is not None and np.size(r['embedding']) > 0]
+                logger.info(f"Processing {len(valid_resumes)} resumes with valid embeddings")
+                loaded['resumes'] = valid_resumes
+                
+                # Score every resume once; later pages are sliced from this ranking.
+                # An empty load is usually a failed one, so it must not be cached
+                return rank_scores(score_resumes(job_desc, valid_resumes)), bool(valid_resumes)
             
-            # Filter only resumes with valid embeddings
-            valid_resumes = [r for r in resumes if r.get('embedding') is not None and np.size(r['embedding']) > 0]
-            logger.info(f"Processing {len(valid_resumes)} resumes with valid embeddings")
+            # Repeat polls for an unchanged corpus are answered before any scoring.
+            # Without a corpus version an ETag couldn't tell that resumes changed, so none is issued
+            corpus_version = get_corpus_version()
+            key = ranking_key(job_desc, "nlp", corpus_version)
+            etag = make_etag(key, 0, top_n, sorted(fields) if fields else None) if corpus_version is not None else None
+            if etag and etag_matches(request, etag):
+                return not_modified(etag)
             
-            # Get recommendations with enhanced algorithm that extracts requirements from job description
-            recommended = recommend_resumes(job_desc, valid_resumes, top_n)
+            # Identical concurrent requests share one scoring run
+            ranking, computed, cacheable = get_ranking(key, compute)
+            page = ranking[:top_n]
+            if computed:
+                resumes_by_id = {resume_key(resume, index): resume for index, resume in enumerate(loaded['resumes'])}
+            else:
+                resumes_by_id = load_resumes_by_ids([entry['id'] for entry in page])
+            recommended = materialize_ranked(page, resumes_by_id)
             
             logger.info({
                 'event': 'recommendation_request',
-                'user_id': getattr(request.user, 'id', None),
-                'params': request.data
+                'user_id': request_user_id(request),
+                'params': request.data,
+                'ranking_cached': not computed
             })
-            return Response(recommended)
+            if not cacheable:
+                # Nothing was cached, so neither an ETag nor a cursor can refer to it
+                return self._page_response(recommended, fields, None, None)
+            return self._page_response(recommended, fields, next_cursor(key, ranking, 0, top_n, fields), etag)
         except Exception as e:
             logger.error(f'Error in recommendation: {str(e)}')
             return Response({"error": str(e)}, status=500)
 
+    def _next_page(self, request, cursor):
+        """Serve a later page by slicing the cached ranking"""
+        try:
+            key, offset, page_size, fields = decode_cursor(cursor)
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=400)
+        try:
+            page_size = min(parse_top_n(request.data.get("top_n"), default=page_size), RANKING_MAX_PAGE_SIZE)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        
+        # The cursor pins the corpus version, so a page never changes under it
+        etag = make_etag(key, offset, page_size, sorted(fields) if fields else None)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        try:
+            ranking = get_cached_ranking(key)
+        except RankingExpired as e:
+            return Response({"error": str(e)}, status=410)
+        
+        page = ranking[offset:offset + page_size]
+        recommended = materialize_ranked(page, load_resumes_by_ids([entry['id'] for entry in page]))
+        return self._page_response(recommended, fields, next_cursor(key, ranking, offset, page_size, fields), etag)
+
+    def _page_response(self, recommended, fields, cursor, etag):
+        response = Response(project_recommendations(recommended, fields))
+        if etag:
+            response = with_etag(response, etag)
+        if cursor:
+            response['X-Next-Cursor'] = cursor
+        return response
+
+
+class RecommendBatchAPI(APIView):
+    """NLP recommendations for many job descriptions, scored in one pass over the corpus"""
+    renderer_classes = (ORJSONRenderer, BrowsableAPIRenderer)
+
+    def post(self, request):
+        # Each job is a description string or {"id": ..., "job_description": ...}
+        jobs = request.data.get("jobs") or request.data.get("job_descriptions")
+        if not isinstance(jobs, list) or not jobs:
+            return Response({"error": "jobs must be a non-empty list of job descriptions"}, status=400)
+        if len(jobs) > BATCH_RECOMMEND_MAX_JOBS:
+            return Response({"error": f"At most {BATCH_RECOMMEND_MAX_JOBS} jobs per batch"}, status=400)
+
+        job_ids, job_descs = [], []
+        for index, job in enumerate(jobs):
+            job_id, job_desc = (job.get("id", index), job.get("job_description")) if isinstance(job, dict) else (index, job)
+            if not job_desc or not isinstance(job_desc, str):
+                return Response({"error": f"Job {index}: job_description is required"}, status=400)
+            job_ids.append(job_id)
+            job_descs.append(job_desc)
+
+        try:
+            top_n = parse_top_n(request.data.get("top_n"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        try:
+            fields = parse_fields_param(request.query_params.get("fields") or request.data.get("fields"))
+
+            resumes = load_resumes()
+            valid_resumes = [r for r in resumes if r.get('embedding') is not None and np.size(r['embedding']) > 0]
+            logger.info(f"Processing {len(job_descs)} jobs against {len(valid_resumes)} resumes with valid embeddings")
+
+            recommended = recommend_resumes_batch(job_descs, valid_resumes, top_n=top_n)
+            logger.info({
+                'event': 'recommendation_batch_request',
+                'user_id': request_user_id(request),
+                'jobs': len(job_descs),
+                'top_n': top_n,
+            })
+            return Response([
+                {'id': job_id, 'results': project_recommendations(results, fields)}
+                for job_id, results in zip(job_ids, recommended)
+            ])
+        except Exception as e:
+            logger.error(f'Error in batch recommendation: {str(e)}')
+            return Response({"error": str(e)}, status=500)
 
 class LLMRecommendAPI(APIView):
     """API endpoint for LLM-based resume recommendations"""
+    renderer_classes = (ORJSONRenderer, BrowsableAPIRenderer)
+
     def post(self, request):
         try:
-            logger.info(f"Received LLM recommendation request: {request.data}")
+            logger.debug("Received LLM recommendation request: %s", request.data)
             job_desc = request.data.get("job_description", "")
-            top_n = request.data.get("top_n", 5)
+            try:
+                top_n = parse_top_n(request.data.get("top_n"))
+            except ValueError as e:
+                return Response({"error": str(e)}, status=400)
             model_name = request.data.get("model", "llama4")  # llama4 or nemotron
             recommendation_type = request.data.get("recommendation_type", "hybrid")  # hybrid or llm_only
+            fields = parse_fields_param(request.query_params.get("fields") or request.data.get("fields"))
             
-            # Load resumes
-            resumes = load_resumes()
-            
-            # Filter only resumes with valid embeddings for hybrid approach
-            valid_resumes = [r for r in resumes if r.get('embedding') is not None and np.size(r['embedding']) > 0]
-            logger.info(f"Processing {len(valid_resumes)} resumes with valid embeddings")
-            
-            # Get recommendations using the appropriate method
-            try:
-                if recommendation_type == "hybrid":
-                    recommended = hybrid_recommend_resumes(
-                        job_desc, 
-                        valid_resumes, 
-                        top_n=top_n, 
-                        model_name=model_name
-                    )
-                else:  # llm_only
-                    recommended = recommend_resumes_llm(
-                        job_desc, 
-                        valid_resumes, 
-                        top_n=top_n, 
-                        model_name=model_name
-                    )
+            # Get recommendations using the appropriate method, accounting LLM usage per request
+            with track_llm_usage(request_user_id(request)) as llm_usage:
+                def compute():
+                    # Load resumes
+                    resumes = load_resumes()
+                    
+                    # Filter only resumes with valid embeddings for hybrid approach
+                    valid_resumes = [r for r in resumes if r.get('embedding') is not None and np.size(r['embedding']) > 0]
+                    logger.info(f"Processing {len(valid_resumes)} resumes with valid embeddings")
                     
-                # Fallback: If no recommendations were returned, use traditional method
-                if not recommended and valid_resumes:
-                    logger.warning("LLM recommender returned no results - falling back to traditional NLP")
-                    from .utils import recommend_resumes
-                    # Use traditional NLP-based recommendation as fallback
-                    fallback_recommendations = recommend_resumes(job_desc, valid_resumes, top_n=top_n)
+                    # NLP scores computed for the hybrid path are reused by the fallback below
+                    nlp_scores = None
+                    degraded = False
+                    try:
+                        if recommendation_type == "hybrid":
+                            nlp_scores = score_resumes(job_desc, valid_resumes)
+                            recommended = hybrid_recommend_resumes(
+                                job_desc, 
+                                valid_resumes, 
+                                top_n=top_n, 
+                                model_name=model_name,
+                                nlp_scores=nlp_scores
+                            )
+                        else:  # llm_only
+                            recommended = recommend_resumes_llm(
+                                job_desc, 
+                                valid_resumes, 
+                                top_n=top_n, 
+                                model_name=model_name
+                            )
+                        
+                        # Fallback: If no recommendations were returned, use traditional method
+                        if not recommended and valid_resumes:
+                            recommended = nlp_fallback_recommendations(job_desc, valid_resumes, top_n, nlp_scores)
+                            degraded = True
+                    except Exception as e:
+                        logger.error(f"Error in recommendation process: {str(e)}")
+                        recommended = service_error_recommendations(valid_resumes, top_n)
+                        degraded = True
                     
-                    # Add LLM-specific fields to maintain compatibility
-                    for rec in fallback_recommendations:
-                        rec['reasoning'] = "Generated using traditional NLP matching (LLM unavailable)"
-                        rec['match_reasons'] = [
-                            "Fallback mode: LLM evaluation unavailable",
-                            "✓ Strength: Resume contains relevant skills and experience",
-                            "△ Note: This is a basic match without semantic analysis"
-                        ]
-                    recommended = fallback_recommendations
-            except Exception as e:
-                logger.error(f"Error in recommendation process: {str(e)}")
-                # Last-resort fallback - return top N resumes with default scores
-                recommended = []
-                for i, resume in enumerate(valid_resumes[:top_n]):
-                    recommended.append({
-                        'resume': resume,
-                        'score': 0.5,  # Default middle score
-                        'reasoning': "Using basic matching due to service error.",
-                        'match_reasons': [
-                            "System notice: Recommendation service encountered an error.",
-                            "✓ Basic match based on resume content"
-                        ]
-                    })
+                    # Don't keep results that include failed or skipped LLM evaluations around,
+                    # or an empty corpus load (load_resumes() returns [] when Supabase fails)
+                    cacheable = (bool(valid_resumes) and not degraded and llm_usage.summary()['errors'] == 0
+                                 and not llm_usage.budget_exceeded)
+                    return project_recommendations(recommended, fields), cacheable
+                
+                # Identical concurrent requests share one computation (and its LLM calls)
+                key = recommendation_key(job_desc, top_n, recommendation_type, model_name, fields, get_corpus_version())
+                payload, shared = coalesce(key, compute)
             
+            usage_summary = llm_usage.summary()
             logger.info({
                 'event': 'llm_recommendation_request',
-                'user_id': getattr(request.user, 'id', None),
+                'user_id': request_user_id(request),
                 'params': request.data,
                 'model': model_name,
-                'type': recommendation_type
+                'type': recommendation_type,
+                'llm_usage': usage_summary,
+                'coalesced': shared
             })
-            return Response(recommended)
+            response = Response(payload)
+            response['X-LLM-Usage'] = json.dumps(usage_summary, separators=(',', ':'))
+            return response
         except Exception as e:
             logger.error(f'Error in LLM recommendation: {str(e)}')
             return Response({"error": str(e)}, status=500)
 
+class RecommendationJobsAPI(APIView):
+    """Submit an LLM or hybrid recommendation to run in the background"""
+    renderer_classes = (ORJSONRenderer, BrowsableAPIRenderer)
+
+    def post(self, request):
+        job_desc = request.data.get("job_description", "")
+        if not job_desc:
+            return Response({"error": "job_description is required"}, status=400)
+
+        recommendation_type = request.data.get("recommendation_type", "hybrid")  # hybrid or llm_only
+        if recommendation_type not in ("hybrid", "llm_only"):
+            return Response({"error": "recommendation_type must be hybrid or llm_only"}, status=400)
+        try:
+            top_n = parse_top_n(request.data.get("top_n"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        try:
+            job = submit_job(
+                job_desc,
+                top_n=top_n,
+                recommendation_type=recommendation_type,
+                model_name=request.data.get("model", "llama4"),
+                fields=parse_fields_param(request.query_params.get("fields") or request.data.get("fields")),
+                user_id=request_user_id(request),
+            )
+        except JobQueueFull as e:
+            response = Response({"error": str(e)}, status=503)
+            response['Retry-After'] = '30'
+            return response
+        except Exception as e:
+            logger.error(f'Error submitting recommendation job: {str(e)}')
+            return Response({"error": str(e)}, status=500)
+
+        return Response({
+            'job_id': str(job.id),
+            'status': job.status,
+            'status_url': request.build_absolute_uri(f"{job.id}/"),
+        }, status=202)
+
+class FeedbackAPI(APIView):
+    """Record thumbs-up/down feedback on recommendations; events are buffered and written in bulk"""
+    renderer_classes = (ORJSONRenderer, BrowsableAPIRenderer)
+
+    def post(self, request):
+        try:
+            events = parse_feedback_events(request.data, user_id=request_user_id(request))
+        except InvalidFeedback as e:
+            return Response({"error": str(e)}, status=400)
+
+        accepted, dropped = record_feedback(events)
+        if not accepted:
+            response = Response({"error": "Feedback buffer is full", "dropped": dropped}, status=503)
+            response['Retry-After'] = '5'
+            return response
+        return Response({"accepted": accepted, "dropped": dropped}, status=202)
+
+class RecommendationJobAPI(APIView):
+    """Poll a recommendation job for progress, partial results and final results"""
+    renderer_classes = (ORJSONRenderer, BrowsableAPIRenderer)
+
+    def get(self, request, job_id):
+        job = get_job(job_id)
+        if job is None:
+            return Response({"error": "Job not found"}, status=404)
+        return Response(serialize_job(job))
+
 def get_match_reasons(resume, job_desc):
     """Generate human-readable reasons for the match"""
     reasons = []
@@ -180,41 +439,43 @@ def get_match_reasons(resume, job_desc):
 class ProfileAPI(APIView):
     def get(self, request, user_id):
         try:
-            supabase = create_client(
-                os.getenv("SUPABASE_URL"),
-                os.getenv("SUPABASE_KEY")
-            )
-            
-            # Fetch profile
-            profile_response = supabase.table('profiles') \
-                .select('*') \
-                .eq('id', user_id) \
-                .single() \
-                .execute()
-                
-            profile = profile_response.data
-            
-            # Fetch associated resume
-            resume_response = supabase.table('resumes') \
-                .select('*') \
-                .eq('user_id', user_id) \
-                .single() \
-                .execute()
-                
-            resume = resume_response.data
-            
-            return Response({
-                'profile': profile,
-                'resume': resume
-            })
-            
+            card = get_profile_cards([user_id])[str(user_id)]
+            if card['profile'] is None:
+                return Response({"error": "Profile not found"}, status=404)
+
+            corpus_version = get_corpus_version()
+            if corpus_version is None:
+                return Response(card)
+
+            # Profile rows aren't covered by the corpus version, so the (cached) card itself is hashed too
+            etag = make_etag("profile", user_id, corpus_version, card)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            return with_etag(Response(card), etag)
+
         except Exception as e:
             logger.error(f"Error fetching profile {user_id}: {str(e)}")
             return Response({"error": "Profile not found"}, status=404)
 
+class ProfileBatchAPI(APIView):
+    """Profiles and resumes for many users at once, e.g. a page of dashboard cards"""
+
+    def post(self, request):
+        user_ids = request.data.get("user_ids")
+        if not isinstance(user_ids, list) or not user_ids:
+            return Response({"error": "user_ids must be a non-empty list"}, status=400)
+        if len(user_ids) > PROFILE_BATCH_MAX_IDS:
+            return Response({"error": f"At most {PROFILE_BATCH_MAX_IDS} user_ids per request"}, status=400)
+
+        try:
+            return Response(get_profile_cards(user_ids))
+        except Exception as e:
+            logger.error(f"Error fetching {len(user_ids)} profiles: {str(e)}")
+            return Response({"error": "Failed to fetch profiles"}, status=500)
+
 def create_or_update_profile(user, profile_data):
     # Update or create profile in Supabase
-    supabase = create_client(
+    supabase = get_supabase_client(
         url=os.getenv("SUPABASE_URL"),
         key=os.getenv("SUPABASE_ANON_KEY"),
     )
@@ -230,8 +491,10 @@ def create_or_update_profile(user, profile_data):
         'twitter': profile_data.get('twitter', ''),
         'updated_at': datetime.now().isoformat()
     }).execute()
+    invalidate_profile(user.id)
 
 def get_profile(user_id):
+    supabase = get_supabase_client()
     response = supabase.table('profiles') \
         .select('*') \
         .eq('id', user_id) \
@@ -289,6 +552,42 @@ class GenerateEmbeddingAPI(APIView):
             logger.error(f"Error calculating experience: {str(e)}")
             return 0
 
+class MetricsView(View):
+    """Prometheus scrape endpoint (plain Django view, so scrapes skip DRF/Supabase authentication)"""
+
+    def get(self, request):
+        if METRICS_AUTH_TOKEN:
+            # Not Authorization: SupabaseAuthentication middleware claims that header on every path
+            supplied = request.headers.get('X-Metrics-Token', '')
+            if not hmac.compare_digest(supplied.encode(), METRICS_AUTH_TOKEN.encode()):
+                return HttpResponse(status=401)
+        return HttpResponse(render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+class RequestProfileAPI(APIView):
+    """Download a saved request profile (staff only): ?kind=collapsed (default), pstats or json"""
+
+    def get(self, request, profile_id):
+        user = getattr(request, 'supabase_user', None) or request.user
+        if not getattr(user, 'is_staff', False):
+            return Response({"error": "Staff access required"}, status=403)
+
+        kind = request.query_params.get("kind", "collapsed")
+        path = profile_path(profile_id, kind)
+        if path is None:
+            return Response({"error": "Profile not found"}, status=404)
+        return FileResponse(open(path, 'rb'), as_attachment=kind != 'json', filename=os.path.basename(path))
+
+class MemoryReportAPI(APIView):
+    """Per-component memory report for this worker (staff only)"""
+
+    def get(self, request):
+        user = getattr(request, 'supabase_user', None) or request.user
+        if not getattr(user, 'is_staff', False):
+            return Response({"error": "Staff access required"}, status=403)
+        if request.query_params.get("check"):
+            check_memory_budget(force=True)
+        return Response(memory_report())
+
 class LandingPageView(TemplateView):
     template_name = "landing.html"
 
@@ -307,7 +606,12 @@ class PDFResumeParseAPI(APIView):
             
             # Extract text from PDF
             logger.info(f"Processing PDF resume: {pdf_file.name}")
-            extracted_text = extract_text_from_pdf(pdf_file)
+            try:
+                extracted_text, cache_hit, extraction_ms = extract_text_cached(pdf_file)
+            except PDFTooLarge as e:
+                return Response({"error": str(e)}, status=413)
+            except PDFExtractionTimeout as e:
+                return Response({"error": str(e)}, status=422)
             
             if not extracted_text or len(extracted_text.strip()) < 100:  # Sanity check
                 return Response({"error": "Could not extract meaningful text from PDF"}, status=400)
@@ -316,13 +620,42 @@ class PDFResumeParseAPI(APIView):
             # The frontend will use DeepSeek to parse the text into structured resume data
             return Response({
                 "extracted_text": extracted_text,
-                "message": "Text successfully extracted from PDF"
+                "message": "Text successfully extracted from PDF",
+                "cache_hit": cache_hit,
+                "extraction_ms": round(extraction_ms, 1)
             })
             
         except Exception as e:
             logger.error(f"Error parsing PDF resume: {str(e)}")
             return Response({"error": str(e)}, status=500)
 
+class ResumeIngestAPI(APIView):
+    """Bulk-ingest a zip of PDF resumes (staff only); see the ingest_resumes command for directories"""
+    parser_classes = (MultiPartParser, FormParser)
+
+    def post(self, request):
+        user = getattr(request, 'supabase_user', None) or request.user
+        if not getattr(user, 'is_staff', False):
+            return Response({"error": "Staff access required"}, status=403)
+
+        archive = request.FILES.get('archive')
+        if archive is None:
+            return Response({"error": "No zip archive provided"}, status=400)
+        if not zipfile.is_zipfile(archive):
+            return Response({"error": "File must be a zip archive of PDFs"}, status=400)
+
+        try:
+            report = ingest_pdfs(
+                archive,
+                user_id=request.data.get("user_id") or None,
+                dry_run=str(request.data.get("dry_run", "")).lower() in ("1", "true", "yes"),
+                max_files=INGEST_API_MAX_FILES
+            )
+            return Response(report)
+        except Exception as e:
+            logger.error(f"Error ingesting resumes from {archive.name}: {str(e)}")
+            return Response({"error": str(e)}, status=500)
+
 class TestRecommenderView(TemplateView):
     template_name = "test.html"
     
@@ -350,7 +683,7 @@ class TestRecommenderView(TemplateView):
         
         logger.info({
             'event': 'test_recommendation_request',
-            'user_id': getattr(request.user, 'id', None),
+            'user_id': request_user_id(request),
             'method': method,
             'job_desc_length': len(job_desc)
         })
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 from datetime import datetime
 
 from dotenv import load_dotenv
@@ -23,8 +24,68 @@ load_dotenv()
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_KEY')
 
+# Local access-token verification: legacy HS256 projects set the JWT secret,
+# asymmetric-key projects verify against the JWKS endpoint instead
+SUPABASE_JWT_SECRET = os.getenv('SUPABASE_JWT_SECRET')
+SUPABASE_JWKS_URL = os.getenv(
+    'SUPABASE_JWKS_URL',
+    f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else None
+)
+SUPABASE_JWT_AUDIENCE = os.getenv('SUPABASE_JWT_AUDIENCE', 'authenticated')
+# Minimum seconds between JWKS refetches triggered by unknown key ids
+SUPABASE_JWKS_REFRESH_INTERVAL = int(os.getenv('SUPABASE_JWKS_REFRESH_INTERVAL', '60'))
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', '300'))
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', '10000'))
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', '10000'))
+AUTH_REMOTE_CHECK_FIRST_SEEN = os.getenv('AUTH_REMOTE_CHECK_FIRST_SEEN', 'True') == 'True'
+
+# Shared Supabase HTTP connection pool (one per project, reused across requests)
+SUPABASE_POOL_MAX_CONNECTIONS = int(os.getenv('SUPABASE_POOL_MAX_CONNECTIONS', '20'))
+SUPABASE_POOL_MAX_KEEPALIVE = int(os.getenv('SUPABASE_POOL_MAX_KEEPALIVE', '10'))
+SUPABASE_POOL_KEEPALIVE_EXPIRY = float(os.getenv('SUPABASE_POOL_KEEPALIVE_EXPIRY', '30'))
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv('SUPABASE_CONNECT_TIMEOUT', '5'))
+SUPABASE_READ_TIMEOUT = float(os.getenv('SUPABASE_READ_TIMEOUT', '30'))
+
 # OpenRouter API configuration
 OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY')
+# Point at `manage.py fake_openrouter` (e.g. http://127.0.0.1:8765/api/v1) for offline load tests
+OPENROUTER_BASE_URL = os.getenv('OPENROUTER_BASE_URL', 'https://openrouter.ai/api/v1')
+OPENROUTER_TIMEOUT = float(os.getenv('OPENROUTER_TIMEOUT', '60'))
+
+# LLM prompt token budgets (0 disables trimming)
+LLM_RESUME_TOKEN_BUDGET = int(os.getenv('LLM_RESUME_TOKEN_BUDGET', '600'))
+LLM_JOB_TOKEN_BUDGET = int(os.getenv('LLM_JOB_TOKEN_BUDGET', '800'))
+LLM_FORMAT_CACHE_SIZE = int(os.getenv('LLM_FORMAT_CACHE_SIZE', '1024'))
+# Experience entries and skills whose embeddings are kept for relevance trimming
+LLM_SECTION_EMBEDDING_CACHE_SIZE = int(os.getenv('LLM_SECTION_EMBEDDING_CACHE_SIZE', '4096'))
+
+# LLM call retries and usage accounting (0 disables the per-user daily token budget)
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '2'))
+LLM_RETRY_BACKOFF = float(os.getenv('LLM_RETRY_BACKOFF', '1.0'))
+LLM_DAILY_TOKEN_BUDGET = int(os.getenv('LLM_DAILY_TOKEN_BUDGET', '0'))
+LLM_METRICS_WINDOW_SECONDS = int(os.getenv('LLM_METRICS_WINDOW_SECONDS', '3600'))
+
+# Async views: concurrent OpenRouter calls per request, and executor sizes for I/O and scoring
+LLM_ASYNC_CONCURRENCY = int(os.getenv('LLM_ASYNC_CONCURRENCY', '8'))
+ASYNC_IO_WORKERS = int(os.getenv('ASYNC_IO_WORKERS', '32'))
+ASYNC_SCORING_WORKERS = int(os.getenv('ASYNC_SCORING_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+# Job descriptions accepted per POST /recommend/batch/
+BATCH_RECOMMEND_MAX_JOBS = int(os.getenv('BATCH_RECOMMEND_MAX_JOBS', '100'))
+
+# Background recommendation jobs (POST /recommend/jobs/)
+RECOMMENDATION_JOB_WORKERS = int(os.getenv('RECOMMENDATION_JOB_WORKERS', '2'))
+RECOMMENDATION_JOB_MAX_QUEUED = int(os.getenv('RECOMMENDATION_JOB_MAX_QUEUED', '20'))
+RECOMMENDATION_JOB_MAX_ATTEMPTS = int(os.getenv('RECOMMENDATION_JOB_MAX_ATTEMPTS', '2'))
+RECOMMENDATION_JOB_STALE_SECONDS = int(os.getenv('RECOMMENDATION_JOB_STALE_SECONDS', '120'))
+RECOMMENDATION_JOB_HEARTBEAT_INTERVAL = int(os.getenv('RECOMMENDATION_JOB_HEARTBEAT_INTERVAL', '30'))
+RECOMMENDATION_JOB_RECOVERY_INTERVAL = int(os.getenv('RECOMMENDATION_JOB_RECOVERY_INTERVAL', '60'))
+
+# Recommendation feedback (POST /recommend/feedback/): buffered in memory, flushed in bulk
+FEEDBACK_FLUSH_SIZE = int(os.getenv('FEEDBACK_FLUSH_SIZE', '200'))
+FEEDBACK_FLUSH_INTERVAL = float(os.getenv('FEEDBACK_FLUSH_INTERVAL', '5.0'))
+FEEDBACK_MAX_BUFFERED = int(os.getenv('FEEDBACK_MAX_BUFFERED', '10000'))
+FEEDBACK_MAX_BATCH = int(os.getenv('FEEDBACK_MAX_BATCH', '500'))
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -75,7 +136,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",  # WhiteNoise after SecurityMiddleware
+    "recommender.middleware.StaticFilesMiddleware",  # WhiteNoise after SecurityMiddleware, async-capable
+    "recommender.middleware.CompressionMiddleware",  # gzip large API responses
+    "recommender.middleware.ServerTimingMiddleware",  # per-stage Server-Timing header and latency histograms
+    "recommender.middleware.MemoryGuardMiddleware",  # shed cache memory as RSS nears MEMORY_BUDGET_MB
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -84,9 +148,9 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     'recommender.middleware.SupabaseAuthentication',
-    "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    'recommender.middleware.ProfilingMiddleware',  # after auth, so ?profile=1 can check is_staff
 ]
+# Every middleware above runs natively under ASGI, so async views hold no thread while they wait
 
 # --- CORS and CSRF settings for frontend integration ---
 # Update the CORS settings to allow requests from your mobile app and deployed frontend
@@ -128,12 +192,22 @@ CORS_ALLOW_HEADERS = [
     'authorization',
     'content-type',
     'dnt',
+    'if-none-match',
     'origin',
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
 ]
 
+# Response metadata headers the frontend is allowed to read
+CORS_EXPOSE_HEADERS = [
+    'x-llm-usage',
+    'x-next-cursor',
+    'etag',
+    'server-timing',
+    'x-profile-id',
+]
+
 # If your mobile app needs wildcard origin support (test environment)
 # Uncomment the line below during development if you face CORS issues
 # CORS_ALLOW_ALL_ORIGINS = True
@@ -166,6 +240,8 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Recommendation job workers write from several threads; wait for locks instead of failing
+        "OPTIONS": {"timeout": 20},
     },
     "mongo": {
         "ENGINE": "djongo",  # Use djongo for MongoDB integration
@@ -213,13 +289,32 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Logging Configuration
+# Recommender log level, longest message written before truncation, and the per-event sampling
+# rates applied to the log file (WARNING and above are always kept)
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_MAX_MESSAGE_LENGTH = int(os.getenv('LOG_MAX_MESSAGE_LENGTH', '2000'))
+LOG_SAMPLE_RATES = {
+    'llm_call': float(os.getenv('LOG_SAMPLE_LLM_CALL', '0.1')),
+    'extracted_requirements': float(os.getenv('LOG_SAMPLE_EXTRACTED_REQUIREMENTS', '0.1')),
+    'recommendation_request': float(os.getenv('LOG_SAMPLE_RECOMMENDATION_REQUEST', '1.0')),
+    'llm_recommendation_request': float(os.getenv('LOG_SAMPLE_LLM_RECOMMENDATION_REQUEST', '1.0')),
+}
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'sampling': {
+            '()': 'recommender.logging_handlers.SamplingFilter',
+            'rates': LOG_SAMPLE_RATES,
+        },
+    },
     'formatters': {
         'verbose': {
+            '()': 'recommender.logging_handlers.TruncatingFormatter',
             'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
+            'max_length': LOG_MAX_MESSAGE_LENGTH,
         },
         'json': {
             'format': '{"timestamp": "%(asctime)s", "level": "%(levelname)s", "message": %(message)s}',
@@ -231,15 +326,17 @@ LOGGING = {
             'class': 'logging.StreamHandler',
         },
         'file': {
-            'class': 'logging.FileHandler',
+            # Written from a background thread so request threads never wait on disk
+            'class': 'recommender.logging_handlers.AsyncFileHandler',
             'filename': 'logs/recommender.log',  # Logs will be written here
             'formatter': 'verbose',
+            'filters': ['sampling'],
         },
     },
     'loggers': {
         'recommender': {
             'handlers': ['file'],  # Only write to file, not console
-            'level': 'DEBUG',
+            'level': LOG_LEVEL,
         },
     },
 }
@@ -253,3 +350,71 @@ CACHES = {
         "LOCATION": "unique-snowflake",  # Unique identifier for the cache
     }
 }
+
+# Set CACHE_REDIS_URL to share cached data (profile cards, token budgets) across workers
+if os.getenv('CACHE_REDIS_URL'):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv('CACHE_REDIS_URL'),
+    }
+
+# Profile cards (profile + resume) are cached per user. Writes made through this app invalidate
+# them; rows edited directly in Supabase can be served stale for up to PROFILE_CACHE_TTL seconds
+PROFILE_CACHE_ALIAS = os.getenv('PROFILE_CACHE_ALIAS', 'default')
+PROFILE_CACHE_TTL = int(os.getenv('PROFILE_CACHE_TTL', '300'))
+PROFILE_BATCH_MAX_IDS = int(os.getenv('PROFILE_BATCH_MAX_IDS', '100'))
+
+# Rows per Supabase request when loading resumes for recommendation
+RESUME_PAGE_SIZE = int(os.getenv('RESUME_PAGE_SIZE', '500'))
+
+# Identical concurrent recommendation requests share one computation; results are reused for COALESCE_RESULT_TTL
+COALESCE_RESULT_TTL = int(os.getenv('COALESCE_RESULT_TTL', '60'))
+COALESCE_WAIT_TIMEOUT = float(os.getenv('COALESCE_WAIT_TIMEOUT', '150'))
+CORPUS_VERSION_TTL = int(os.getenv('CORPUS_VERSION_TTL', '30'))
+
+# Full /recommend/ rankings kept for cursor pagination (X-Next-Cursor)
+RANKING_CACHE_ALIAS = os.getenv('RANKING_CACHE_ALIAS', 'default')
+RANKING_CACHE_TTL = int(os.getenv('RANKING_CACHE_TTL', '900'))
+RANKING_MAX_PAGE_SIZE = int(os.getenv('RANKING_MAX_PAGE_SIZE', '100'))
+
+# Minimum response size (bytes) before gzip compression kicks in
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESSION_MIN_BYTES', '1024'))
+
+# Token required in the X-Metrics-Token header to scrape /metrics (empty = open, e.g. when only reachable on a private network)
+METRICS_AUTH_TOKEN = os.getenv('METRICS_AUTH_TOKEN', '')
+
+# On-demand request profiling: where profiles are kept, how many, and the fraction of /recommend/ traffic profiled unasked
+PROFILING_DIR = os.getenv('PROFILING_DIR', os.path.join(tempfile.gettempdir(), 'resume-recommender-profiles'))
+PROFILING_MAX_PROFILES = int(os.getenv('PROFILING_MAX_PROFILES', '50'))
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_DEFAULT_MODE = os.getenv('PROFILING_DEFAULT_MODE', 'sample')  # sample or deterministic
+
+# Memory budget per worker (0 = no guard): above the soft limit corpus embeddings are kept as float16 and
+# caches are trimmed, above the hard limit result caches are dropped; tracemalloc attribution is opt-in
+MEMORY_BUDGET_MB = int(os.getenv('MEMORY_BUDGET_MB', '0'))
+MEMORY_SOFT_LIMIT = float(os.getenv('MEMORY_SOFT_LIMIT', '0.80'))
+MEMORY_HARD_LIMIT = float(os.getenv('MEMORY_HARD_LIMIT', '0.92'))
+MEMORY_TRACEMALLOC = os.getenv('MEMORY_TRACEMALLOC', 'False') == 'True'
+
+# PDF resume uploads: size/page/time limits. Extraction runs in PDF_PROCESS_WORKERS worker processes,
+# killed past PDF_EXTRACTION_TIMEOUT; 0 extracts in the request thread (limit checked between pages only)
+PDF_MAX_BYTES = int(os.getenv('PDF_MAX_BYTES', str(10 * 1024 * 1024)))
+PDF_MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', '50'))
+PDF_EXTRACTION_TIMEOUT = float(os.getenv('PDF_EXTRACTION_TIMEOUT', '20'))
+PDF_PROCESS_WORKERS = int(os.getenv('PDF_PROCESS_WORKERS', '1'))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '16'))
+
+# Extracted PDF text cached on disk by SHA-256 of the upload, LRU-evicted beyond PDF_CACHE_MAX_BYTES
+PDF_CACHE_DIR = os.getenv('PDF_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'resume-recommender-pdf-cache'))
+PDF_CACHE_MAX_BYTES = int(os.getenv('PDF_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+
+# Bulk PDF ingestion pipeline (ingest_resumes command, /ingest-resumes/)
+INGEST_QUEUE_SIZE = int(os.getenv('INGEST_QUEUE_SIZE', '32'))
+INGEST_EXTRACT_WORKERS = int(os.getenv('INGEST_EXTRACT_WORKERS', '4'))
+INGEST_NORMALIZE_WORKERS = int(os.getenv('INGEST_NORMALIZE_WORKERS', '2'))
+INGEST_ENCODE_BATCH_SIZE = int(os.getenv('INGEST_ENCODE_BATCH_SIZE', '32'))
+INGEST_UPSERT_BATCH_SIZE = int(os.getenv('INGEST_UPSERT_BATCH_SIZE', '100'))
+INGEST_API_MAX_FILES = int(os.getenv('INGEST_API_MAX_FILES', '200'))
+
+# Keep PDF uploads up to PDF_MAX_BYTES in memory instead of spooling them to a temp file
+FILE_UPLOAD_MAX_MEMORY_SIZE = PDF_MAX_BYTES